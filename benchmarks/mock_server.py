@@ -0,0 +1,111 @@
+import asyncio
+import hashlib
+import random
+from typing import Dict, Tuple
+from aiohttp import web
+from loguru import logger
+from corpus import FeedCorpus
+
+
+class MockRssServer:
+    """
+    本地模拟 RSS 服务
+
+    /feed/{id}.xml 返回合成 feed，可配置延迟、抖动和错误率；
+    ?format=atom 返回 Atom 格式。feed 内容在首次请求时生成并缓存，
+    响应带 ETag，If-None-Match 命中时返回 304；compress 为 True 时按 Accept-Encoding 压缩响应。
+    """
+
+    def __init__(self, corpus: FeedCorpus, latency: float = 0.05, jitter: float = 0.02,
+                 error_rate: float = 0.0, host: str = "127.0.0.1", port: int = 18080, seed: int = 42,
+                 compress: bool = True):
+        self.corpus = corpus
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.compress = compress
+        self.host = host
+        self.port = port
+        self.rng = random.Random(seed)
+        self.requests = 0
+        self.errors = 0
+        self.not_modified = 0
+        self._cache: Dict[Tuple[int, str], Tuple[bytes, str]] = {}
+        self._runner = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def feed_url(self, feed_id: int, fmt: str = "rss") -> str:
+        suffix = "?format=atom" if fmt == "atom" else ""
+        return f"{self.base_url}/feed/{feed_id}.xml{suffix}"
+
+    async def handle_feed(self, request: web.Request) -> web.Response:
+        self.requests += 1
+        feed_id = int(request.match_info["feed_id"])
+        fmt = request.query.get("format", "rss")
+
+        delay = max(0.0, self.rng.gauss(self.latency, self.jitter)) if self.latency else 0.0
+        if delay:
+            await asyncio.sleep(delay)
+        if self.error_rate and self.rng.random() < self.error_rate:
+            self.errors += 1
+            return web.Response(status=503, text="mock upstream error")
+
+        key = (feed_id, fmt)
+        cached = self._cache.get(key)
+        if cached is None:
+            body = self.corpus.atom(feed_id) if fmt == "atom" else self.corpus.rss(feed_id)
+            cached = self._cache[key] = (body, f'"{hashlib.md5(body).hexdigest()}"')
+        body, etag = cached
+        if request.headers.get("If-None-Match") == etag:
+            self.not_modified += 1
+            return web.Response(status=304, headers={"ETag": etag})
+        content_type = "application/atom+xml" if fmt == "atom" else "application/rss+xml"
+        response = web.Response(body=body, content_type=content_type, charset="utf-8", headers={"ETag": etag})
+        if self.compress:
+            response.enable_compression()
+        return response
+
+    async def start(self) -> None:
+        app = web.Application()
+        app.router.add_get("/feed/{feed_id:\\d+}.xml", self.handle_feed)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+        logger.info(f"Mock RSS server listening on {self.base_url}")
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+
+async def main():
+    import argparse
+    parser = argparse.ArgumentParser(description="启动本地模拟 RSS 服务")
+    parser.add_argument("--port", type=int, default=18080)
+    parser.add_argument("--items", type=int, default=50, help="每个 feed 的条目数")
+    parser.add_argument("--words", type=int, default=80, help="每个条目的词数")
+    parser.add_argument("--latency", type=float, default=0.05, help="平均响应延迟（秒）")
+    parser.add_argument("--jitter", type=float, default=0.02, help="延迟标准差（秒）")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="返回 503 的比例")
+    parser.add_argument("--no-compress", action="store_true", help="不压缩响应")
+    args = parser.parse_args()
+
+    server = MockRssServer(
+        FeedCorpus(items=args.items, words_per_item=args.words),
+        latency=args.latency, jitter=args.jitter, error_rate=args.error_rate, port=args.port,
+        compress=not args.no_compress
+    )
+    await server.start()
+    try:
+        while True:
+            await asyncio.sleep(3600)
+    finally:
+        await server.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
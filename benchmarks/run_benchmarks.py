@@ -0,0 +1,329 @@
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Optional
+
+import aiohttp
+import psutil
+from loguru import logger
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(BENCH_DIR)
+for path in (BENCH_DIR, PROJECT_ROOT):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+from corpus import FeedCorpus, KEYWORDS
+from mock_server import MockRssServer
+from tools.batch_rss_generator import BatchRssGenerator
+
+# 对比时检查的指标及方向：higher 表示越大越好
+COMPARED_METRICS = {
+    "search.throughput_rps": "higher",
+    "search.latency_ms.p50": "lower",
+    "search.latency_ms.p95": "lower",
+    "search.latency_ms.p99": "lower",
+    "startup.seconds": "lower",
+    "memory.rss_after_load_mb": "lower",
+}
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=PROJECT_ROOT, stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except Exception:
+        return None
+
+
+async def generate_plugins(server: MockRssServer, count: int, atom_ratio: float, output_dir: str) -> int:
+    """用 BatchRssGenerator 生成指向模拟服务的插件"""
+    rng = random.Random(count)
+    urls = [
+        server.feed_url(i, "atom" if rng.random() < atom_ratio else "rss")
+        for i in range(1, count + 1)
+    ]
+    generator = BatchRssGenerator(output_dir)
+    generated = await generator.generate_plugins(urls, "bench")
+    return len(generated)
+
+
+async def wait_for_startup(base_url: str, expected: int, process: subprocess.Popen, timeout: float) -> float:
+    """轮询 /api/plugins，直到全部插件加载完成，返回启动耗时"""
+    started = time.perf_counter()
+    async with aiohttp.ClientSession() as session:
+        while time.perf_counter() - started < timeout:
+            if process.poll() is not None:
+                raise RuntimeError(f"服务进程已退出，返回码 {process.returncode}")
+            try:
+                async with session.get(f"{base_url}/api/plugins") as response:
+                    if response.status == 200:
+                        data = await response.json()
+                        plugins = data.get("plugins", []) if isinstance(data, dict) else data
+                        if len(plugins) >= expected:
+                            return time.perf_counter() - started
+            except aiohttp.ClientError:
+                pass
+            await asyncio.sleep(0.05)
+    raise TimeoutError(f"服务在 {timeout} 秒内未完成启动")
+
+
+async def run_load(base_url: str, requests: int, concurrency: int, warmup: int, seed: int) -> Dict[str, Any]:
+    """以固定并发发送搜索请求，统计吞吐和延迟分布"""
+    rng = random.Random(seed)
+    # 混入少量不会命中的关键词，覆盖空结果路径
+    keywords = [rng.choice(KEYWORDS + ["不存在的关键词"]) for _ in range(requests + warmup)]
+    latencies: List[float] = []
+    errors = 0
+    partial = 0
+    results = 0
+    position = 0
+
+    async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=120)) as session:
+        async def one(keyword: str, record: bool) -> None:
+            nonlocal errors, partial, results
+            started = time.perf_counter()
+            try:
+                async with session.post(f"{base_url}/api/search", json={"keyword": keyword}) as response:
+                    data = await response.json()
+                    ok = response.status == 200
+            except Exception:
+                ok, data = False, {}
+            if not record:
+                return
+            latencies.append((time.perf_counter() - started) * 1000)
+            if ok:
+                results += len(data.get("results", []))
+                # 部分插件失败时响应仍为 200，错误信息放在 error 字段
+                if data.get("error"):
+                    partial += 1
+            else:
+                errors += 1
+
+        async def worker(record: bool, total: int) -> None:
+            nonlocal position
+            while position < total:
+                keyword = keywords[position]
+                position += 1
+                await one(keyword, record)
+
+        await asyncio.gather(*(worker(False, warmup) for _ in range(concurrency)))
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(True, warmup + requests) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "partial_errors": partial,
+        "results_total": results,
+        "elapsed_seconds": round(elapsed, 3),
+        "throughput_rps": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        "latency_ms": {
+            "min": round(min(latencies), 2) if latencies else 0.0,
+            "p50": round(percentile(latencies, 50), 2),
+            "p90": round(percentile(latencies, 90), 2),
+            "p95": round(percentile(latencies, 95), 2),
+            "p99": round(percentile(latencies, 99), 2),
+            "max": round(max(latencies), 2) if latencies else 0.0,
+            "mean": round(sum(latencies) / len(latencies), 2) if latencies else 0.0,
+        },
+    }
+
+
+def peak_rss_mb(process: psutil.Process) -> Optional[float]:
+    """读取进程峰值常驻内存（仅 Linux 提供 VmHWM）"""
+    try:
+        with open(f"/proc/{process.pid}/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return round(int(line.split()[1]) / 1024, 2)
+    except OSError:
+        pass
+    return None
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    corpus = FeedCorpus(items=args.items, words_per_item=args.words, seed=args.seed)
+    server = MockRssServer(
+        corpus, latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+        port=args.mock_port or free_port(), seed=args.seed
+    )
+    await server.start()
+    workdir = tempfile.mkdtemp(prefix="searchub-bench-")
+    plugin_dir = os.path.join(workdir, "plugins")
+    process = None
+    try:
+        # 生成阶段的健康检查不计入错误率
+        error_rate, server.error_rate = server.error_rate, 0.0
+        generated = await generate_plugins(server, args.plugins, args.atom_ratio, plugin_dir)
+        server.error_rate = error_rate
+        logger.info(f"生成了 {generated} 个基准插件: {plugin_dir}")
+
+        port = args.port or free_port()
+        base_url = f"http://127.0.0.1:{port}"
+        env = dict(os.environ, SEARCHUB_PLUGIN_DIR=plugin_dir)
+        process = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1",
+             "--port", str(port), "--log-level", "warning"],
+            cwd=PROJECT_ROOT, env=env,
+            stdout=subprocess.DEVNULL, stderr=None if args.verbose else subprocess.DEVNULL,
+        )
+        startup = await wait_for_startup(base_url, generated, process, args.startup_timeout)
+        proc = psutil.Process(process.pid)
+        rss_idle = proc.memory_info().rss / 1024 / 1024
+        logger.info(f"服务启动耗时 {startup:.3f}s，空闲内存 {rss_idle:.1f}MB")
+
+        mock_requests_before = server.requests
+        search = await run_load(base_url, args.requests, args.concurrency, args.warmup, args.seed)
+        rss_loaded = proc.memory_info().rss / 1024 / 1024
+
+        return {
+            "meta": {
+                "commit": git_commit(),
+                "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "cpu_count": os.cpu_count(),
+            },
+            "params": {
+                "plugins": args.plugins,
+                "items_per_feed": args.items,
+                "words_per_item": args.words,
+                "atom_ratio": args.atom_ratio,
+                "latency": args.latency,
+                "jitter": args.jitter,
+                "error_rate": args.error_rate,
+                "requests": args.requests,
+                "concurrency": args.concurrency,
+                "warmup": args.warmup,
+                "seed": args.seed,
+            },
+            "startup": {"seconds": round(startup, 3), "plugins_loaded": generated},
+            "search": search,
+            "memory": {
+                "rss_idle_mb": round(rss_idle, 2),
+                "rss_after_load_mb": round(rss_loaded, 2),
+                "peak_rss_mb": peak_rss_mb(proc),
+            },
+            "mock_server": {
+                "requests": server.requests - mock_requests_before,
+                "errors": server.errors,
+            },
+        }
+    finally:
+        if process is not None and process.poll() is None:
+            process.terminate()
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+        await server.stop()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def lookup(data: Dict[str, Any], dotted: str) -> Optional[float]:
+    for key in dotted.split("."):
+        if not isinstance(data, dict) or key not in data:
+            return None
+        data = data[key]
+    return data
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    """和基线结果比较，返回超过阈值的退化项"""
+    regressions = []
+    print(f"\n与基线 {baseline.get('meta', {}).get('commit')} 比较（阈值 {threshold:.0%}）:")
+    for name, direction in COMPARED_METRICS.items():
+        new, old = lookup(current, name), lookup(baseline, name)
+        if not new or not old:
+            continue
+        change = (new - old) / old
+        worse = change < -threshold if direction == "higher" else change > threshold
+        flag = "  <-- 退化" if worse else ""
+        print(f"  {name:32} {old:>10} -> {new:>10} ({change:+.1%}){flag}")
+        if worse:
+            regressions.append(name)
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="SearcHub 基准测试")
+    parser.add_argument("--plugins", type=int, default=10, help="生成的插件数量")
+    parser.add_argument("--items", type=int, default=50, help="每个 feed 的条目数")
+    parser.add_argument("--words", type=int, default=80, help="每个条目的词数")
+    parser.add_argument("--atom-ratio", type=float, default=0.3, help="Atom 格式 feed 的比例")
+    parser.add_argument("--latency", type=float, default=0.05, help="模拟上游平均延迟（秒）")
+    parser.add_argument("--jitter", type=float, default=0.02, help="模拟上游延迟标准差（秒）")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="模拟上游返回 503 的比例")
+    parser.add_argument("--requests", type=int, default=200, help="计入统计的搜索请求数")
+    parser.add_argument("--concurrency", type=int, default=8, help="并发请求数")
+    parser.add_argument("--warmup", type=int, default=20, help="预热请求数")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--port", type=int, help="服务端口，默认随机")
+    parser.add_argument("--mock-port", type=int, help="模拟 RSS 服务端口，默认随机")
+    parser.add_argument("--startup-timeout", type=float, default=120)
+    parser.add_argument("--output", help="结果 JSON 路径，默认 benchmarks/results/<时间>-<提交>.json")
+    parser.add_argument("--compare", help="基线结果 JSON，用于检测性能退化")
+    parser.add_argument("--threshold", type=float, default=0.1, help="判定退化的相对变化阈值")
+    parser.add_argument("--verbose", action="store_true", help="输出服务进程的日志")
+    args = parser.parse_args()
+
+    if not args.verbose:
+        logger.remove()
+        logger.add(sys.stderr, level="INFO", filter=lambda record: record["name"] in ("__main__", "mock_server"))
+
+    result = asyncio.run(run(args))
+
+    output = args.output or os.path.join(
+        BENCH_DIR, "results", f"{time.strftime('%Y%m%d-%H%M%S')}-{result['meta']['commit'] or 'local'}.json"
+    )
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
+
+    search = result["search"]
+    print(json.dumps({
+        "startup_seconds": result["startup"]["seconds"],
+        "throughput_rps": search["throughput_rps"],
+        "latency_ms": search["latency_ms"],
+        "errors": search["errors"],
+        "partial_errors": search["partial_errors"],
+        "rss_after_load_mb": result["memory"]["rss_after_load_mb"],
+    }, ensure_ascii=False, indent=2))
+    print(f"结果已写入 {output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if compare(result, baseline, args.threshold):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,18 +3,28 @@ import os
 from fastapi import FastAPI, Request, HTTPException, UploadFile, File
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, PlainTextResponse
 from loguru import logger
 from src.core.plugin_manager import PluginManager
 from src.core.environment_manager import EnvironmentManager
-from src.core.result_aggregator import ResultAggregator
 from src.core.search_coordinator import SearchCoordinator
+from src.core.subscriptions import SubscriptionManager
 from src.api.routes import router
+from src.api.responses import ResponseEncoder
 from fastapi.middleware.cors import CORSMiddleware
 from typing import Dict
+import time
 import yaml
 import shutil
 from src.models.schemas import SearchRequest, SearchResponse
+from src.core.metrics import metrics, STARTUP_SECONDS
+from src.core.tracing import tracer
+from src.core.logging_setup import setup_logging
+from src.core.profiler import loop_lag, watchdog
+from src.core.plugin_watcher import PluginWatcher
+
+# 进程启动时间，用于计算运行时长
+START_TIME = time.time()
 
 app = FastAPI(
     title="Data Aggregator",
@@ -33,9 +43,6 @@ app = FastAPI(
     }]
 )
 
-# 配置日志
-logger.add("logs/app.log", rotation="500 MB", level="INFO")
-
 # 修改静态文件和模板配置
 static_path = os.path.join(os.path.dirname(__file__), "frontend", "static")
 templates_path = os.path.join(os.path.dirname(__file__), "frontend", "templates")
@@ -53,14 +60,33 @@ templates = Jinja2Templates(directory=templates_path)
 # 初始化核心组件
 environment_manager = EnvironmentManager()
 
+# 配置日志
+setup_logging(environment_manager.config)
+
+# 配置请求追踪
+tracer.configure(environment_manager.config.get('tracing', {}))
+
 # 修改 plugin_manager 的初始化
 plugin_manager = PluginManager()
+plugin_manager.configure(environment_manager.config, environment_manager)
+
+# 插件目录，可用环境变量 SEARCHUB_PLUGIN_DIR 覆盖（基准测试用它指向生成的插件）
+PLUGIN_DIR = os.environ.get(
+    'SEARCHUB_PLUGIN_DIR',
+    environment_manager.config.get('plugins', {}).get('directory', 'plugins')
+)
 
-result_aggregator = ResultAggregator()
 search_coordinator = SearchCoordinator(
     plugin_manager=plugin_manager,
-    environment_manager=environment_manager,
-    result_aggregator=result_aggregator
+    environment_manager=environment_manager
+)
+subscription_manager = SubscriptionManager(plugin_manager, environment_manager.config.get('subscriptions', {}))
+response_encoder = ResponseEncoder(environment_manager.config.get('search', {}).get('compression', {}))
+
+# 插件热加载
+development_config = environment_manager.config.get('development', {})
+plugin_watcher = PluginWatcher(
+    plugin_manager, PLUGIN_DIR, development_config.get('plugin_watch_interval', 1.0)
 )
 
 # 注册路由
@@ -100,7 +126,8 @@ async def dashboard(request: Request):
         active_plugins_count = len([p for p in plugins if p.status == "running"])
         
         # 获取系统运行时间
-        uptime = "0天0小时0分钟"  # 这里可以添加实际的运行时间计算
+        elapsed = int(time.time() - START_TIME)
+        uptime = f"{elapsed // 86400}天{elapsed % 86400 // 3600}小时{elapsed % 3600 // 60}分钟"
         
         # 获取总请求数
         total_requests = 0
@@ -216,6 +243,11 @@ async def tools(request: Request):
             }
         )
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics_endpoint():
+    """Prometheus 指标"""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
 # 添加自定义 Swagger UI 路由
 @app.get("/docs", include_in_schema=False)
 async def custom_swagger_ui():
@@ -278,14 +310,36 @@ async def custom_swagger_ui():
 async def startup_event():
     """服务启动时执行"""
     logger.info("系统启动中...")
-    await plugin_manager.discover_plugins()
-    logger.info("插件加载完成")
+    profiling_config = environment_manager.config.get('profiling', {})
+    if profiling_config.get('loop_lag_interval'):
+        loop_lag.interval = profiling_config['loop_lag_interval']
+        loop_lag.start()
+        if profiling_config.get('blocking_threshold'):
+            watchdog.threshold = profiling_config['blocking_threshold']
+            watchdog.start()
+    await plugin_manager.discover_plugins(PLUGIN_DIR)
+    startup_stats = plugin_manager.startup_stats
+    startup_stats['total_seconds'] = round(time.time() - START_TIME, 3)
+    for phase in ('scan_seconds', 'load_seconds', 'total_seconds'):
+        STARTUP_SECONDS.set(phase[:-len('_seconds')], value=startup_stats[phase])
+    logger.info(f"插件加载完成，启动耗时 {startup_stats['total_seconds']}s")
+    if development_config.get('plugin_hot_reload', False):
+        plugin_watcher.start()
+    if plugin_manager.supervisor is not None:
+        plugin_manager.supervisor.start()
+    search_coordinator.warmer.start()
+    subscription_manager.start()
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """
     应用关闭时的清理
     """
+    watchdog.stop()
+    await loop_lag.stop()
+    await plugin_watcher.stop()
+    await search_coordinator.warmer.stop()
+    await subscription_manager.stop()
     try:
         # 停止所有插件
         plugins = await plugin_manager.get_active_plugins()
@@ -295,8 +349,8 @@ async def shutdown_event():
             except Exception as e:
                 logger.error(f"Failed to stop plugin {plugin.name}: {str(e)}")
                 
-        # 清理环境
-        # TODO: 实现环境清理逻辑
+        # 关闭插件宿主进程
+        await plugin_manager.shutdown()
         
     except Exception as e:
         logger.error(f"Shutdown error: {str(e)}")
@@ -311,7 +365,7 @@ async def create_plugin(plugin_data: Dict):
         plugin_code = plugin_data['code']
         
         # 创建插件目录
-        plugin_dir = os.path.join('plugins', plugin_name)
+        plugin_dir = os.path.join(PLUGIN_DIR, plugin_name)
         os.makedirs(plugin_dir, exist_ok=True)
         
         # 保存配置文件
@@ -324,8 +378,9 @@ async def create_plugin(plugin_data: Dict):
         with open(code_path, 'w') as f:
             f.write(plugin_code)
             
-        # 重新加载插件
-        await plugin_manager.discover_plugins()
+        # 只加载新插件，不重新扫描整个目录
+        if not plugin_manager.load_plugin(plugin_dir):
+            raise ValueError(f"Failed to load plugin {plugin_name}")
         
         return {"status": "success", "message": f"Plugin {plugin_name} created successfully"}
     except Exception as e:
@@ -343,13 +398,12 @@ async def delete_plugin(plugin_name: str):
             pass
         
         # 删除插件目录
-        plugin_dir = os.path.join('plugins', plugin_name)
+        plugin_dir = os.path.join(PLUGIN_DIR, plugin_name)
         if os.path.exists(plugin_dir):
             shutil.rmtree(plugin_dir)
             
         # 从插件管理器中移除插件
-        if plugin_name in plugin_manager.plugins:
-            del plugin_manager.plugins[plugin_name]
+        plugin_manager.unload_plugin(plugin_name)
             
         return {"status": "success", "message": f"Plugin {plugin_name} deleted successfully"}
     except Exception as e:
@@ -126,6 +126,18 @@ stop() {
     echo "系统已停止"
 }
 
+bench() {
+    # 对运行中的实例施加负载，参数原样传给 tools/load_generator.py
+    if ! check_port 9527; then
+        echo "错误: 系统未在运行，请先执行 $0 start"
+        exit 1
+    fi
+    if [ -f "$VENV_PATH" ]; then
+        source $VENV_PATH
+    fi
+    python tools/load_generator.py "$@"
+}
+
 case "$1" in
     start)
         start
@@ -141,8 +153,12 @@ case "$1" in
     status)
         status
         ;;
+    bench)
+        shift
+        bench "$@"
+        ;;
     *)
-        echo "用法: $0 {start|stop|restart|status}"
+        echo "用法: $0 {start|stop|restart|status|bench [压测参数]}"
         exit 1
         ;;
 esac 
\ No newline at end of file
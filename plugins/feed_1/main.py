@@ -9,9 +9,8 @@ if project_root not in sys.path:
 
 from typing import Dict, Any, List
 from src.core.plugin_base import PluginBase
-import aiohttp
-import feedparser
-from bs4 import BeautifulSoup
+from src.models.entry import FeedEntry
+from src.core.logging_setup import log_sample
 from loguru import logger
 import time
 
@@ -22,35 +21,26 @@ class Feed1Plugin(PluginBase):
         super().__init__(name, config)
         self.headers.update(self.config.get("settings", {}).get("request", {}).get("headers", {}))
     
-    async def search(self, keyword: str) -> List[Dict[str, Any]]:
+    async def search(self, keyword: str) -> List[FeedEntry]:
         """执行搜索"""
         try:
             results = []
-            urls = self.config["settings"]["urls"]
             
-            for url in urls:
+            # 源的获取（含镜像对冲）由基类完成
+            async for url, feed in self._iter_feeds():
                 try:
-                    logger.info(f"从 {{url}} 获取数据")
-                    content = await self._make_request(url)
-                    if not content:
-                        logger.warning(f"从 {{url}} 获取内容为空")
-                        continue
-                        
-                    feed = feedparser.parse(content)
                     if not feed.entries:
-                        logger.warning(f"Feed 没有条目: {{url}}")
+                        logger.warning("Feed 没有条目: {}", url)
                         continue
                     
-                    logger.info(f"获取到 {{len(feed.entries)}} 条 Feed 条目")
+                    logger.debug("获取到 {} 条 Feed 条目", len(feed.entries))
                     for entry in feed.entries:
                         title = entry.get("title", "")
                         description = entry.get("description", "")
                         
-                        # 打印调试信息
-                        logger.debug(f"检查条目: {{title}}")
-                        logger.debug(f"关键词: {{keyword}}")
-                        logger.debug(f"标题: {{title}}")
-                        logger.debug(f"描述: {{description[:100]}}...")
+                        # 逐条目调试信息按采样输出，参数仅在输出时格式化
+                        if log_sample("plugin.entry"):
+                            logger.debug("检查条目: {} 关键词: {} 描述: {:.100}", title, keyword, description)
                         
                         # 扩展搜索范围，包括更多字段
                         searchable_text = " ".join([
@@ -64,55 +54,34 @@ class Feed1Plugin(PluginBase):
                         
                         # 在所有文本中搜索关键词
                         if keyword.lower() in searchable_text:
-                            logger.info(f"找到匹配: {{title}}")
-                            
                             # 构建搜索结果
-                            result = {
-                                "platform": self.name,
-                                "content": f"{{title}}\n{{self._clean_html(description)}}",
-                                "url": entry.get("link", ""),
-                                "metadata": {
-                                    "title": title,
-                                    "published": entry.get("published", time.strftime("%Y-%m-%d %H:%M:%S")),
-                                    "author": entry.get("author", "unknown"),
-                                    "source": "交易通知_华商储备商品管理中心有限公司"
-                                }
-                            }
-                            results.append(result)
-                            logger.info(f"添加结果: {{result['platform']}} - {{result['metadata']['title']}}")
+                            results.append(FeedEntry(
+                                platform=self.name,
+                                content=f"{title}\n{self._clean_html(description)}",
+                                url=entry.get("link", ""),
+                                title=title,
+                                published=entry.get("published", time.strftime("%Y-%m-%d %H:%M:%S")),
+                                author=entry.get("author", "unknown"),
+                                source="交易通知_华商储备商品管理中心有限公司"
+                            ))
+                            if log_sample("plugin.match"):
+                                logger.debug("添加结果: {} - {}", self.name, title)
                     
                 except Exception as e:
-                    logger.error(f"处理 {{url}} 时出错: {{str(e)}}")
+                    logger.error("处理 {} 时出错: {}", url, e)
                     continue
             
-            logger.info(f"搜索完成，找到 {{len(results)}} 条结果")
+            logger.debug("搜索完成，找到 {} 条结果", len(results))
             return results
             
         except Exception as e:
-            logger.error(f"搜索过程出错: {{str(e)}}")
+            logger.error("搜索过程出错: {}", e)
             return []
     
     async def health_check(self) -> bool:
         """健康检查"""
         try:
-            url = self.config["settings"]["urls"][0]
-            content = await self._make_request(url)
-            if not content:
-                return False
-            feed = feedparser.parse(content)
-            return len(feed.entries) > 0
+            return await self._probe()
         except Exception as e:
-            logger.error(f"Health check failed: {{str(e)}}")
+            logger.error("Health check failed: {}", e)
             return False
-    
-    def _clean_html(self, html: str) -> str:
-        """清理 HTML 标签"""
-        try:
-            soup = BeautifulSoup(html, "html.parser")
-            for script in soup(["script", "style"]):
-                script.decompose()
-            text = soup.get_text(strip=True)
-            return " ".join(text.split())
-        except Exception as e:
-            logger.error(f"Error cleaning HTML: {{str(e)}}")
-            return html
\ No newline at end of file
@@ -31,15 +31,13 @@ async def test_plugin():
                 print(f"找到 {len(results)} 条结果:")
                 for i, result in enumerate(results, 1):
                     print(f"\n--- 结果 {i} ---")
-                    print(f"平台: {result['platform']}")
-                    print(f"内容: {result['content'][:100]}...")
-                    print(f"链接: {result['url']}")
-                    if 'metadata' in result:
-                        metadata = result['metadata']
-                        print(f"标题: {metadata.get('title', 'N/A')}")
-                        print(f"时间: {metadata.get('published', 'N/A')}")
-                        print(f"作者: {metadata.get('author', 'N/A')}")
-                        print(f"来源: {metadata.get('source', 'N/A')}")
+                    print(f"平台: {result.platform}")
+                    print(f"内容: {result.content[:100]}...")
+                    print(f"链接: {result.url}")
+                    print(f"标题: {result.title or 'N/A'}")
+                    print(f"时间: {result.published or 'N/A'}")
+                    print(f"作者: {result.author or 'N/A'}")
+                    print(f"来源: {result.source or 'N/A'}")
             else:
                 print("未找到相关结果")
                 
@@ -0,0 +1,92 @@
+import gzip
+import json
+from typing import Any, Dict, Optional, Tuple
+from fastapi import Response
+from pydantic import BaseModel
+from ..models.entry import SearchHit
+from ..models.schemas import SearchResponse
+from ..core.metrics import RESPONSE_BYTES
+
+try:
+    import orjson
+except ImportError:  # orjson 为可选依赖，缺失时使用标准库 json
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # brotli 为可选依赖，缺失时只协商 gzip
+    brotli = None
+
+
+def _default(obj: Any) -> Any:
+    """序列化内部对象：SearchHit 直接读取字段，不经过 pydantic 校验"""
+    if isinstance(obj, SearchHit):
+        return {"platform": obj.platform, "content": obj.content, "url": obj.url, "metadata": obj.metadata}
+    if isinstance(obj, BaseModel):
+        return obj.dict()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def render_search_response(result: SearchResponse) -> bytes:
+    """把 SearchResponse 序列化为 JSON，结果列表中的 SearchHit 按需转换"""
+    content = {name: getattr(result, name) for name in SearchResponse.__fields__}
+    if orjson is not None:
+        return orjson.dumps(content, default=_default)
+    return json.dumps(content, default=_default, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+class ResponseEncoder:
+    """
+    搜索响应的快速输出
+
+    结果由内部生成，不再经过 response_model 校验，直接序列化；
+    响应体超过 min_size 时按 Accept-Encoding 协商 br（需安装 brotli）或 gzip 压缩。
+    """
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        config = config or {}
+        self.enabled = config.get('enabled', True)
+        self.min_size = config.get('min_size', 1024)
+        self.gzip_level = config.get('gzip_level', 5)
+        self.brotli_quality = config.get('brotli_quality', 4)
+
+    def negotiate(self, accept_encoding: Optional[str]) -> Optional[str]:
+        """从 Accept-Encoding 中选出使用的编码，优先 br"""
+        if not accept_encoding:
+            return None
+        accepted = set()
+        for item in accept_encoding.split(','):
+            name, _, params = item.strip().partition(';')
+            params = params.strip()
+            if params.startswith('q='):
+                try:
+                    if float(params[2:]) <= 0:
+                        continue
+                except ValueError:
+                    continue
+            accepted.add(name.strip().lower())
+        if brotli is not None and 'br' in accepted:
+            return 'br'
+        if 'gzip' in accepted or '*' in accepted:
+            return 'gzip'
+        return None
+
+    def compress(self, body: bytes, accept_encoding: Optional[str]) -> Tuple[bytes, Optional[str]]:
+        if not self.enabled or len(body) < self.min_size:
+            return body, None
+        encoding = self.negotiate(accept_encoding)
+        if encoding == 'br':
+            return brotli.compress(body, quality=self.brotli_quality), encoding
+        if encoding == 'gzip':
+            return gzip.compress(body, compresslevel=self.gzip_level), encoding
+        return body, None
+
+    def response(self, body: bytes, encoding: Optional[str] = None,
+                 headers: Optional[Dict[str, str]] = None) -> Response:
+        """由已序列化（和压缩）的响应体构建响应"""
+        headers = dict(headers or {})
+        headers['Vary'] = 'Accept-Encoding'
+        if encoding is not None:
+            headers['Content-Encoding'] = encoding
+        RESPONSE_BYTES.inc(encoding or 'identity', amount=len(body))
+        return Response(content=body, media_type="application/json", headers=headers)
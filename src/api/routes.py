@@ -1,9 +1,18 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Query, Header, Request
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from typing import List, Optional
-from ..models.schemas import SearchRequest, SearchResponse, PluginInfo
+from ..models.schemas import SearchRequest, SearchResponse, PluginInfo, SubscriptionRequest, SubscriptionInfo
+from ..core.metrics import SEARCH_REQUESTS, SEARCH_SECONDS, SEARCH_IN_FLIGHT
+from ..core.tracing import tracer
+from ..core.profiler import profiler, loop_lag, watchdog
+from ..core.scheduler import SchedulerOverloaded
+from .responses import ResponseEncoder, render_search_response
 from loguru import logger
 import time
+import json
+import asyncio
 import subprocess
+import threading
 import os
 
 # 创建一个依赖函数来获取组件实例
@@ -15,6 +24,21 @@ def get_search_coordinator():
     from main import search_coordinator
     return search_coordinator
 
+def get_subscription_manager():
+    from main import subscription_manager
+    return subscription_manager
+
+def get_response_encoder() -> ResponseEncoder:
+    from main import response_encoder
+    return response_encoder
+
+def get_profiling_config():
+    from main import environment_manager
+    config = environment_manager.config.get('profiling', {})
+    if not config.get('enabled', False):
+        raise HTTPException(status_code=404, detail="Profiling endpoints are disabled")
+    return config
+
 router = APIRouter(
     prefix="/api",
     tags=["API"],
@@ -31,7 +55,14 @@ router = APIRouter(
 )
 async def search(
     request: SearchRequest,
-    search_coordinator = Depends(get_search_coordinator)
+    http_request: Request,
+    trace: bool = Query(False, description="返回本次请求的阶段耗时树"),
+    x_debug_trace: Optional[bool] = Header(None, description="与 trace 相同，按布尔值解析（1/true/on 开启，0/false/off 关闭）"),
+    accept_encoding: Optional[str] = Header(None),
+    x_priority: Optional[str] = Header(None, description="interactive / batch / background"),
+    x_client_id: Optional[str] = Header(None, description="公平排队使用的客户端标识，缺省为客户端地址"),
+    search_coordinator = Depends(get_search_coordinator),
+    response_encoder: ResponseEncoder = Depends(get_response_encoder)
 ):
     """
     执行聚合搜索
@@ -39,13 +70,46 @@ async def search(
     - **keyword**: 搜索关键词
     - **timeout**: 可选的超时时间（秒）
     - **platforms**: 可选的平台列表，限制只在指定平台中搜索
+    - **limit**: 可选的每页结果数
+    - **cursor**: 可选的翻页游标，取自上一页的 next_cursor，需与上一页使用相同的 keyword
+    - **trace**: 查询参数或 X-Debug-Trace 请求头，返回阶段耗时树
+    - **X-Priority** / **X-Client-Id**: 请求头，扇出排队时的优先级和客户端标识
+
+    响应直接由内部结果序列化（不经过 response_model 校验），并按 Accept-Encoding 压缩；
+    排队已满时返回 429 和 Retry-After
     """
+    SEARCH_IN_FLIGHT.inc()
+    started = time.perf_counter()
     try:
-        response = await search_coordinator.search(request)
-        return response
+        headers = {}
+        with tracer.start_trace("api.search", keyword=request.keyword) as current:
+            result = await search_coordinator.search(
+                request,
+                priority=search_coordinator.scheduler.priority(x_priority),
+                client=x_client_id or (http_request.client.host if http_request.client else "anonymous")
+            )
+            with tracer.span("serialize", results=len(result.results)):
+                body = render_search_response(result)
+            if current is not None:
+                headers["X-Trace-Id"] = current.trace_id
+                if trace or x_debug_trace:
+                    # 耗时树要包含 serialize 阶段，附上后重新序列化，只有调试请求多付这一次
+                    result.trace = current.to_tree()
+                    body = render_search_response(result)
+            with tracer.span("compress", bytes=len(body)):
+                body, encoding = response_encoder.compress(body, accept_encoding)
+        SEARCH_REQUESTS.inc("error" if result.error else "ok")
+        return response_encoder.response(body, encoding, headers)
+    except SchedulerOverloaded as e:
+        SEARCH_REQUESTS.inc("rejected")
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after)})
     except Exception as e:
         logger.error(f"Search error: {str(e)}")
+        SEARCH_REQUESTS.inc("failed")
         raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        SEARCH_IN_FLIGHT.dec()
+        SEARCH_SECONDS.observe(value=time.perf_counter() - started)
 
 @router.get("/plugins", 
     response_model=List[PluginInfo],
@@ -112,25 +176,118 @@ async def stop_plugin(
     summary="获取插件统计信息",
     description="获取指定插件的运行统计信息"
 )
-async def get_plugin_stats(plugin_name: str):
+async def get_plugin_stats(
+    plugin_name: str,
+    plugin_manager = Depends(get_plugin_manager)
+):
     """
     获取插件统计信息
     
     - **plugin_name**: 插件名称
     """
     try:
-        limiter = plugin_manager.rate_limiter_manager.get_limiter(plugin_name)
-        stats = {
-            "total_requests": limiter.total_requests,
-            "current_rate": limiter.total_requests / ((time.time() - limiter.start_time) / 60),
-            "available_tokens": limiter.tokens,
-            "last_request": time.strftime('%Y-%m-%d %H:%M:%S', 
-                                        time.localtime(limiter.last_request))
-        }
-        return stats
+        return await plugin_manager.get_plugin_stats(plugin_name)
     except Exception as e:
         raise HTTPException(status_code=404, detail=str(e))
 
+@router.get("/system/startup",
+    response_model=dict,
+    summary="启动耗时",
+    description="返回最近一次插件扫描与加载的各阶段耗时"
+)
+async def get_startup_stats(
+    plugin_manager = Depends(get_plugin_manager)
+):
+    return plugin_manager.startup_stats
+
+@router.post("/subscriptions",
+    response_model=SubscriptionInfo,
+    summary="创建订阅",
+    description="注册常驻查询，之后出现的匹配条目推送到事件流和 webhook"
+)
+async def create_subscription(
+    request: SubscriptionRequest,
+    subscription_manager = Depends(get_subscription_manager)
+):
+    try:
+        subscription = subscription_manager.subscribe(request.keyword, request.webhook)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return subscription_manager.info(subscription)
+
+@router.get("/subscriptions",
+    response_model=List[SubscriptionInfo],
+    summary="订阅列表"
+)
+async def list_subscriptions(
+    subscription_manager = Depends(get_subscription_manager)
+):
+    return [subscription_manager.info(s) for s in subscription_manager.subscriptions.values()]
+
+@router.delete("/subscriptions/{subscription_id}",
+    response_model=dict,
+    summary="取消订阅"
+)
+async def delete_subscription(
+    subscription_id: str,
+    subscription_manager = Depends(get_subscription_manager)
+):
+    if not subscription_manager.unsubscribe(subscription_id):
+        raise HTTPException(status_code=404, detail=f"订阅不存在: {subscription_id}")
+    return {"status": "success", "message": f"订阅 {subscription_id} 已取消"}
+
+@router.get("/subscriptions/{subscription_id}/events",
+    summary="订阅事件流",
+    description="以 Server-Sent Events 推送订阅的新匹配，每条事件的 data 为 JSON"
+)
+async def subscription_events(
+    subscription_id: str,
+    request: Request,
+    subscription_manager = Depends(get_subscription_manager)
+):
+    try:
+        queue = subscription_manager.listen(subscription_id)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"订阅不存在: {subscription_id}")
+
+    async def stream():
+        try:
+            yield ": connected\n\n"
+            while not await request.is_disconnected():
+                try:
+                    event = await asyncio.wait_for(queue.get(), 15)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                if event is None:
+                    break
+                yield f"id: {event['id']}\nevent: match\ndata: {json.dumps(event, ensure_ascii=False)}\n\n"
+        finally:
+            subscription_manager.unlisten(subscription_id, queue)
+
+    return StreamingResponse(stream(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@router.get("/system/scheduler",
+    response_model=dict,
+    summary="搜索调度",
+    description="返回各优先级正在执行和排队的搜索数"
+)
+async def get_scheduler_stats(
+    search_coordinator = Depends(get_search_coordinator)
+):
+    return search_coordinator.scheduler.snapshot()
+
+@router.get("/system/warming",
+    response_model=dict,
+    summary="关键词预热",
+    description="返回统计中的关键词数和已预热关键词的频次、结果数与计算时间"
+)
+async def get_warming_stats(
+    search_coordinator = Depends(get_search_coordinator)
+):
+    return search_coordinator.warmer.snapshot()
+
 @router.post("/system/{action}",
     response_model=dict,
     summary="系统控制",
@@ -161,4 +318,86 @@ async def control_system(action: str):
         raise HTTPException(
             status_code=500,
             detail=str(e)
-        ) 
\ No newline at end of file
+        ) 
+
+@router.post("/debug/profile/start",
+    response_model=dict,
+    summary="开始 CPU 采样分析",
+    description="在后台线程中对事件循环线程进行栈采样"
+)
+async def start_profile(
+    duration: Optional[float] = Query(None, gt=0, description="自动停止前的最长采样时间（秒）"),
+    interval: Optional[float] = Query(None, gt=0, description="采样间隔（秒）"),
+    all_threads: bool = Query(False, description="采样所有线程，而不只是事件循环线程"),
+    config: dict = Depends(get_profiling_config)
+):
+    """
+    开始采样分析，已有采样在运行时返回 409
+    """
+    duration = min(duration or config.get('max_duration', 300), config.get('max_duration', 300))
+    thread_id = None if all_threads else threading.get_ident()
+    if not profiler.start(thread_id, duration, interval or config.get('sample_interval', 0.005)):
+        raise HTTPException(status_code=409, detail="Profiler is already running")
+    return {"status": "started", "duration": duration, "interval": profiler.interval}
+
+@router.post("/debug/profile/stop",
+    response_class=PlainTextResponse,
+    summary="停止 CPU 采样分析",
+    description="停止采样并返回折叠栈，可直接交给 flamegraph.pl 或 speedscope"
+)
+async def stop_profile(config: dict = Depends(get_profiling_config)):
+    """
+    停止采样并返回折叠栈文本
+    """
+    summary = profiler.stop()
+    return PlainTextResponse(
+        profiler.collapsed(),
+        headers={
+            "X-Profile-Samples": str(summary["samples"]),
+            "X-Profile-Duration": str(summary["duration"]),
+        }
+    )
+
+@router.get("/debug/profile",
+    response_model=dict,
+    summary="CPU 采样分析状态",
+    description="返回采样状态和自身耗时最高的函数"
+)
+async def profile_status(
+    limit: int = Query(20, ge=1, le=200),
+    config: dict = Depends(get_profiling_config)
+):
+    return {**profiler.summary(), "top": profiler.top_functions(limit)}
+
+@router.get("/debug/loop-lag",
+    response_model=dict,
+    summary="事件循环延迟",
+    description="返回最近一段时间的事件循环调度延迟分布"
+)
+async def get_loop_lag(
+    reset: bool = Query(False, description="读取后清空统计"),
+    config: dict = Depends(get_profiling_config)
+):
+    snapshot = loop_lag.snapshot()
+    if reset:
+        loop_lag.reset()
+    return snapshot
+
+@router.get("/debug/blocking",
+    response_model=dict,
+    summary="事件循环阻塞位置",
+    description="返回累计阻塞事件循环时间最长的代码位置及其调用栈"
+)
+async def get_blocking(
+    limit: int = Query(20, ge=1, le=100),
+    reset: bool = Query(False, description="读取后清空统计"),
+    config: dict = Depends(get_profiling_config)
+):
+    result = {
+        "threshold_ms": watchdog.threshold * 1000,
+        "stalls": watchdog.stalls,
+        "offenders": watchdog.worst(limit),
+    }
+    if reset:
+        watchdog.reset()
+    return result
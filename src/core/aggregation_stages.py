@@ -0,0 +1,172 @@
+import heapq
+from typing import Any, Dict, List, Optional, Tuple
+from ..models.entry import SearchHit
+from .deduplicator import ResultDeduplicator
+from .ranker import BM25Ranker, parse_published
+from .snippet import SnippetExtractor
+
+ScoredResults = List[Tuple[float, SearchHit]]
+
+
+class AggregationStage:
+    """
+    聚合流水线阶段基类
+
+    process 在结果流入时逐条调用，返回 None 表示丢弃该结果；
+    discard 在后续阶段丢弃结果时回调，用于释放本阶段为它保存的状态；
+    finalize 在所有批次处理完后调用，可以打分、重排或截断。
+    """
+
+    def __init__(self):
+        self.aggregator = None
+
+    def bind(self, aggregator) -> None:
+        self.aggregator = aggregator
+
+    def process(self, result: SearchHit) -> Optional[SearchHit]:
+        return result
+
+    def discard(self, result: SearchHit) -> None:
+        pass
+
+    def finalize(self, scored: ScoredResults) -> ScoredResults:
+        return scored
+
+
+class DedupeStage(AggregationStage):
+    """
+    合并跨插件和插件内的重复结果，来源记录在 sources（输出为 metadata['sources']）
+    """
+
+    def __init__(self, max_index_size: int = 10000, max_distance: int = 3):
+        super().__init__()
+        self.deduplicator = ResultDeduplicator(max_index_size=max_index_size, max_distance=max_distance)
+
+    def process(self, result: SearchHit) -> Optional[SearchHit]:
+        duplicate, fingerprint, canonical_url = self.deduplicator.find_duplicate(result.url, result.content)
+        source = {'platform': result.platform, 'url': result.url}
+        if duplicate is not None:
+            if duplicate.sources is None:
+                duplicate.sources = []
+            if source not in duplicate.sources:
+                duplicate.sources.append(source)
+            return None
+        result.sources = [source]
+        self.deduplicator.add(result, fingerprint, canonical_url)
+        return result
+
+    def discard(self, result: SearchHit) -> None:
+        # 被丢弃的结果不能再作为代表，否则之后的重复结果会合并到它上面一并丢失
+        self.deduplicator.remove(result)
+
+
+class RankingStage(AggregationStage):
+    """
+    入库时记录每个结果的词频和长度，结束时按聚合器上的插件语料统计写入混合得分
+    """
+
+    def __init__(self, **ranker_options):
+        super().__init__()
+        self.ranker = BM25Ranker(**ranker_options)
+
+    def bind(self, aggregator) -> None:
+        super().bind(aggregator)
+        self.ranker.set_query(aggregator.keyword)
+
+    def process(self, result: SearchHit) -> Optional[SearchHit]:
+        self.ranker.add_document(result, result.title or '', result.content, result.published)
+        return result
+
+    def discard(self, result: SearchHit) -> None:
+        self.ranker.forget(result)
+
+    def finalize(self, scored: ScoredResults) -> ScoredResults:
+        self.ranker.set_corpus(self.aggregator.corpus)
+        return self.ranker.score_all(result for _, result in scored)
+
+
+class RelevanceStage(AggregationStage):
+    """
+    把正文替换为关键词所在句子及上下文，没有命中的结果被丢弃
+
+    高亮区间写入 highlights（输出为 metadata['highlights']），偏移相对于替换后的正文
+    """
+
+    def __init__(self, context: int = 1, max_windows: int = 0):
+        super().__init__()
+        self.context = context
+        self.max_windows = max_windows
+        self.extractor = None
+
+    def bind(self, aggregator) -> None:
+        super().bind(aggregator)
+        self.extractor = SnippetExtractor(aggregator.keyword, self.context, self.max_windows)
+
+    def process(self, result: SearchHit) -> Optional[SearchHit]:
+        snippets = self.extractor.extract(result.content)
+        if not snippets:
+            return None
+        result.content, highlights = self.extractor.render(result.content, snippets)
+        result.highlights = [list(span) for span in highlights]
+        return result
+
+
+class TruncationStage(AggregationStage):
+    """
+    限制单个请求保留的结果数
+
+    流入阶段按发布时间保留最新的 max_results 条，保证内存有上限；
+    结束阶段按得分只保留前 max_results 条。
+    """
+
+    def __init__(self, max_results: int = 1000):
+        super().__init__()
+        self.max_results = max_results
+        self._seq = 0
+        self._heap: List[Tuple[float, int, SearchHit]] = []
+
+    def process(self, result: SearchHit) -> Optional[SearchHit]:
+        published = parse_published(result.published) or 0.0
+        self._seq += 1
+        heapq.heappush(self._heap, (published, self._seq, result))
+        if len(self._heap) > self.max_results:
+            _, _, oldest = heapq.heappop(self._heap)
+            if oldest is result:
+                return None
+            self.aggregator.discard(oldest)
+        return result
+
+    def finalize(self, scored: ScoredResults) -> ScoredResults:
+        if len(scored) <= self.max_results:
+            return scored
+        return heapq.nlargest(self.max_results, scored, key=lambda item: item[0])
+
+
+def build_default_stages(config: Optional[Dict[str, Any]] = None) -> List[AggregationStage]:
+    """
+    按配置构建默认流水线：去重 -> 打分统计 -> 相关片段提取 -> 截断
+    """
+    aggregation_config = (config or {}).get('aggregation', {})
+    dedupe_config = aggregation_config.get('dedupe', {})
+    ranking_config = aggregation_config.get('ranking', {})
+
+    stages: List[AggregationStage] = []
+    if dedupe_config.get('enabled', True):
+        stages.append(DedupeStage(
+            max_index_size=dedupe_config.get('max_index_size', 10000),
+            max_distance=dedupe_config.get('max_distance', 3)
+        ))
+    stages.append(RankingStage(
+        k1=ranking_config.get('k1', 1.2),
+        b=ranking_config.get('b', 0.75),
+        title_weight=ranking_config.get('title_weight', 2.0),
+        recency_weight=ranking_config.get('recency_weight', 0.3),
+        half_life_hours=ranking_config.get('recency_half_life_hours', 72)
+    ))
+    snippet_config = aggregation_config.get('snippets', {})
+    stages.append(RelevanceStage(
+        context=snippet_config.get('context_sentences', 1),
+        max_windows=snippet_config.get('max_windows', 0)
+    ))
+    stages.append(TruncationStage(aggregation_config.get('max_results_per_request', 1000)))
+    return stages
@@ -0,0 +1,198 @@
+import time
+from typing import Any, Dict, List, Optional, Tuple
+from loguru import logger
+from .metrics import CIRCUIT_STATE, CIRCUIT_REJECTIONS
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+_STATE_VALUES = {CLOSED: 0, OPEN: 1, HALF_OPEN: 2}
+
+
+class CircuitOpenError(Exception):
+    """熔断器处于打开状态，请求未发出；results 为可用的缓存结果"""
+
+    def __init__(self, breaker: 'CircuitBreaker', results: Optional[List[Any]] = None):
+        super().__init__(f"circuit {breaker.name} is open, retry in {breaker.retry_after:.0f}s")
+        self.breaker = breaker
+        self.results = results or []
+
+
+class CircuitBreaker:
+    """
+    熔断器
+
+    closed: 正常放行，连续失败 failure_threshold 次后打开；
+    open: 直接拒绝，reset_timeout 秒后进入 half_open；
+    half_open: 最多放行 half_open_max_calls 个试探请求，成功则关闭，失败则重新打开。
+    """
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30,
+                 half_open_max_calls: int = 1):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self._state = CLOSED
+        self.failures = 0
+        self.trips = 0
+        self.opened_at: Optional[float] = None
+        self._trial_calls = 0
+
+    @property
+    def state(self) -> str:
+        if self._state == OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+            self._set_state(HALF_OPEN)
+            self._trial_calls = 0
+        return self._state
+
+    @property
+    def rejecting(self) -> bool:
+        """打开且未到试探时间，不消耗试探名额"""
+        return self.state == OPEN
+
+    @property
+    def retry_after(self) -> float:
+        if self._state != OPEN:
+            return 0.0
+        return max(0.0, self.reset_timeout - (time.monotonic() - self.opened_at))
+
+    def allow(self) -> bool:
+        """是否放行一个请求，放行后须调用 record_success、record_failure 或 release 之一"""
+        state = self.state
+        if state == CLOSED:
+            return True
+        if state == HALF_OPEN and self._trial_calls < self.half_open_max_calls:
+            self._trial_calls += 1
+            return True
+        CIRCUIT_REJECTIONS.inc(self.name)
+        return False
+
+    def record_success(self) -> None:
+        self.failures = 0
+        if self._state != CLOSED:
+            logger.info(f"熔断器 {self.name} 试探成功，已关闭")
+            self._set_state(CLOSED)
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self._state == HALF_OPEN or (self._state == CLOSED and self.failures >= self.failure_threshold):
+            self.trips += 1
+            self.opened_at = time.monotonic()
+            self._set_state(OPEN)
+            logger.warning(f"熔断器 {self.name} 已打开 (连续失败 {self.failures} 次)，{self.reset_timeout}s 后试探")
+
+    def release(self) -> None:
+        """放行的请求被取消、没有结果时归还试探名额"""
+        if self._state == HALF_OPEN and self._trial_calls > 0:
+            self._trial_calls -= 1
+
+    def _set_state(self, state: str) -> None:
+        self._state = state
+        CIRCUIT_STATE.set(self.name, value=_STATE_VALUES[state])
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "failures": self.failures,
+            "trips": self.trips,
+            "retry_after": round(self.retry_after, 1),
+        }
+
+
+class RemoteBreaker:
+    """
+    宿主进程中熔断器的只读副本，由宿主进程随响应发回的 snapshot 构造
+
+    只用于查询状态和拦截搜索，计数和状态转换仍由宿主进程中的熔断器完成。
+    """
+    __slots__ = ('name', '_state', 'failures', 'trips', '_retry_after', '_received_at')
+
+    def __init__(self, name: str, snapshot: Dict[str, Any]):
+        self.name = name
+        self._state = snapshot.get("state", CLOSED)
+        self.failures = snapshot.get("failures", 0)
+        self.trips = snapshot.get("trips", 0)
+        self._retry_after = snapshot.get("retry_after", 0.0)
+        self._received_at = time.monotonic()
+
+    @property
+    def retry_after(self) -> float:
+        if self._state != OPEN:
+            return 0.0
+        return max(0.0, self._retry_after - (time.monotonic() - self._received_at))
+
+    @property
+    def state(self) -> str:
+        if self._state == OPEN and self.retry_after == 0:
+            return HALF_OPEN
+        return self._state
+
+    @property
+    def rejecting(self) -> bool:
+        return self.state == OPEN
+
+    @property
+    def severity(self) -> Tuple[int, float]:
+        """多个宿主进程中同名熔断器的排序依据：打开 > 半开 > 关闭，同为打开时剩余时间长的优先"""
+        return {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}[self.state], self.retry_after
+
+    def report(self) -> None:
+        """把状态写入主进程的 searchub_circuit_state"""
+        CIRCUIT_STATE.set(self.name, value=_STATE_VALUES[self.state])
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "failures": self.failures,
+            "trips": self.trips,
+            "retry_after": round(self.retry_after, 1),
+        }
+
+
+class CircuitBreakerRegistry:
+    """
+    按 key 管理熔断器，key 形如 plugin:<插件名> 或 host:<上游主机>
+
+    同一主机上的所有插件共用一个主机熔断器。
+    """
+
+    def __init__(self):
+        self.enabled = True
+        self.failure_threshold = 5
+        self.reset_timeout = 30.0
+        self.half_open_max_calls = 1
+        self.breakers: Dict[str, CircuitBreaker] = {}
+
+    def configure(self, config: Dict[str, Any]) -> None:
+        self.enabled = config.get('enabled', True)
+        self.failure_threshold = config.get('failure_threshold', 5)
+        self.reset_timeout = config.get('reset_timeout', 30)
+        self.half_open_max_calls = config.get('half_open_max_calls', 1)
+        for breaker in self.breakers.values():
+            breaker.failure_threshold = self.failure_threshold
+            breaker.reset_timeout = self.reset_timeout
+            breaker.half_open_max_calls = self.half_open_max_calls
+
+    def get(self, key: str) -> Optional[CircuitBreaker]:
+        """未启用时返回 None"""
+        if not self.enabled:
+            return None
+        breaker = self.breakers.get(key)
+        if breaker is None:
+            breaker = self.breakers[key] = CircuitBreaker(
+                key, self.failure_threshold, self.reset_timeout, self.half_open_max_calls
+            )
+        return breaker
+
+    def peek(self, key: str) -> Optional[CircuitBreaker]:
+        """只查询已存在的熔断器，不创建"""
+        return self.breakers.get(key)
+
+    def snapshots(self, prefix: str = "") -> Dict[str, Dict[str, Any]]:
+        """key 以 prefix 开头的熔断器快照"""
+        return {key: breaker.snapshot() for key, breaker in self.breakers.items() if key.startswith(prefix)}
+
+
+breakers = CircuitBreakerRegistry()
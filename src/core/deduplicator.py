@@ -0,0 +1,186 @@
+import re
+import hashlib
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple, Any
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+# 追踪类查询参数，不影响内容本身，规范化 URL 时去除
+TRACKING_PARAMS = {
+    'utm_source', 'utm_medium', 'utm_campaign', 'utm_term', 'utm_content',
+    'spm', 'from', 'ref', 'share_token', 'fbclid', 'gclid'
+}
+
+_NORMALIZE_RE = re.compile(r'[\W_]+', re.UNICODE)
+
+
+def canonicalize_url(url: Optional[str]) -> str:
+    """
+    规范化 URL：统一大小写、去除默认端口、片段和追踪参数、排序查询参数
+    """
+    if not url:
+        return ''
+    try:
+        parts = urlsplit(url.strip())
+    except ValueError:
+        return url.strip()
+
+    scheme = (parts.scheme or 'http').lower()
+    if scheme == 'https':
+        scheme = 'http'
+    host = (parts.hostname or '').lower()
+    if host.startswith('www.'):
+        host = host[4:]
+    if parts.port and parts.port not in (80, 443):
+        host = f"{host}:{parts.port}"
+
+    path = parts.path or '/'
+    if len(path) > 1 and path.endswith('/'):
+        path = path.rstrip('/')
+
+    query = [
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if k.lower() not in TRACKING_PARAMS
+    ]
+    query.sort()
+    return urlunsplit((scheme, host, path, urlencode(query), ''))
+
+
+def _shingle_hash(shingle: str) -> int:
+    return int.from_bytes(hashlib.blake2b(shingle.encode('utf-8'), digest_size=8).digest(), 'big')
+
+
+def simhash(text: str, shingle_size: int = 3, min_chars: int = 24, max_chars: int = 2000) -> int:
+    """
+    计算文本的 64 位 SimHash 指纹
+
+    文本先去除标点和空白，再按字符 n-gram 切分，中英文通用。
+    只取前 max_chars 个字符，保证单条结果的计算开销有上限；
+    短于 min_chars 的文本指纹不可靠，返回 0 表示不参与近重复判断。
+    """
+    normalized = _NORMALIZE_RE.sub('', text.lower())[:max_chars]
+    if len(normalized) < min_chars:
+        return 0
+    shingles = {
+        normalized[i:i + shingle_size]
+        for i in range(len(normalized) - shingle_size + 1)
+    }
+
+    # 把每个哈希展开成 64 位二进制串后按列统计，逐位计数交给 C 实现完成；
+    # 内置 hash() 对字符串加盐，不同进程间不一致，这里用固定的 blake2b
+    rows = [format(_shingle_hash(s), '064b') for s in shingles]
+    half = len(rows) / 2
+    fingerprint = 0
+    for column in zip(*rows):
+        fingerprint = (fingerprint << 1) | (1 if column.count('1') > half else 0)
+    return fingerprint
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return bin(a ^ b).count('1')
+
+
+class ResultDeduplicator:
+    """
+    基于规范化 URL 和内容 SimHash 的近重复结果合并器
+
+    指纹按 64 位拆成若干段建立分桶索引：海明距离不超过阈值的两个指纹
+    至少有一段完全相同，因此每次查找只需比较少量候选，整体为线性复杂度。
+    索引按插入顺序淘汰，大小不超过 max_index_size。
+    """
+
+    def __init__(self, max_index_size: int = 10000, max_distance: int = 3, max_bucket_size: int = 32):
+        self.max_index_size = max_index_size
+        self.max_distance = max_distance
+        self.max_bucket_size = max_bucket_size
+        self.bands = max_distance + 1
+        self.band_bits = 64 // self.bands
+        self._band_mask = (1 << self.band_bits) - 1
+        self._next_id = 0
+        # 条目 id -> (指纹, 规范化 URL, 代表结果)
+        self._entries: "OrderedDict[int, Tuple[int, str, Any]]" = OrderedDict()
+        self._url_index: Dict[str, int] = {}
+        self._band_index: Dict[Tuple[int, int], List[int]] = {}
+        # id(代表结果) -> 条目 id，用于按结果移除
+        self._representatives: Dict[int, int] = {}
+
+    def _band_keys(self, fingerprint: int) -> List[Tuple[int, int]]:
+        return [
+            (band, (fingerprint >> (band * self.band_bits)) & self._band_mask)
+            for band in range(self.bands)
+        ]
+
+    def find_duplicate(self, url: Optional[str], content: str) -> Tuple[Optional[Any], int, str]:
+        """
+        查找已收录的重复结果
+
+        返回 (代表结果或 None, 内容指纹, 规范化 URL)
+        """
+        canonical = canonicalize_url(url)
+        if canonical and canonical in self._url_index:
+            entry_id = self._url_index[canonical]
+            fingerprint, _, representative = self._entries[entry_id]
+            return representative, fingerprint, canonical
+
+        fingerprint = simhash(content)
+        if fingerprint:
+            for key in self._band_keys(fingerprint):
+                for entry_id in self._band_index.get(key, ()):
+                    other, _, representative = self._entries[entry_id]
+                    if hamming_distance(fingerprint, other) <= self.max_distance:
+                        return representative, fingerprint, canonical
+        return None, fingerprint, canonical
+
+    def add(self, representative: Any, fingerprint: int, canonical_url: str) -> None:
+        """
+        收录一个新的代表结果
+        """
+        entry_id = self._next_id
+        self._next_id += 1
+        self._entries[entry_id] = (fingerprint, canonical_url, representative)
+        self._representatives[id(representative)] = entry_id
+        if canonical_url:
+            self._url_index[canonical_url] = entry_id
+        if fingerprint:
+            for key in self._band_keys(fingerprint):
+                bucket = self._band_index.setdefault(key, [])
+                if len(bucket) < self.max_bucket_size:
+                    bucket.append(entry_id)
+
+        while len(self._entries) > self.max_index_size:
+            self._evict_oldest()
+
+    def remove(self, representative: Any) -> bool:
+        """
+        移除一个代表结果（如已被后续阶段丢弃），之后与它重复的结果不再被合并
+        """
+        entry_id = self._representatives.get(id(representative))
+        if entry_id is None or self._entries[entry_id][2] is not representative:
+            return False
+        self._remove_entry(entry_id)
+        return True
+
+    def _evict_oldest(self) -> None:
+        self._remove_entry(next(iter(self._entries)))
+
+    def _remove_entry(self, entry_id: int) -> None:
+        fingerprint, canonical_url, representative = self._entries.pop(entry_id)
+        if self._representatives.get(id(representative)) == entry_id:
+            del self._representatives[id(representative)]
+        if canonical_url and self._url_index.get(canonical_url) == entry_id:
+            del self._url_index[canonical_url]
+        if fingerprint:
+            for key in self._band_keys(fingerprint):
+                bucket = self._band_index.get(key)
+                if bucket and entry_id in bucket:
+                    bucket.remove(entry_id)
+                    if not bucket:
+                        del self._band_index[key]
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._url_index.clear()
+        self._band_index.clear()
+        self._representatives.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -1,31 +1,107 @@
 import os
+import re
 import sys
-import subprocess
-import venv  # 使用 venv 替代 virtualenv
 import json
-from typing import Dict, Optional
+import time
+import shutil
+import asyncio
+import hashlib
+from typing import Dict, List, Optional
 import yaml
 from loguru import logger
+from .metrics import ENVIRONMENT_BUILDS, ENVIRONMENT_BUILD_SECONDS
+
+# 环境目录中的清单文件，存在即表示环境已完整创建
+MANIFEST_FILE = "environment.json"
+
+_REQUIREMENT_NAME = re.compile(r"^\s*([A-Za-z0-9][A-Za-z0-9._-]*)")
+
+
+def _normalize_name(name: str) -> str:
+    return re.sub(r"[-_.]+", "-", name).lower()
+
 
 class EnvironmentManager:
+    """
+    插件运行环境管理
+
+    环境按内容寻址：运行时和规范化后的依赖集合决定环境目录，
+    依赖相同的插件共用同一个虚拟环境。创建和安装都通过异步子进程执行，
+    同一环境的并发请求只会触发一次构建。
+    """
+
     def __init__(self, config_path: str = "config/config.yaml"):
         self.config = self._load_config(config_path)
         self.environments: Dict[str, str] = {}  # 环境名称 -> 环境路径的映射
         self.shared_envs: Dict[str, str] = {}  # 共享环境名称 -> 环境路径的映射
-        self.env_base_path = os.path.join(os.getcwd(), ".environments")
+        env_config = self.config.get('environment', {}) or {}
+        self.env_base_path = os.path.abspath(env_config.get('base_path', '.environments'))
+        self.wheel_cache = os.path.abspath(
+            env_config.get('wheel_cache', os.path.join(self.env_base_path, 'wheels'))
+        )
+        self.install_timeout = env_config.get('install_timeout', 600)
+        self.interpreters: Dict[str, str] = env_config.get('interpreters') or {}
+        self.shared_deps: Dict[str, dict] = {
+            _normalize_name(name): spec for name, spec in (env_config.get('shared_deps') or {}).items()
+        }
+        self._build_semaphore: Optional[asyncio.Semaphore] = None
+        self._max_concurrent_builds = env_config.get('max_concurrent_builds', 2)
+        self._builds: Dict[str, asyncio.Future] = {}
         os.makedirs(self.env_base_path, exist_ok=True)
 
     def _load_config(self, config_path: str) -> dict:
         with open(config_path, 'r') as f:
             return yaml.safe_load(f)
 
+    def resolve_dependencies(self, dependencies: List[str]) -> List[str]:
+        """
+        规范化依赖列表
+
+        shared_deps 中标记为 shared 的包统一使用配置的版本，
+        使只在版本上略有差异的插件也能共用环境。结果去重并排序。
+        """
+        resolved: Dict[str, str] = {}
+        for dep in dependencies or []:
+            match = _REQUIREMENT_NAME.match(dep)
+            if not match:
+                continue
+            name = _normalize_name(match.group(1))
+            shared = self.shared_deps.get(name)
+            if shared and shared.get('shared', True) and shared.get('version'):
+                resolved[name] = f"{name}=={shared['version']}"
+            else:
+                resolved[name] = dep.strip()
+        return sorted(resolved.values())
+
+    @staticmethod
+    def supports_runtime(runtime: str) -> bool:
+        """只支持 Python 运行时；node 等运行时的环境无法创建"""
+        return runtime.startswith("python")
+
+    def _resolve_interpreter(self, runtime: str) -> str:
+        """运行时对应的解释器，未在 environment.interpreters 中配置时使用当前解释器"""
+        return self.interpreters.get(runtime, sys.executable)
+
+    def environment_key(self, runtime: str, dependencies: List[str]) -> str:
+        """解释器和依赖集合的内容哈希"""
+        payload = "\n".join([self._resolve_interpreter(runtime)] + self.resolve_dependencies(dependencies))
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+    @staticmethod
+    def get_python_path(env_path: str) -> str:
+        """环境中的 Python 解释器路径"""
+        python_path = os.path.join(env_path, "bin", "python")
+        if not os.path.exists(python_path):
+            python_path = os.path.join(env_path, "Scripts", "python.exe")  # Windows路径
+        return python_path
+
     async def setup_environment(self, plugin_info: dict) -> str:
         """
         为插件设置运行环境
         返回环境路径
         """
         env_name = f"{plugin_info['name']}_{plugin_info['version']}"
-        
+
         # 检查是否已存在环境
         if env_name in self.environments:
             return self.environments[env_name]
@@ -35,17 +111,12 @@ class EnvironmentManager:
             runtime = plugin_info['environment']['runtime']
             dependencies = plugin_info['environment'].get('dependencies', [])
 
-            # 创建环境
-            env_path = await self._create_environment(env_name, runtime)
-            
-            # 安装依赖
-            await self._install_dependencies(env_path, dependencies)
-            
+            env_path = await self._get_or_build(runtime, dependencies)
+
             # 记录环境路径
             self.environments[env_name] = env_path
-            
             return env_path
-        
+
         except Exception as e:
             logger.error(f"Failed to setup environment for {env_name}: {str(e)}")
             raise
@@ -58,65 +129,125 @@ class EnvironmentManager:
         if env_key in self.shared_envs:
             return self.shared_envs[env_key]
 
-        env_path = os.path.join(self.env_base_path, f"shared_{env_key}")
-        
         try:
-            if not os.path.exists(env_path):
-                # 创建虚拟环境
-                venv.create(env_path, with_pip=True)
-                
-                # 安装指定版本的包
-                pip_path = os.path.join(env_path, "bin", "pip")
-                if not os.path.exists(pip_path):
-                    pip_path = os.path.join(env_path, "Scripts", "pip.exe")  # Windows路径
-                subprocess.run([pip_path, "install", f"{name}=={version}"], check=True)
-            
+            env_path = await self._get_or_build("python", [f"{name}=={version}"])
             self.shared_envs[env_key] = env_path
             return env_path
-            
+
         except Exception as e:
             logger.error(f"Failed to setup shared environment {env_key}: {str(e)}")
             raise
 
-    async def _create_environment(self, env_name: str, runtime: str) -> str:
+    async def _get_or_build(self, runtime: str, dependencies: List[str]) -> str:
         """
-        创建特定运行时的环境
+        返回内容哈希对应的环境，不存在时构建
+
+        同一哈希的并发调用共享一个构建任务。
         """
-        env_path = os.path.join(self.env_base_path, env_name)
-        
-        if runtime.startswith("python"):
-            # 使用 venv 创建环境
-            venv.create(env_path, with_pip=True)
-            logger.info(f"Created Python virtual environment at {env_path}")
-        elif runtime.startswith("node"):
-            # TODO: 实现Node.js环境创建
-            pass
-        else:
+        if not self.supports_runtime(runtime):
             raise ValueError(f"Unsupported runtime: {runtime}")
-            
-        return env_path
 
-    async def _install_dependencies(self, env_path: str, dependencies: list):
+        key = self.environment_key(runtime, dependencies)
+        env_path = os.path.join(self.env_base_path, f"env-{key}")
+        if os.path.exists(os.path.join(env_path, MANIFEST_FILE)):
+            ENVIRONMENT_BUILDS.inc("reused")
+            return env_path
+
+        build = self._builds.get(key)
+        if build is None:
+            build = asyncio.ensure_future(
+                self._build_environment(env_path, runtime, self.resolve_dependencies(dependencies))
+            )
+            self._builds[key] = build
+            build.add_done_callback(lambda _: self._builds.pop(key, None))
+        else:
+            ENVIRONMENT_BUILDS.inc("shared")
+        # shield: 某个等待者被取消时不影响其他插件共享的构建
+        return await asyncio.shield(build)
+
+    async def _build_environment(self, env_path: str, runtime: str, dependencies: List[str]) -> str:
         """
-        在指定环境中安装依赖
+        创建环境并一次性安装全部依赖
+
+        清单文件最后写入，没有清单的目录视为上次构建未完成，会被删除重建。
         """
-        pip_path = os.path.join(env_path, "bin", "pip")
-        if not os.path.exists(pip_path):
-            pip_path = os.path.join(env_path, "Scripts", "pip.exe")  # Windows路径
-            
-        for dep in dependencies:
+        if self._build_semaphore is None:
+            self._build_semaphore = asyncio.Semaphore(self._max_concurrent_builds)
+
+        async with self._build_semaphore:
+            started = time.perf_counter()
             try:
-                subprocess.run([pip_path, "install", dep], check=True)
-                logger.info(f"Installed dependency: {dep}")
-            except subprocess.CalledProcessError as e:
-                logger.error(f"Failed to install dependency {dep}: {str(e)}")
+                await self._remove_tree(env_path)
+                interpreter = self._resolve_interpreter(runtime)
+                await self._run([interpreter, "-m", "venv", env_path])
+                logger.info(f"Created Python virtual environment at {env_path}")
+
+                await self._install_dependencies(env_path, dependencies)
+
+                with open(os.path.join(env_path, MANIFEST_FILE), "w", encoding="utf-8") as f:
+                    json.dump({
+                        "runtime": runtime,
+                        "interpreter": interpreter,
+                        "dependencies": dependencies,
+                        "created_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+                    }, f, ensure_ascii=False, indent=2)
+            except Exception:
+                ENVIRONMENT_BUILDS.inc("failed")
+                await self._remove_tree(env_path)
                 raise
 
+            elapsed = time.perf_counter() - started
+            ENVIRONMENT_BUILDS.inc("built")
+            ENVIRONMENT_BUILD_SECONDS.observe(value=elapsed)
+            logger.info(f"Environment ready at {env_path} ({len(dependencies)} deps, {elapsed:.1f}s)")
+            return env_path
+
+    async def _install_dependencies(self, env_path: str, dependencies: list):
+        """
+        在指定环境中安装依赖
+
+        所有依赖在一次 pip 调用中安装，共享的 wheel 缓存避免重复下载和构建。
+        """
+        if not dependencies:
+            return
+        os.makedirs(self.wheel_cache, exist_ok=True)
+        await self._run([
+            self.get_python_path(env_path), "-m", "pip", "install",
+            "--disable-pip-version-check", "--quiet",
+            "--cache-dir", self.wheel_cache,
+            *dependencies
+        ], timeout=self.install_timeout)
+        logger.info(f"Installed dependencies: {', '.join(dependencies)}")
+
+    async def _run(self, command: List[str], timeout: Optional[float] = None) -> None:
+        """异步执行子进程，失败时抛出包含 stderr 末尾的 RuntimeError"""
+        process = await asyncio.create_subprocess_exec(
+            *command, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
+        )
+        try:
+            _, stderr = await asyncio.wait_for(process.communicate(), timeout)
+        except asyncio.TimeoutError:
+            process.kill()
+            await process.wait()
+            raise RuntimeError(f"Command timed out after {timeout}s: {' '.join(command[:4])}")
+        if process.returncode != 0:
+            tail = stderr.decode("utf-8", "replace").strip().splitlines()[-5:]
+            raise RuntimeError(f"Command failed ({process.returncode}): {' '.join(command[:4])}\n" + "\n".join(tail))
+
+    @staticmethod
+    async def _remove_tree(path: str) -> None:
+        if os.path.exists(path):
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(None, shutil.rmtree, path, True)
+
     async def cleanup_environment(self, env_name: str):
         """
         清理特定环境
+
+        环境可能被多个插件共享，只有不再被引用时才删除目录。
         """
         if env_name in self.environments:
-            env_path = self.environments[env_name]
-            # TODO: 实现环境清理逻辑
-            del self.environments[env_name] 
\ No newline at end of file
+            env_path = self.environments.pop(env_name)
+            if env_path not in self.environments.values() and env_path not in self.shared_envs.values():
+                await self._remove_tree(env_path)
+                logger.info(f"Removed environment {env_path}")
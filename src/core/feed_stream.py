@@ -0,0 +1,192 @@
+from typing import Any, Dict, Iterator, List, Optional, Set
+from xml.etree.ElementTree import Element, XMLPullParser
+from .ranker import parse_published
+
+# 按本地名（去掉命名空间）识别的条目元素
+_ENTRY_TAGS = ('item', 'entry')
+
+
+def _local(tag: str) -> str:
+    """去掉 {namespace} 前缀，content:encoded -> encoded，dc:creator -> creator"""
+    return tag.rsplit('}', 1)[-1] if tag.startswith('{') else tag
+
+
+def _text(element: Element) -> str:
+    """元素的全部文本，Atom 的 xhtml 内容包含子元素"""
+    return ''.join(element.itertext()).strip()
+
+
+class StreamEntry:
+    """
+    解析产出的条目
+
+    流式解析和 feedparser 解析的结果都转换为这一记录，只保存插件检索用到的字段；
+    get() 按 feedparser 条目的键名取值，插件的搜索代码无需区分。
+    """
+    __slots__ = ('id', 'title', 'link', 'summary', 'content', 'author', 'category', 'published', 'timestamp',
+                 '_text')
+
+    def __init__(self):
+        self.id: Optional[str] = None
+        self.title: Optional[str] = None
+        self.link: Optional[str] = None
+        self.summary: Optional[str] = None
+        self.content: Optional[str] = None
+        self.author: Optional[str] = None
+        self.category: Optional[str] = None
+        self.published: Optional[str] = None
+        self.timestamp: Optional[float] = None
+        self._text: Optional[str] = None
+
+    def get(self, key: str, default: Any = None) -> Any:
+        if key == 'content':
+            return [{'value': self.content}] if self.content else default
+        if key == 'description':
+            key = 'summary'
+        value = getattr(self, key, None) if key in self.__slots__ else None
+        return default if value is None else value
+
+    @property
+    def text(self) -> str:
+        """小写检索文本，与模板插件的 search 使用相同的字段，首次访问时计算并保存"""
+        if self._text is None:
+            # 模板插件分别取 description 和 summary，两者是同一字段
+            self._text = " ".join([
+                self.title or "",
+                self.summary or "",
+                self.summary or "",
+                self.content or "",
+                self.author or "",
+                self.category or ""
+            ]).lower()
+        return self._text
+
+    @classmethod
+    def from_parsed(cls, entry: Dict[str, Any]) -> 'StreamEntry':
+        """从 feedparser 的条目构建，不保留解析树的其余部分"""
+        record = cls()
+        record.id = entry.get('id')
+        record.title = entry.get('title')
+        record.link = entry.get('link')
+        record.summary = entry.get('summary')
+        contents = entry.get('content')
+        record.content = contents[0].get('value') if contents else None
+        record.author = entry.get('author')
+        record.category = entry.get('category')
+        record.published = entry.get('published')
+        record.timestamp = parse_published(record.published or entry.get('updated'))
+        return record
+
+    @classmethod
+    def from_element(cls, element: Element) -> 'StreamEntry':
+        """从 RSS <item> 或 Atom <entry> 元素构建"""
+        entry = cls()
+        updated = None
+        for child in element:
+            name = _local(child.tag)
+            if name == 'title':
+                entry.title = _text(child)
+            elif name == 'link':
+                href = child.get('href')
+                if href is None:
+                    entry.link = _text(child)
+                elif child.get('rel', 'alternate') == 'alternate' and entry.link is None:
+                    entry.link = href
+            elif name in ('description', 'summary'):
+                entry.summary = _text(child)
+            elif name in ('encoded', 'content'):
+                entry.content = _text(child)
+            elif name in ('pubDate', 'published', 'date'):
+                entry.published = _text(child)
+            elif name == 'updated':
+                updated = _text(child)
+            elif name in ('author', 'creator') and entry.author is None:
+                # Atom 的 author 是 <name> 子元素
+                names = [_text(sub) for sub in child if _local(sub.tag) == 'name']
+                entry.author = names[0] if names else _text(child)
+            elif name == 'category' and entry.category is None:
+                entry.category = child.get('term') or _text(child)
+            elif name in ('guid', 'id'):
+                entry.id = _text(child)
+        if entry.published is None:
+            entry.published = updated
+        if entry.summary is None and entry.content is not None:
+            entry.summary = entry.content
+        if entry.id is None:
+            entry.id = entry.link or entry.title
+        entry.timestamp = parse_published(entry.published)
+        return entry
+
+
+class FeedStreamParser:
+    """
+    RSS/Atom 增量解析器
+
+    基于 XMLPullParser，调用方每收到一块字节就 feed() 一次，取回已闭合的条目；
+    条目元素处理完后立即从树中摘除，内存占用只与单个条目的大小有关，与整个 feed 的大小无关。
+    编码按 XML 声明识别。与 feedparser 不同，遇到不合法的 XML 会抛出 ParseError。
+    """
+
+    def __init__(self):
+        self._parser = XMLPullParser(events=('start', 'end'))
+        self._stack: List[Element] = []
+
+    def feed(self, data: bytes) -> Iterator[StreamEntry]:
+        self._parser.feed(data)
+        return self._drain()
+
+    def close(self) -> Iterator[StreamEntry]:
+        self._parser.close()
+        return self._drain()
+
+    def _drain(self) -> Iterator[StreamEntry]:
+        for event, element in self._parser.read_events():
+            if event == 'start':
+                self._stack.append(element)
+                continue
+            self._stack.pop()
+            if _local(element.tag) in _ENTRY_TAGS:
+                entry = StreamEntry.from_element(element)
+                if self._stack:
+                    self._stack[-1].remove(element)
+                element.clear()
+                yield entry
+
+
+class StreamedFeed:
+    """
+    一个 url 的解析结果，流式解析时为累积结果
+
+    entries 按新到旧排列，与 feedparser 结果一样通过 .entries 访问；
+    watermark 为已见条目中最新的发布时间，ids 为已见条目的 guid/链接，用于判断何时可以停止读取。
+    """
+    __slots__ = ('entries', 'etag', 'last_modified', 'watermark', 'ids')
+
+    def __init__(self, entries: Optional[List[StreamEntry]] = None):
+        self.entries: List[StreamEntry] = entries or []
+        self.etag: Optional[str] = None
+        self.last_modified: Optional[str] = None
+        self.ids: Set[str] = {entry.id for entry in self.entries if entry.id}
+        timestamps = [entry.timestamp for entry in self.entries if entry.timestamp is not None]
+        self.watermark: Optional[float] = max(timestamps) if timestamps else None
+
+    def is_known(self, entry: StreamEntry) -> bool:
+        """条目已见过，或发布时间早于水位线"""
+        if entry.id is not None and entry.id in self.ids:
+            return True
+        return self.watermark is not None and entry.timestamp is not None and entry.timestamp < self.watermark
+
+    def merge(self, fresh: List[StreamEntry], max_entries: int) -> 'StreamedFeed':
+        """新条目排在前面，与已有条目去重后截断到 max_entries 条"""
+        fresh_ids = {entry.id for entry in fresh if entry.id}
+        entries = fresh + [entry for entry in self.entries if entry.id not in fresh_ids]
+        return StreamedFeed(entries[:max_entries])
+
+    def headers(self) -> Dict[str, str]:
+        """条件请求头"""
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
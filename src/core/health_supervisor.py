@@ -0,0 +1,195 @@
+import time
+import asyncio
+from collections import deque
+from typing import Any, Deque, Dict, Optional, Tuple
+from loguru import logger
+from .metrics import PLUGIN_HEALTH_PROBES, PLUGIN_HEALTH_SECONDS, PLUGIN_QUARANTINED
+
+QUARANTINED = "quarantined"
+
+
+class PluginHealth:
+    """单个插件最近的探测结果"""
+
+    def __init__(self, window: int = 20):
+        self.results: Deque[Tuple[bool, float]] = deque(maxlen=window)  # (是否成功, 耗时)
+        self.consecutive_failures = 0
+        self.quarantines = 0  # 本轮连续隔离次数，决定退避时长
+        self.restart_attempts = 0
+        self.quarantined_until: Optional[float] = None
+        self.last_probe: Optional[float] = None
+        self.last_error: Optional[str] = None
+
+    def record(self, ok: bool, latency: float, error: Optional[str] = None) -> None:
+        self.results.append((ok, latency))
+        self.last_probe = time.time()
+        if ok:
+            self.consecutive_failures = 0
+            self.last_error = None
+        else:
+            self.consecutive_failures += 1
+            self.last_error = error
+
+    def snapshot(self) -> Dict[str, Any]:
+        probes = len(self.results)
+        latencies = [latency for _, latency in self.results]
+        return {
+            "probes": probes,
+            "success_rate": round(sum(1 for ok, _ in self.results if ok) / probes, 3) if probes else None,
+            "avg_latency": round(sum(latencies) / probes, 4) if probes else None,
+            "consecutive_failures": self.consecutive_failures,
+            "restart_attempts": self.restart_attempts,
+            "quarantined_until": time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(
+                time.time() + self.quarantined_until - time.monotonic()
+            )) if self.quarantined_until is not None else None,
+            "last_probe": time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(self.last_probe))
+                          if self.last_probe else None,
+            "last_error": self.last_error,
+        }
+
+
+class HealthSupervisor:
+    """
+    插件健康巡检
+
+    每隔 management.health_check_interval 秒并发探测运行中的插件；连续失败达到阈值的插件
+    状态置为 quarantined，不再参与搜索分发，不会在每次查询中占用一个超时名额。
+    隔离中的插件按指数退避重新探测，成功后恢复为 running；开启 restart_on_failure 时，
+    重新探测前先用当前配置重建插件实例，最多重建 max_restart_attempts 次。
+    被手动停止的插件不参与巡检。
+    """
+
+    def __init__(self, plugin_manager, config: Dict[str, Any]):
+        self.plugin_manager = plugin_manager
+        management = config.get('management', {})
+        self.interval = management.get('health_check_interval', 60)
+        self.restart_on_failure = management.get('restart_on_failure', True)
+        self.max_restart_attempts = management.get('max_restart_attempts', 3)
+        self.failure_threshold = management.get('quarantine_after_failures', 3)
+        self.max_backoff = management.get('quarantine_max_backoff', 3600)
+        self.concurrency = management.get('health_check_concurrency', 8)
+        self.window = management.get('health_window', 20)
+        self.timeout = config.get('plugins', {}).get('timeout_per_plugin', 10)
+        self.health: Dict[str, PluginHealth] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self.interval and (self._task is None or self._task.done()):
+            self._task = asyncio.ensure_future(self._run())
+            logger.info(f"插件健康巡检已开启，间隔 {self.interval}s")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.check_all()
+            except Exception as e:
+                logger.error(f"插件健康巡检出错: {str(e)}")
+            await asyncio.sleep(self.interval)
+
+    def forget(self, plugin_name: str) -> None:
+        """丢弃已移除插件的健康状态"""
+        if self.health.pop(plugin_name, None) is not None:
+            PLUGIN_QUARANTINED.set(plugin_name, value=0)
+
+    def snapshot(self, plugin_name: str) -> Optional[Dict[str, Any]]:
+        health = self.health.get(plugin_name)
+        return health.snapshot() if health is not None else None
+
+    async def check_all(self) -> None:
+        """探测所有运行中的插件和退避到期的隔离插件"""
+        plugins = self.plugin_manager.plugins
+        for name in list(self.health):
+            if name not in plugins:
+                self.forget(name)
+
+        now = time.monotonic()
+        due = [
+            name for name, info in plugins.items()
+            if info.status == 'running'
+            or (info.status == QUARANTINED and name in self.health
+                and (self.health[name].quarantined_until or 0) <= now)
+        ]
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def check(name: str) -> None:
+            async with semaphore:
+                await self.check(name)
+
+        await asyncio.gather(*(check(name) for name in due))
+
+    async def check(self, plugin_name: str) -> bool:
+        """探测单个插件并更新其状态，返回探测是否成功"""
+        info = self.plugin_manager.plugins.get(plugin_name)
+        if info is None:
+            return False
+        health = self.health.setdefault(plugin_name, PluginHealth(self.window))
+        quarantined = info.status == QUARANTINED
+        if not quarantined and health.quarantined_until is not None:
+            # 隔离期间被手动启动或重新加载，已恢复 running
+            self._clear_quarantine(plugin_name, health)
+        if quarantined and self.restart_on_failure and health.restart_attempts < self.max_restart_attempts:
+            health.restart_attempts += 1
+            logger.info(f"重建插件 {plugin_name} 实例 (第 {health.restart_attempts} 次)")
+            self.plugin_manager.restart_instance(plugin_name)
+
+        instance = self.plugin_manager.plugin_instances.get(plugin_name)
+        if instance is None:
+            return False
+        started = time.perf_counter()
+        error = None
+        try:
+            ok = bool(await asyncio.wait_for(instance.health_check(), self.timeout))
+            if not ok:
+                error = "health check returned false"
+        except asyncio.TimeoutError:
+            ok, error = False, f"timed out after {self.timeout}s"
+        except Exception as e:
+            ok, error = False, f"{type(e).__name__}: {e}"
+        latency = time.perf_counter() - started
+
+        health.record(ok, latency, error)
+        PLUGIN_HEALTH_PROBES.inc(plugin_name, 'success' if ok else 'failure')
+        PLUGIN_HEALTH_SECONDS.observe(plugin_name, value=latency)
+
+        # 探测期间插件可能被手动停止或重新加载，只处理仍处于巡检状态的插件
+        if info is not self.plugin_manager.plugins.get(plugin_name) or info.status not in ('running', QUARANTINED):
+            return ok
+        if ok:
+            if quarantined:
+                self._readmit(plugin_name, info, health)
+        elif quarantined or health.consecutive_failures >= self.failure_threshold:
+            self._quarantine(plugin_name, info, health)
+        return ok
+
+    def _quarantine(self, plugin_name: str, info, health: PluginHealth) -> None:
+        health.quarantines += 1
+        backoff = min(self.interval * 2 ** (health.quarantines - 1), self.max_backoff)
+        health.quarantined_until = time.monotonic() + backoff
+        if info.status != QUARANTINED:
+            info.status = QUARANTINED
+            PLUGIN_QUARANTINED.set(plugin_name, value=1)
+            logger.warning(f"插件 {plugin_name} 连续 {health.consecutive_failures} 次健康检查失败，"
+                           f"已隔离 ({health.last_error})，{backoff}s 后重新探测")
+        else:
+            logger.info(f"插件 {plugin_name} 仍不可用 ({health.last_error})，{backoff}s 后重新探测")
+
+    def _readmit(self, plugin_name: str, info, health: PluginHealth) -> None:
+        info.status = 'running'
+        self._clear_quarantine(plugin_name, health)
+        logger.info(f"插件 {plugin_name} 健康检查恢复，重新加入搜索")
+
+    @staticmethod
+    def _clear_quarantine(plugin_name: str, health: PluginHealth) -> None:
+        health.quarantines = 0
+        health.restart_attempts = 0
+        health.quarantined_until = None
+        PLUGIN_QUARANTINED.set(plugin_name, value=0)
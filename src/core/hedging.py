@@ -0,0 +1,76 @@
+import asyncio
+from collections import deque
+from typing import Awaitable, Callable, Deque, Dict, List, Optional, Tuple, TypeVar
+
+T = TypeVar('T')
+
+
+class LatencyTracker:
+    """按 key（上游主机）记录最近的请求耗时，用于计算对冲请求的等待时间"""
+
+    def __init__(self, window: int = 200):
+        self.window = window
+        self._samples: Dict[str, Deque[float]] = {}
+
+    def observe(self, key: str, seconds: float) -> None:
+        samples = self._samples.get(key)
+        if samples is None:
+            samples = self._samples[key] = deque(maxlen=self.window)
+        samples.append(seconds)
+
+    def quantile(self, key: str, q: float, min_samples: int = 20) -> Optional[float]:
+        """样本不足 min_samples 时返回 None"""
+        samples = self._samples.get(key)
+        if not samples or len(samples) < min_samples:
+            return None
+        ordered = sorted(samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+async def hedged(calls: List[Callable[[], Awaitable[T]]], delay: Callable[[int], float],
+                 accept: Callable[[T], bool] = lambda result: True) -> Tuple[int, T]:
+    """
+    对冲请求：先发出第一个调用，delay(i) 秒内第 i 个调用没有返回时再发出下一个，
+    已发出的调用失败或结果不可接受时立即发出下一个。
+
+    返回最先得到可接受结果的 (序号, 结果)，其余调用取消；都不可接受时返回最后一个结果，
+    全部失败时抛出最后一个异常。
+    """
+    pending: Dict[asyncio.Future, int] = {}
+    fallback: Optional[Tuple[int, T]] = None
+    error: Optional[BaseException] = None
+    next_index = 0
+
+    def launch() -> None:
+        nonlocal next_index
+        pending[asyncio.ensure_future(calls[next_index]())] = next_index
+        next_index += 1
+
+    launch()
+    try:
+        while pending:
+            timeout = delay(next_index - 1) if next_index < len(calls) else None
+            done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            if not done:
+                launch()
+                continue
+            for task in done:
+                index = pending.pop(task)
+                if task.exception() is not None:
+                    error = task.exception()
+                    continue
+                result = task.result()
+                if accept(result):
+                    return index, result
+                fallback = (index, result)
+            if next_index < len(calls):
+                launch()
+        if fallback is not None:
+            return fallback
+        raise error
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+fetch_latency = LatencyTracker()
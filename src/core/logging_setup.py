@@ -0,0 +1,68 @@
+import os
+import sys
+from typing import Any, Dict
+from loguru import logger
+
+
+class LogSampler:
+    """
+    按键的 1/N 采样器，用于逐条目的高频日志
+
+    第 1、N+1、2N+1... 次调用返回 True；未配置的键每次都返回 True。
+    """
+
+    def __init__(self):
+        self.every: Dict[str, int] = {}
+        self._counts: Dict[str, int] = {}
+
+    def configure(self, every: Dict[str, int]) -> None:
+        self.every = {key: max(1, int(value)) for key, value in (every or {}).items()}
+        self._counts.clear()
+
+    def __call__(self, key: str) -> bool:
+        every = self.every.get(key, 1)
+        if every == 1:
+            return True
+        count = self._counts.get(key, 0)
+        self._counts[key] = count + 1
+        return count % every == 0
+
+
+log_sample = LogSampler()
+
+
+def setup_logging(config: Dict[str, Any]) -> None:
+    """
+    按 system.logging 配置日志
+
+    - levels: 模块名 -> 级别，按模块前缀匹配，如 plugins、src.core.rate_limiter
+    - json: 文件日志输出为结构化 JSON
+    - enqueue: 日志先入队再由后台线程写入，不阻塞事件循环
+    - sampling: 采样键 -> N，每 N 条只输出 1 条
+    """
+    logging_config = config.get('system', {}).get('logging', {})
+    level = logging_config.get('level', 'INFO')
+    module_levels = {'': level}
+    module_levels.update(logging_config.get('levels', {}) or {})
+    # 模块级别可能低于全局级别，sink 本身的级别取最低值，具体过滤交给 filter
+    sink_level = min((logger.level(value).no for value in module_levels.values() if value), default=20)
+    enqueue = logging_config.get('enqueue', True)
+
+    logger.remove()
+    logger.add(sys.stderr, level=sink_level, filter=module_levels, enqueue=enqueue)
+
+    log_file = logging_config.get('file')
+    if log_file:
+        os.makedirs(os.path.dirname(log_file) or '.', exist_ok=True)
+        logger.add(
+            log_file,
+            level=sink_level,
+            filter=module_levels,
+            serialize=logging_config.get('json', True),
+            enqueue=enqueue,
+            rotation=logging_config.get('max_size', 10485760),
+            retention=logging_config.get('backup_count', 5),
+            encoding='utf-8'
+        )
+
+    log_sample.configure(logging_config.get('sampling', {}))
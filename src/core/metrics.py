@@ -0,0 +1,265 @@
+import time
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+# 默认延迟分桶（秒），覆盖从解析到慢速上游的范围
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+LabelValues = Tuple[str, ...]
+
+
+def _format_labels(names: Sequence[str], values: LabelValues, extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric(ABC):
+    type_name = ''
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+        lines.extend(self._samples())
+        return lines
+
+    @abstractmethod
+    def _samples(self) -> List[str]:
+        """按 Prometheus 文本格式输出的样本行"""
+
+
+class Counter(_Metric):
+    type_name = 'counter'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        values = self._values
+        values[labels] = values.get(labels, 0) + amount
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(labels, 0)
+
+    def merge(self, labels: LabelValues, delta: float) -> None:
+        self.inc(*labels, amount=delta)
+
+    def _samples(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+            for labels, value in list(self._values.items())
+        ]
+
+
+class Gauge(Counter):
+    type_name = 'gauge'
+
+    def dec(self, *labels: str, amount: float = 1) -> None:
+        self.inc(*labels, amount=-amount)
+
+    def set(self, *labels: str, value: float) -> None:
+        self._values[labels] = value
+
+
+class _Timer:
+    __slots__ = ('histogram', 'labels', 'start')
+
+    def __init__(self, histogram: 'Histogram', labels: LabelValues):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.histogram.observe(*self.labels, value=time.perf_counter() - self.start)
+        return False
+
+
+class Histogram(_Metric):
+    """
+    固定分桶直方图，每次记录只做一次二分查找和两次加法
+    """
+    type_name = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+        # 标签值 -> [各桶计数..., 总和, 总数]
+        self._values: Dict[LabelValues, List[float]] = {}
+
+    def observe(self, *labels: str, value: float) -> None:
+        state = self._values.get(labels)
+        if state is None:
+            state = self._values[labels] = [0] * (len(self.buckets) + 3)
+        state[bisect_left(self.buckets, value)] += 1
+        state[-2] += value
+        state[-1] += 1
+
+    def time(self, *labels: str) -> _Timer:
+        return _Timer(self, labels)
+
+    def snapshot(self, *labels: str) -> Optional[Tuple[float, int]]:
+        """
+        返回 (总和, 总数)，没有记录时返回 None
+        """
+        state = self._values.get(labels)
+        if state is None:
+            return None
+        return state[-2], int(state[-1])
+
+    def merge(self, labels: LabelValues, delta: List[float]) -> None:
+        """累加另一进程中同名直方图的增量（各桶计数、总和、总数）"""
+        state = self._values.get(labels)
+        if state is None:
+            state = self._values[labels] = [0] * (len(self.buckets) + 3)
+        if len(delta) != len(state):
+            return  # 分桶不同，无法合并
+        for index, value in enumerate(delta):
+            state[index] += value
+
+    def _samples(self) -> List[str]:
+        lines = []
+        for labels, state in list(self._values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), state):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {int(cumulative)}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels)} {_format_value(state[-2])}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels)} {int(state[-1])}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    指标注册表，以 Prometheus 文本格式输出
+
+    指标只在事件循环线程中记录，更新都是简单的字典和列表操作，不加锁。
+    """
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._exported: Dict[str, Dict[LabelValues, Any]] = {}  # collect_changes 上次导出时的值
+
+    def _register(self, metric: _Metric) -> _Metric:
+        existing = self._metrics.get(metric.name)
+        if existing is not None:
+            return existing
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def collect_changes(self) -> Dict[str, List[list]]:
+        """
+        返回计数器和直方图自上次调用以来的增量：指标名 -> [[标签值, 增量], ...]
+
+        插件宿主进程随每个响应发给主进程，由主进程的 merge_changes 累加到同名指标。
+        Gauge 是瞬时值，不参与累加。
+        """
+        changes = {}
+        for metric in list(self._metrics.values()):
+            if isinstance(metric, Gauge):
+                continue
+            exported = self._exported.setdefault(metric.name, {})
+            deltas = []
+            for labels, value in list(metric._values.items()):
+                previous = exported.get(labels)
+                if isinstance(value, list):
+                    delta = [v - p for v, p in zip(value, previous)] if previous is not None else list(value)
+                    changed = delta[-1] > 0
+                    exported[labels] = list(value)
+                else:
+                    delta = value - (previous or 0)
+                    changed = delta != 0
+                    exported[labels] = value
+                if changed:
+                    deltas.append([list(labels), delta])
+            if deltas:
+                changes[metric.name] = deltas
+        return changes
+
+    def merge_changes(self, changes: Dict[str, List[list]]) -> None:
+        """累加另一进程 collect_changes 的结果，本进程中没有的指标忽略"""
+        for name, deltas in changes.items():
+            metric = self._metrics.get(name)
+            if metric is None or isinstance(metric, Gauge):
+                continue
+            for labels, delta in deltas:
+                metric.merge(tuple(labels), delta)
+
+    def render(self) -> str:
+        lines = []
+        for metric in list(self._metrics.values()):
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+metrics = MetricsRegistry()
+
+SEARCH_REQUESTS = metrics.counter('searchub_search_requests_total', '搜索请求总数', ['status'])
+SEARCH_SECONDS = metrics.histogram('searchub_search_seconds', '搜索请求耗时')
+SEARCH_IN_FLIGHT = metrics.gauge('searchub_search_in_flight', '正在处理的搜索请求数')
+PLUGIN_SEARCH_SECONDS = metrics.histogram('searchub_plugin_search_seconds', '单个插件搜索耗时', ['plugin'])
+PLUGIN_ERRORS = metrics.counter('searchub_plugin_errors_total', '插件搜索出错次数', ['plugin'])
+PLUGIN_RESULTS = metrics.counter('searchub_plugin_results_total', '插件返回的结果数', ['plugin'])
+STAGE_SECONDS = metrics.histogram('searchub_stage_seconds', '插件内各阶段耗时（fetch/parse/clean）', ['plugin', 'stage'])
+CACHE_REQUESTS = metrics.counter('searchub_cache_requests_total', '缓存访问次数', ['cache', 'result'])
+RATE_LIMIT_WAIT_SECONDS = metrics.histogram('searchub_rate_limiter_wait_seconds', '频率限制等待时间', ['plugin'])
+LOOP_LAG_SECONDS = metrics.histogram(
+    'searchub_event_loop_lag_seconds', '事件循环调度延迟',
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0)
+)
+LOOP_BLOCKS = metrics.counter('searchub_event_loop_blocks_total', '事件循环阻塞超过阈值的次数', ['location'])
+LOOP_BLOCKED_SECONDS = metrics.counter('searchub_event_loop_blocked_seconds_total', '事件循环被阻塞的累计时长', ['location'])
+ENVIRONMENT_BUILDS = metrics.counter('searchub_environment_builds_total', '插件环境请求结果（built/reused/shared/failed）', ['result'])
+ENVIRONMENT_BUILD_SECONDS = metrics.histogram(
+    'searchub_environment_build_seconds', '插件环境构建耗时',
+    buckets=(1, 5, 10, 30, 60, 120, 300, 600)
+)
+PLUGIN_HOST_RESTARTS = metrics.counter('searchub_plugin_host_restarts_total', '插件宿主进程重启次数')
+STARTUP_SECONDS = metrics.gauge('searchub_startup_seconds', '启动各阶段耗时', ['phase'])
+PLUGIN_HEALTH_PROBES = metrics.counter('searchub_plugin_health_probes_total', '插件健康探测次数', ['plugin', 'result'])
+PLUGIN_HEALTH_SECONDS = metrics.histogram('searchub_plugin_health_probe_seconds', '插件健康探测耗时', ['plugin'])
+PLUGIN_QUARANTINED = metrics.gauge('searchub_plugin_quarantined', '插件是否被隔离（1 为隔离中）', ['plugin'])
+CIRCUIT_STATE = metrics.gauge('searchub_circuit_state', '熔断器状态（0 关闭，1 打开，2 半开）', ['breaker'])
+CIRCUIT_REJECTIONS = metrics.counter('searchub_circuit_rejections_total', '熔断器直接拒绝的请求数', ['breaker'])
+FETCH_HEDGE_WINS = metrics.counter('searchub_fetch_hedge_wins_total', '镜像对冲请求中先返回的一方（primary/hedge）', ['winner'])
+RESPONSE_BYTES = metrics.counter('searchub_response_bytes_total', '搜索响应体字节数（按内容编码）', ['encoding'])
+FEED_BYTES = metrics.counter('searchub_feed_bytes_total', '抓取 feed 的字节数（wire 为传输字节，body 为解压后字节）', ['plugin', 'kind'])
+WARM_KEYWORDS = metrics.gauge('searchub_warm_keywords', '已预先计算结果的热门关键词数')
+WARM_REBUILDS = metrics.counter('searchub_warm_rebuilds_total', '热门关键词结果重算次数')
+SUBSCRIPTIONS = metrics.gauge('searchub_subscriptions', '常驻查询订阅数')
+SUBSCRIPTION_EVENTS = metrics.counter('searchub_subscription_events_total', '订阅匹配推送次数（stream/webhook）', ['channel', 'result'])
+SCHEDULER_QUEUED = metrics.gauge('searchub_scheduler_queued', '排队等待扇出的搜索请求数', ['priority'])
+SCHEDULER_RUNNING = metrics.gauge('searchub_scheduler_running', '正在扇出的搜索请求数', ['priority'])
+SCHEDULER_WAIT_SECONDS = metrics.histogram('searchub_scheduler_wait_seconds', '搜索请求排队等待时间', ['priority'])
+SCHEDULER_REJECTIONS = metrics.counter('searchub_scheduler_rejections_total', '队列已满被拒绝（429）的搜索请求数', ['priority'])
@@ -1,21 +1,88 @@
+import io
+import os
+import re
+import sys
+import time
+import zlib
+import asyncio
+import contextlib
+import functools
+import importlib.util
 from abc import ABC, abstractmethod
-from typing import Dict, Any, List
+from collections import OrderedDict
+from typing import Dict, Any, AsyncIterator, List, Optional, Tuple, Type
+from xml.etree.ElementTree import ParseError
+from urllib.parse import urlsplit
 import aiohttp
+import feedparser
+from bs4 import BeautifulSoup
 from loguru import logger
+from ..models.entry import FeedEntry
+from .metrics import STAGE_SECONDS, FETCH_HEDGE_WINS, FEED_BYTES
+from .tracing import tracer
+from .circuit_breaker import CircuitOpenError, breakers
+from .hedging import fetch_latency, hedged
+from .feed_stream import FeedStreamParser, StreamEntry, StreamedFeed
+
+try:
+    import brotli
+except ImportError:  # brotli 为可选依赖，缺失时不协商 br
+    brotli = None
+
+# brotli 1.2 起才能限制单次解压的输出长度，更早的版本无法防御压缩炸弹，不协商 br
+BOUNDED_BROTLI = brotli is not None and hasattr(brotli.Decompressor, 'can_accept_more_data')
+
+DEFAULT_FETCH_TIMEOUT = 10
+DEFAULT_MAX_BODY_SIZE = 10 * 1024 * 1024
+DEFAULT_STREAM_MAX_ENTRIES = 2000
+STREAM_STOP_AFTER_KNOWN = 3
+SEEN_ENTRIES_LIMIT = 10000
+CORPUS_TERMS_LIMIT = 1024
+
+_TAG_RE = re.compile(r'<[^>]*>')
+ACCEPT_ENCODING = "gzip, deflate, br" if BOUNDED_BROTLI else "gzip, deflate"
+
+
+class FeedTooLargeError(Exception):
+    """响应体超过 settings.request.max_body_size"""
+    pass
+
+
+class _SourceCorpus:
+    """一个源最近一次获取的条目的语料统计，文档频率按查询词惰性统计并缓存"""
+    __slots__ = ('feed', 'documents', 'total_length', 'doc_freq')
+
+    def __init__(self, feed, total_length: int):
+        self.feed = feed
+        self.documents = len(feed.entries)
+        self.total_length = total_length
+        self.doc_freq: Dict[str, int] = {}
+
 
 class PluginBase(ABC):
     """插件基类"""
-    
+
     def __init__(self, name: str, config: Dict[str, Any]):
         self.name = name
         self.config = config
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
         }
+        # url -> (ETag, Last-Modified, 转换为 StreamEntry 的解析结果)，上游返回 304 时直接复用
+        self._feed_cache: Dict[str, Tuple[Optional[str], Optional[str], StreamedFeed]] = {}
+        # url -> 流式解析累积的条目，settings.streaming.enabled 时使用
+        self._streams: Dict[str, StreamedFeed] = {}
+        # 任一源的内容发生变化时递增，供预热等缓存判断是否需要重算
+        self.feed_version = 0
+        self._feed_digests: Dict[str, int] = {}
+        # poll_entries 已见过的条目 id，按加入顺序保留最近 SEEN_ENTRIES_LIMIT 条；None 表示尚未轮询
+        self._seen_entries: Optional["OrderedDict[str, None]"] = None
+        # 源（首个镜像地址）-> 语料统计，获取到新的解析结果时重算
+        self._corpus: Dict[str, _SourceCorpus] = {}
 
     @abstractmethod
-    async def search(self, keyword: str) -> List[Dict[str, Any]]:
-        """执行搜索"""
+    async def search(self, keyword: str) -> List[FeedEntry]:
+        """执行搜索，返回 FeedEntry 列表（仍兼容 {platform, content, url, metadata} 字典）"""
         pass
 
     @abstractmethod
@@ -24,7 +91,462 @@ class PluginBase(ABC):
         pass
 
     async def _make_request(self, url: str, **kwargs) -> str:
-        """发送 HTTP 请求"""
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url, headers=self.headers, **kwargs) as response:
-                return await response.text() 
\ No newline at end of file
+        """发送 HTTP 请求，返回解码后的正文"""
+        _, headers, content = await self._fetch(url, **kwargs)
+        return content.decode(_charset(headers) or 'utf-8', errors='replace')
+
+    @contextlib.asynccontextmanager
+    async def _open(self, url: str, headers: Optional[Dict[str, str]] = None,
+                    **kwargs) -> AsyncIterator['_BodyReader']:
+        """
+        发送 HTTP 请求，在上下文中交出正文读取器，调用方可边读边处理、提前停止读取
+
+        协商 gzip/deflate/br 压缩，正文按块读取并自行解压，解压后超过 settings.request.max_body_size
+        时抛出 FeedTooLargeError。
+        超时取 settings.request.timeout；请求经过上游主机的熔断器，熔断打开时直接抛出 CircuitOpenError，
+        连接失败、超时和 5xx/429 响应计为主机失败。
+        """
+        host = urlsplit(url).netloc
+        breaker = breakers.get(f"host:{host}")
+        if breaker is not None and not breaker.allow():
+            raise CircuitOpenError(breaker)
+        if 'timeout' not in kwargs:
+            timeout = self._request_settings().get('timeout') or DEFAULT_FETCH_TIMEOUT
+            kwargs['timeout'] = aiohttp.ClientTimeout(total=timeout)
+        started = time.perf_counter()
+        with STAGE_SECONDS.time(self.name, 'fetch'), tracer.span("fetch", plugin=self.name, url=url) as span:
+            trace_configs = [_http_trace_config()] if span is not None else None
+            try:
+                async with aiohttp.ClientSession(trace_configs=trace_configs, auto_decompress=False) as session:
+                    request_headers = {'Accept-Encoding': ACCEPT_ENCODING, **self.headers, **(headers or {})}
+                    async with session.get(url, headers=request_headers, **kwargs) as response:
+                        reader = _BodyReader(response, self._max_body_size())
+                        yield reader
+                        if span is not None:
+                            span.set_attribute("status", response.status)
+                            span.set_attribute("bytes", reader.wire_bytes)
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                if breaker is not None:
+                    breaker.record_failure()
+                raise
+            except BaseException:
+                if breaker is not None:
+                    breaker.release()
+                raise
+            FEED_BYTES.inc(self.name, 'wire', amount=reader.wire_bytes)
+            FEED_BYTES.inc(self.name, 'body', amount=reader.body_bytes)
+            if response.status >= 500 or response.status == 429:
+                if breaker is not None:
+                    breaker.record_failure()
+            else:
+                if breaker is not None:
+                    breaker.record_success()
+                fetch_latency.observe(host, time.perf_counter() - started)
+
+    async def _fetch(self, url: str, headers: Optional[Dict[str, str]] = None, **kwargs) -> Tuple[int, Any, bytes]:
+        """发送 HTTP 请求，返回状态码、响应头和解压后的正文字节，不解码为字符串"""
+        async with self._open(url, headers, **kwargs) as reader:
+            content = b''.join([chunk async for chunk in reader.chunks()])
+        return reader.response.status, reader.response.headers, content
+
+    def _request_settings(self) -> Dict[str, Any]:
+        return self.config.get('settings', {}).get('request', {})
+
+    def _max_body_size(self) -> int:
+        return self._request_settings().get('max_body_size') or DEFAULT_MAX_BODY_SIZE
+
+    async def _get_feed(self, url: str, **kwargs) -> StreamedFeed:
+        """
+        获取并解析 feed
+
+        带上次响应的 ETag/Last-Modified 发送条件请求，上游返回 304 时复用上次的解析结果，
+        搜索和健康探测共用同一份缓存。settings.streaming.enabled 时改用流式解析。
+        """
+        if self.config.get('settings', {}).get('streaming', {}).get('enabled'):
+            return await self._get_feed_streaming(url, **kwargs)
+        cached = self._feed_cache.get(url)
+        headers = {}
+        if cached is not None:
+            etag, last_modified, _ = cached
+            if etag:
+                headers['If-None-Match'] = etag
+            if last_modified:
+                headers['If-Modified-Since'] = last_modified
+        status, response_headers, content = await self._fetch(url, headers=headers, **kwargs)
+        if status == 304 and cached is not None:
+            return cached[2]
+        feed = self._parse_feed(content, _charset(response_headers))
+        if status == 200:
+            digest = zlib.crc32(content)
+            if self._feed_digests.get(url) != digest:
+                self._feed_digests[url] = digest
+                self.feed_version += 1
+        if status == 200 and feed.entries and (response_headers.get('ETag') or response_headers.get('Last-Modified')):
+            self._feed_cache[url] = (response_headers.get('ETag'), response_headers.get('Last-Modified'), feed)
+        else:
+            self._feed_cache.pop(url, None)
+        return feed
+
+    async def _get_feed_streaming(self, url: str, **kwargs) -> StreamedFeed:
+        """
+        边下载边解析 feed，只保留新条目
+
+        每收到一块正文就交给增量解析器，取出已闭合的条目；连续 STREAM_STOP_AFTER_KNOWN 条
+        已见过或早于水位线的条目后停止读取，假定其后的条目都已见过（feed 按新到旧排列）。
+        新条目与上次保留的条目合并，最多保留 settings.streaming.max_entries 条。
+        同样发送条件请求，304 时直接返回上次的结果。
+        """
+        streaming = self.config.get('settings', {}).get('streaming', {})
+        max_entries = streaming.get('max_entries', DEFAULT_STREAM_MAX_ENTRIES)
+        state = self._streams.get(url)
+        fresh: List[StreamEntry] = []
+        known = 0
+        async with self._open(url, state.headers() if state is not None else None, **kwargs) as reader:
+            response = reader.response
+            if response.status == 304 and state is not None:
+                return state
+            if response.status != 200:
+                return StreamedFeed()
+            etag, last_modified = response.headers.get('ETag'), response.headers.get('Last-Modified')
+            entries = _stream_entries(reader, FeedStreamParser())
+            try:
+                async for entry in entries:
+                    if state is not None and state.is_known(entry):
+                        known += 1
+                        if known >= STREAM_STOP_AFTER_KNOWN:
+                            break
+                        continue
+                    known = 0
+                    fresh.append(entry)
+                    if len(fresh) >= max_entries:
+                        break
+            except ParseError as e:
+                if not fresh:
+                    raise
+                # 只解析了一部分，不保存校验头，下次完整获取
+                etag = last_modified = None
+                logger.warning("{} 解析中断，保留已解析的 {} 条新条目: {}", url, len(fresh), e)
+            finally:
+                await entries.aclose()
+        feed = (state or StreamedFeed()).merge(fresh, max_entries)
+        if fresh:
+            self.feed_version += 1
+        feed.etag, feed.last_modified = etag, last_modified
+        self._streams[url] = feed
+        logger.debug("{} 流式解析 {} 条新条目，读取 {} 字节", url, len(fresh), reader.body_bytes)
+        return feed
+
+    async def refresh_feeds(self) -> int:
+        """以条件请求重新获取所有源，返回 feed_version"""
+        async for _ in self._iter_feeds():
+            pass
+        return self.feed_version
+
+    async def poll_entries(self) -> List[Tuple[FeedEntry, str]]:
+        """
+        以条件请求刷新所有源，返回上次轮询以来新出现的条目及其小写检索文本
+
+        第一次轮询只记录已有条目，不返回；获取失败的源不影响已记录的条目。
+        检索文本与模板插件的 search 使用相同的字段，订阅匹配与搜索结果一致。
+        """
+        primed = self._seen_entries is not None
+        if not primed:
+            self._seen_entries = OrderedDict()
+        fresh = []
+        async for _, feed in self._iter_feeds():
+            for entry in feed.entries:
+                key = entry.get("id") or entry.get("link") or entry.get("title")
+                if not key or key in self._seen_entries:
+                    continue
+                self._seen_entries[key] = None
+                if primed:
+                    fresh.append((self._feed_entry(entry), entry.text))
+        while len(self._seen_entries) > SEEN_ENTRIES_LIMIT:
+            self._seen_entries.popitem(last=False)
+        return fresh
+
+    def _feed_entry(self, entry) -> FeedEntry:
+        """把 feed 条目转换为结果，与模板插件的 search 产出的字段一致"""
+        title = entry.get("title", "")
+        return FeedEntry(
+            platform=self.name,
+            content=f"{title}\n{self._clean_html(entry.get('description', ''))}",
+            url=entry.get("link", ""),
+            title=title,
+            published=entry.get("published", time.strftime("%Y-%m-%d %H:%M:%S")),
+            author=entry.get("author", "unknown"),
+            source=self.config.get('description')
+        )
+
+    def _sources(self) -> List[List[str]]:
+        """
+        settings.urls 按源分组，每组是同一 feed 的一个或多个镜像地址
+
+        settings.mirrors 为 true 时所有 url 是同一 feed 的镜像（如多个 RSSHub 实例），否则每个 url 是一个独立的源。
+        """
+        settings = self.config.get('settings', {})
+        urls = settings.get('urls', [])
+        if settings.get('mirrors') and urls:
+            return [list(urls)]
+        return [[url] for url in urls]
+
+    async def _iter_feeds(self) -> AsyncIterator[Tuple[str, Any]]:
+        """依次获取每个源，产出 (实际使用的 url, 解析结果)，获取失败的源记录日志后跳过"""
+        for mirrors in self._sources():
+            try:
+                url, feed = await self._get_source(mirrors)
+            except Exception as e:
+                logger.error("处理 {} 时出错: {}", mirrors[0], e)
+                continue
+            self._observe(mirrors[0], feed)
+            yield url, feed
+
+    def _observe(self, source: str, feed) -> None:
+        """源的解析结果变化时（304 复用时不变）重新统计条目数和总长度"""
+        corpus = self._corpus.get(source)
+        if corpus is None or corpus.feed is not feed:
+            self._corpus[source] = _SourceCorpus(feed, sum(self._document_length(entry) for entry in feed.entries))
+
+    @staticmethod
+    def _document_length(entry) -> int:
+        """与模板插件 search 产出的结果按同一口径计算长度：标题 + 正文（标题和去除标签的描述）"""
+        title = entry.get("title", "")
+        description = " ".join(_TAG_RE.sub(" ", entry.get("description", "")).split())
+        return 2 * len(title) + 1 + len(description)
+
+    def corpus_stats(self, terms: List[str]) -> Tuple[int, int, Dict[str, int]]:
+        """
+        各源最近一次获取的全部条目的语料统计：(文档数, 文档总长度, 包含各查询词的文档数)
+
+        查询词应为小写，按检索文本的子串统计，与搜索的匹配方式一致。
+        """
+        documents = total_length = 0
+        doc_freq = dict.fromkeys(terms, 0)
+        for corpus in self._corpus.values():
+            documents += corpus.documents
+            total_length += corpus.total_length
+            for term in terms:
+                df = corpus.doc_freq.get(term)
+                if df is None:
+                    if len(corpus.doc_freq) >= CORPUS_TERMS_LIMIT:
+                        corpus.doc_freq.clear()
+                    df = corpus.doc_freq[term] = sum(
+                        1 for entry in corpus.feed.entries if term in entry.text
+                    )
+                doc_freq[term] += df
+        return documents, total_length, doc_freq
+
+    async def _get_source(self, mirrors: List[str]) -> Tuple[str, Any]:
+        """
+        获取一个源；有多个镜像时发送对冲请求
+
+        先请求第一个镜像，超过该主机近期耗时的 p95（settings.request.hedge_quantile）仍未返回时
+        再请求下一个镜像，采用先返回且有条目的结果。样本不足时等待 settings.request.hedge_delay 秒。
+        熔断中的镜像排在最后。
+        """
+        if len(mirrors) == 1:
+            return mirrors[0], await self._get_feed(mirrors[0])
+
+        def rejecting(url: str) -> bool:
+            breaker = breakers.peek(f"host:{urlsplit(url).netloc}")
+            return breaker is not None and breaker.rejecting
+
+        ordered = sorted(mirrors, key=rejecting)
+        request = self.config.get('settings', {}).get('request', {})
+
+        def delay(index: int) -> float:
+            p95 = fetch_latency.quantile(urlsplit(ordered[index]).netloc, request.get('hedge_quantile', 0.95))
+            return p95 if p95 is not None else request.get('hedge_delay', 1.0)
+
+        index, feed = await hedged(
+            [functools.partial(self._get_feed, url) for url in ordered], delay,
+            accept=lambda result: len(result.entries) > 0
+        )
+        FETCH_HEDGE_WINS.inc('primary' if index == 0 else 'hedge')
+        return ordered[index], feed
+
+    async def _probe(self, url: Optional[str] = None) -> bool:
+        """
+        轻量健康探测：条件请求命中 304 时不下载、不解析，否则解析并缓存供搜索复用
+
+        未指定 url 时探测第一个源，有镜像时任一镜像可用即视为健康。
+        """
+        if url is None:
+            sources = self._sources()
+            if not sources:
+                return False
+            _, feed = await self._get_source(sources[0])
+        else:
+            feed = await self._get_feed(url)
+        return len(feed.entries) > 0
+
+    def _parse_feed(self, content, charset: Optional[str] = None) -> StreamedFeed:
+        """
+        解析 RSS/Atom 内容
+
+        字节内容以流的形式交给 feedparser，由它按 XML 声明和响应的 charset 解码，不做二次解码。
+        条目随即转换为 StreamEntry，缓存中不保留 feedparser 的完整解析树。
+        """
+        with STAGE_SECONDS.time(self.name, 'parse'), tracer.span("parse", plugin=self.name):
+            if isinstance(content, bytes):
+                response_headers = {'content-type': f'application/xml; charset={charset}'} if charset else None
+                parsed = feedparser.parse(io.BytesIO(content), response_headers=response_headers)
+            else:
+                parsed = feedparser.parse(content)
+            return StreamedFeed([StreamEntry.from_parsed(entry) for entry in parsed.entries])
+
+    def _clean_html(self, html: str) -> str:
+        """清理 HTML 标签"""
+        with STAGE_SECONDS.time(self.name, 'clean'), tracer.span("clean", plugin=self.name):
+            try:
+                soup = BeautifulSoup(html, "html.parser")
+                for script in soup(["script", "style"]):
+                    script.decompose()
+                text = soup.get_text(strip=True)
+                return " ".join(text.split())
+            except Exception as e:
+                logger.error(f"Error cleaning HTML: {str(e)}")
+                return html
+
+
+def plugin_class_name(plugin_name: str) -> str:
+    """插件类名，由插件名转为驼峰形式加 Plugin 后缀，如 feed_1 -> Feed1Plugin"""
+    return "".join(word.capitalize() for word in plugin_name.split('_')) + "Plugin"
+
+
+def load_plugin_class(plugin_path: str, plugin_name: str) -> Type[PluginBase]:
+    """
+    从插件目录的 main.py 导入插件类
+
+    主进程和插件宿主进程共用这一加载逻辑。
+    """
+    module_name = f"plugins.{os.path.basename(os.path.normpath(plugin_path))}.main"
+    spec = importlib.util.spec_from_file_location(module_name, os.path.join(plugin_path, "main.py"))
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[module_name] = module  # 使用完整的模块路径
+    spec.loader.exec_module(module)
+
+    class_name = plugin_class_name(plugin_name)
+    if not hasattr(module, class_name):
+        raise AttributeError(f"未找到插件类 {class_name}")
+    return getattr(module, class_name)
+
+
+def _charset(headers) -> Optional[str]:
+    """从 Content-Type 中取出 charset"""
+    for param in (headers.get('Content-Type') or '').split(';')[1:]:
+        name, _, value = param.strip().partition('=')
+        if name.lower() == 'charset' and value:
+            return value.strip('"\' ')
+    return None
+
+
+class _Decompressor:
+    """
+    限制输出长度的增量解压
+
+    每次最多产出 limit + 1 字节左右，输出达到上限时剩余输入留在解压器中不再展开，
+    调用方据此判定超限，压缩炸弹在占用内存之前即被拦下。
+    """
+
+    def __init__(self, encoding: str):
+        self._zlib = None
+        self._brotli = None
+        if encoding in ('gzip', 'x-gzip'):
+            self._zlib = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        elif encoding == 'deflate':
+            self._zlib = zlib.decompressobj()
+        elif encoding == 'br' and BOUNDED_BROTLI:
+            self._brotli = brotli.Decompressor()
+        else:
+            raise aiohttp.ClientPayloadError(f"Unsupported Content-Encoding: {encoding}")
+
+    def decompress(self, data: bytes, limit: int) -> bytes:
+        if self._zlib is not None:
+            return self._zlib.decompress(data, limit + 1)
+        return self._brotli.process(data, output_buffer_limit=limit + 1)
+
+    def flush(self, limit: int) -> bytes:
+        """输入结束后取出剩余输出"""
+        if self._brotli is not None:
+            return b''
+        if self._zlib.unconsumed_tail:
+            # 只有输出达到上限时才会留下未消耗的输入
+            return self._zlib.decompress(self._zlib.unconsumed_tail, limit + 1)
+        return self._zlib.flush()
+
+
+class _BodyReader:
+    """
+    按块读取响应体并解压，累计传输字节数和解压后的字节数
+
+    Content-Length 或解压后的长度超过 max_size 时中止读取。
+    """
+
+    def __init__(self, response: aiohttp.ClientResponse, max_size: int):
+        self.response = response
+        self.max_size = max_size
+        self.wire_bytes = 0
+        self.body_bytes = 0
+
+    async def chunks(self) -> AsyncIterator[bytes]:
+        response = self.response
+        if response.content_length is not None and response.content_length > self.max_size:
+            raise FeedTooLargeError(f"Response body {response.content_length} bytes exceeds limit {self.max_size}")
+        encoding = response.headers.get('Content-Encoding', '').strip().lower()
+        decompressor = _Decompressor(encoding) if encoding not in ('', 'identity') else None
+        async for chunk in response.content.iter_chunked(64 * 1024):
+            self.wire_bytes += len(chunk)
+            if decompressor is not None:
+                chunk = self._decode(decompressor.decompress, chunk)
+            if chunk:
+                yield chunk
+        if decompressor is not None:
+            tail = self._decode(decompressor.flush)
+            if tail:
+                yield tail
+
+    def _decode(self, decompress, *args) -> bytes:
+        """以剩余额度为上限解压，超过 max_size 时中止"""
+        try:
+            chunk = decompress(*args, self.max_size - self.body_bytes)
+        except Exception as e:
+            raise aiohttp.ClientPayloadError(f"Cannot decode body: {e}")
+        self.body_bytes += len(chunk)
+        if self.body_bytes > self.max_size:
+            raise FeedTooLargeError(f"Response body exceeds limit {self.max_size}")
+        return chunk
+
+
+async def _stream_entries(reader: _BodyReader, parser: FeedStreamParser) -> AsyncIterator[StreamEntry]:
+    """边读取正文边产出已闭合的条目"""
+    async for chunk in reader.chunks():
+        for entry in parser.feed(chunk):
+            yield entry
+    for entry in parser.close():
+        yield entry
+
+
+def _http_trace_config() -> aiohttp.TraceConfig:
+    """把 aiohttp 的 DNS 解析、建连和首字节等事件记录为 fetch 的子 span"""
+    trace_config = aiohttp.TraceConfig()
+
+    def start(name: str):
+        async def on_start(session, context, params):
+            setattr(context, name, tracer.start_span(name))
+        return on_start
+
+    def end(name: str):
+        async def on_end(session, context, params):
+            span = getattr(context, name, None)
+            if span is not None:
+                span.finish()
+        return on_end
+
+    trace_config.on_dns_resolvehost_start.append(start("dns"))
+    trace_config.on_dns_resolvehost_end.append(end("dns"))
+    trace_config.on_connection_create_start.append(start("connect"))
+    trace_config.on_connection_create_end.append(end("connect"))
+    trace_config.on_request_start.append(start("upstream"))
+    trace_config.on_request_end.append(end("upstream"))
+    return trace_config
@@ -0,0 +1,161 @@
+"""
+插件宿主进程
+
+由插件环境中的解释器启动，通过 stdin/stdout 上的长度前缀帧与主进程通信。
+一个宿主进程可加载多个依赖相同的插件，并发处理多个请求，响应按请求 id 匹配。
+
+请求: {"id": 1, "op": "load" | "unload" | "search" | "health_check" | "refresh_feeds" | "poll_entries"
+       | "corpus_stats" | "ping", "trace": true, ...}
+插件按 load 请求中的 key（插件名@修订号）保存，unload、search 等请求的 plugin 字段即该 key。
+响应: {"id": 1, "ok": true, "result": ...} 或 {"id": 1, "ok": false, "error": "..."}
+search 的结果中 FeedEntry 以字段值列表传输（FeedEntry.to_wire），poll_entries 的结果为 [[条目字段值列表, 检索文本], ...]。
+响应同时带上宿主进程中的指标增量（metrics）和上游主机熔断器快照（breakers），
+请求带 trace 时还带上插件记录的 span（spans），由主进程合并。
+"""
+import os
+import sys
+import asyncio
+import argparse
+import traceback
+from contextlib import nullcontext
+from typing import Any, Dict
+
+# 添加项目根目录到 Python 路径
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from src.core.plugin_protocol import (
+    HANDSHAKE_CODEC, ProtocolError, available_codecs, get_codec, pack_frame, read_frame
+)
+from src.core.circuit_breaker import breakers
+from src.core.metrics import metrics
+from src.core.tracing import tracer
+
+
+class PluginHost:
+    """宿主进程中的插件容器和请求分发"""
+
+    def __init__(self, codec: str, writer: asyncio.StreamWriter):
+        self.encode, _ = get_codec(codec)
+        self.writer = writer
+        self.plugins: Dict[str, Any] = {}
+
+    async def handle(self, message: Dict[str, Any]) -> None:
+        request_id = message.get("id")
+        response: Dict[str, Any] = {"id": request_id}
+        # 主进程的请求处于 trace 中时，插件的抓取、解析等 span 在这里记录，随响应发回
+        with tracer.start_trace(message.get("op")) if message.get("trace") else nullcontext() as trace:
+            try:
+                response.update(ok=True, result=await self.dispatch(message))
+            except Exception as e:
+                response.update(ok=False, error=f"{type(e).__name__}: {e}")
+        if trace is not None:
+            response["spans"] = [span.to_wire() for span in trace.root.children]
+        changes = metrics.collect_changes()
+        if changes:
+            response["metrics"] = changes
+        response["breakers"] = breakers.snapshots("host:")
+        self.send(response)
+
+    async def dispatch(self, message: Dict[str, Any]) -> Any:
+        op = message.get("op")
+        if op == "ping":
+            return {"pid": os.getpid(), "plugins": list(self.plugins)}
+        if op == "load":
+            from src.core.plugin_base import load_plugin_class
+            name = message["name"]
+            if "circuit_breaker" in message:
+                breakers.configure(message["circuit_breaker"])
+            plugin_class = load_plugin_class(message["path"], name)
+            self.plugins[message.get("key", name)] = plugin_class(name, message["config"])
+            return True
+        if op == "unload":
+            return self.plugins.pop(message.get("plugin"), None) is not None
+
+        plugin = self.plugins.get(message.get("plugin"))
+        if plugin is None:
+            raise KeyError(f"Plugin not loaded: {message.get('plugin')}")
+        if op == "search":
+            from src.models.entry import FeedEntry
+            results = await plugin.search(message["keyword"])
+            return [result.to_wire() if isinstance(result, FeedEntry) else result for result in results]
+        if op == "health_check":
+            return await plugin.health_check()
+        if op == "refresh_feeds":
+            return await plugin.refresh_feeds()
+        if op == "poll_entries":
+            return [[entry.to_wire(), text] for entry, text in await plugin.poll_entries()]
+        if op == "corpus_stats":
+            return list(plugin.corpus_stats(message["terms"]))
+        raise ProtocolError(f"Unknown op: {op}")
+
+    def send(self, message: Dict[str, Any]) -> None:
+        try:
+            payload = self.encode(message)
+        except Exception as e:
+            payload = self.encode({"id": message.get("id"), "ok": False, "error": f"Encode error: {e}"})
+        self.writer.write(pack_frame(payload))
+
+
+async def serve(codec: str) -> None:
+    loop = asyncio.get_running_loop()
+
+    # stdout 专用于帧传输：复制一份给协议使用，原 fd 1 重定向到 stderr，
+    # 防止插件中的 print 破坏帧流
+    frame_fd = os.dup(1)
+    os.dup2(2, 1)
+    sys.stdout = sys.stderr
+
+    reader = asyncio.StreamReader()
+    await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), sys.stdin.buffer)
+    transport, protocol = await loop.connect_write_pipe(
+        asyncio.streams.FlowControlMixin, os.fdopen(frame_fd, "wb")
+    )
+    writer = asyncio.StreamWriter(transport, protocol, None, loop)
+
+    if codec not in available_codecs():
+        codec = "json"
+    handshake, _ = get_codec(HANDSHAKE_CODEC)
+    writer.write(pack_frame(handshake({"ready": True, "codec": codec, "pid": os.getpid()})))
+
+    host = PluginHost(codec, writer)
+    _, decode = get_codec(codec)
+    tasks = set()
+    while True:
+        try:
+            frame = await read_frame(reader)
+        except asyncio.IncompleteReadError:
+            break  # 主进程关闭了管道
+        try:
+            message = decode(frame)
+        except Exception as e:
+            print(f"Invalid frame: {e}", file=sys.stderr)
+            continue
+        task = loop.create_task(host.handle(message))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+        # 写缓冲积压时让出，等待主进程读取
+        await writer.drain()
+
+    for task in tasks:
+        task.cancel()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="SearcHub 插件宿主进程")
+    parser.add_argument("--codec", default="msgpack", help="帧编码，msgpack 不可用时退回 json")
+    args = parser.parse_args()
+
+    from loguru import logger
+    logger.remove()
+    logger.add(sys.stderr, level=os.environ.get("SEARCHUB_PLUGIN_LOG_LEVEL", "INFO"))
+    try:
+        asyncio.run(serve(args.codec))
+    except Exception:
+        traceback.print_exc()
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+import os
+import ast
+import json
+import asyncio
+from typing import Any, Dict, List, Optional, Tuple, Type
+import yaml
+from loguru import logger
+from ..models.entry import FeedEntry
+from .plugin_base import PluginBase, load_plugin_class, plugin_class_name
+
+CONFIG_FILE = "plugin.yaml"
+MODULE_FILE = "main.py"
+
+
+def check_plugin_module(main_path: str, plugin_name: str) -> Optional[str]:
+    """
+    不导入模块，静态检查 main.py 能否解析、是否在顶层定义或导入了插件类
+
+    返回错误信息，检查通过时返回 None。模块依赖缺失等导入期错误要到实际导入时才能发现。
+    """
+    try:
+        with open(main_path, 'rb') as f:
+            tree = ast.parse(f.read(), main_path)
+    except FileNotFoundError:
+        return f"缺少 {MODULE_FILE}"
+    except (OSError, SyntaxError, ValueError) as e:
+        return f"{MODULE_FILE} 无法解析: {str(e)}"
+
+    class_name = plugin_class_name(plugin_name)
+    for node in tree.body:
+        if isinstance(node, ast.ClassDef):
+            names = [node.name]
+        elif isinstance(node, (ast.Import, ast.ImportFrom)):
+            names = [alias.asname or alias.name for alias in node.names]
+        elif isinstance(node, ast.Assign):
+            names = [target.id for target in node.targets if isinstance(target, ast.Name)]
+        else:
+            continue
+        if class_name in names:
+            return None
+    return f"未找到插件类 {class_name}"
+
+
+class PluginManifest:
+    """
+    插件清单缓存
+
+    记录每个 plugin.yaml 的修改时间、大小和解析结果，启动时只重新解析变化过的文件。
+    缓存文件损坏或缺失时退回到全部解析。
+    """
+
+    def __init__(self, cache_path: Optional[str] = None):
+        self.cache_path = cache_path
+        self.entries: Dict[str, Dict[str, Any]] = {}  # plugin.yaml 绝对路径 -> {mtime_ns, size, config}
+        self.parsed = 0
+        self.cached = 0
+        if cache_path and os.path.exists(cache_path):
+            try:
+                with open(cache_path, 'r', encoding='utf-8') as f:
+                    self.entries = json.load(f)
+            except Exception as e:
+                logger.warning(f"插件清单缓存不可用，将重新解析: {str(e)}")
+                self.entries = {}
+
+    def scan(self, plugin_dir: str) -> List[Dict[str, Any]]:
+        """
+        扫描插件目录，返回 [{path, config}]，按目录名排序
+        """
+        self.parsed = self.cached = 0
+        plugins = []
+        seen = set()
+        for item in sorted(os.listdir(plugin_dir)):
+            plugin_path = os.path.join(plugin_dir, item)
+            config_path = os.path.abspath(os.path.join(plugin_path, CONFIG_FILE))
+            if item.startswith('__') or not os.path.isdir(plugin_path):
+                continue
+            try:
+                stat = os.stat(config_path)
+            except OSError:
+                continue
+            seen.add(config_path)
+            entry = self.entries.get(config_path)
+            if entry is None or entry['mtime_ns'] != stat.st_mtime_ns or entry['size'] != stat.st_size:
+                try:
+                    with open(config_path, 'r', encoding='utf-8') as f:
+                        config = yaml.safe_load(f)
+                except Exception as e:
+                    logger.error(f"解析插件配置 {config_path} 失败: {str(e)}")
+                    continue
+                entry = self.entries[config_path] = {
+                    'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size, 'config': config
+                }
+                self.parsed += 1
+            else:
+                self.cached += 1
+            plugins.append({'path': plugin_path, 'config': entry['config']})
+
+        for stale in set(self.entries) - seen:
+            if os.path.dirname(os.path.dirname(stale)) == os.path.abspath(plugin_dir):
+                del self.entries[stale]
+        return plugins
+
+    def check_module(self, plugin_path: str, plugin_name: str) -> Optional[str]:
+        """
+        检查插件的 main.py 和插件类，返回错误信息；结果按 main.py 的修改时间和大小缓存在清单中
+        """
+        main_path = os.path.join(plugin_path, MODULE_FILE)
+        try:
+            stat = os.stat(main_path)
+        except OSError:
+            return f"缺少 {MODULE_FILE}"
+        entry = self.entries.get(os.path.abspath(os.path.join(plugin_path, CONFIG_FILE)))
+        signature = [stat.st_mtime_ns, stat.st_size, plugin_name]
+        module = entry.get('module') if entry is not None else None
+        if module is not None and module['signature'] == signature:
+            return module['error']
+        error = check_plugin_module(main_path, plugin_name)
+        if entry is not None:
+            entry['module'] = {'signature': signature, 'error': error}
+        return error
+
+    def save(self) -> None:
+        if not self.cache_path:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.cache_path) or '.', exist_ok=True)
+            temp_path = f"{self.cache_path}.tmp"
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.entries, f, ensure_ascii=False)
+            os.replace(temp_path, self.cache_path)
+        except Exception as e:
+            logger.warning(f"写入插件清单缓存失败: {str(e)}")
+
+
+class LazyPlugin:
+    """
+    延迟加载的插件代理，接口与 PluginBase 一致
+
+    首次使用时才导入模块并实例化，导入在线程池中进行，不阻塞事件循环；
+    同一插件的并发首次调用只导入一次。
+    """
+
+    def __init__(self, name: str, config: Dict[str, Any], plugin_path: str,
+                 plugin_class: Optional[Type[PluginBase]] = None):
+        self.name = name
+        self.config = config
+        self.plugin_path = plugin_path
+        self.plugin_class = plugin_class
+        self.instance: Optional[PluginBase] = None
+        self._lock = asyncio.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self.instance is not None
+
+    async def load(self) -> PluginBase:
+        if self.instance is not None:
+            return self.instance
+        async with self._lock:
+            if self.instance is None:
+                if self.plugin_class is None:
+                    loop = asyncio.get_running_loop()
+                    self.plugin_class = await loop.run_in_executor(
+                        None, load_plugin_class, self.plugin_path, self.name
+                    )
+                self.instance = self.plugin_class(self.name, self.config)
+                logger.debug("插件 {} 已加载", self.name)
+        return self.instance
+
+    async def warm_up(self) -> None:
+        await self.load()
+
+    async def search(self, keyword: str) -> List[Any]:
+        return await (await self.load()).search(keyword)
+
+    async def health_check(self) -> bool:
+        return await (await self.load()).health_check()
+
+    async def refresh_feeds(self) -> int:
+        return await (await self.load()).refresh_feeds()
+
+    async def poll_entries(self) -> List[Tuple[FeedEntry, str]]:
+        return await (await self.load()).poll_entries()
@@ -1,10 +1,22 @@
 import os
-import importlib.util
+import asyncio
 import yaml
-import sys
-from typing import Dict, List, Any
+import time
+from collections import OrderedDict
+from typing import Dict, List, Any, Optional, Tuple
+from urllib.parse import urlsplit
 from loguru import logger
 from ..models.schemas import PluginInfo
+from ..models.entry import FeedEntry
+from .metrics import PLUGIN_SEARCH_SECONDS, PLUGIN_ERRORS, PLUGIN_RESULTS, CIRCUIT_REJECTIONS
+from .tracing import tracer
+from .logging_setup import log_sample
+from .plugin_base import PluginBase, load_plugin_class, plugin_class_name
+from .plugin_process import PluginHostManager, RemotePlugin
+from .plugin_loader import PluginManifest, LazyPlugin
+from .health_supervisor import HealthSupervisor
+from .circuit_breaker import CircuitOpenError, breakers
+from .ranker import CorpusStats, query_terms
 
 class PluginManager:
     _instance = None
@@ -19,129 +31,458 @@ class PluginManager:
         if not PluginManager._initialized:
             self.plugins: Dict[str, PluginInfo] = {}
             self.plugin_instances: Dict[str, Any] = {}
+            self.last_request: Dict[str, float] = {}  # 插件名称 -> 最近一次搜索的时间戳
+            self.execution_mode = "inprocess"
+            self.host_manager: Optional[PluginHostManager] = None
+            self._warm_tasks: Dict[str, asyncio.Task] = {}
+            self.plugin_paths: Dict[str, str] = {}  # 插件名称 -> 插件目录
+            self.lazy_loading = False
+            self.warm_up_on_start = True
+            self.manifest = PluginManifest()
+            self.startup_stats: Dict[str, Any] = {}
+            self.supervisor: Optional[HealthSupervisor] = None
+            self.timeout_per_plugin: Optional[float] = None
+            # (插件名称, 关键词) -> 最近一次成功的结果，熔断时返回
+            self.fallback_results: "OrderedDict[Tuple[str, str], List[FeedEntry]]" = OrderedDict()
+            self.fallback_size = 1024
             PluginManager._initialized = True
+
+    def configure(self, config: Dict[str, Any], environment_manager) -> None:
+        """
+        按 plugins.execution_mode 配置插件运行方式
+
+        - inprocess: 插件导入主进程执行（默认）
+        - process: 插件在各自环境解释器的宿主进程中执行
+        """
+        self.execution_mode = config.get('plugins', {}).get('execution_mode', 'inprocess')
+        if self.execution_mode == 'process':
+            self.host_manager = PluginHostManager(environment_manager, config)
+
+        control_config = config.get('control', {})
+        self.lazy_loading = control_config.get('lazy_plugin_loading', False)
+        self.warm_up_on_start = control_config.get('plugin_warm_up', True)
+        self.manifest = PluginManifest(control_config.get('plugin_manifest_cache'))
+        self.supervisor = HealthSupervisor(self, config)
+        self.timeout_per_plugin = config.get('plugins', {}).get('timeout_per_plugin')
+        breaker_config = config.get('circuit_breaker', {})
+        breakers.configure(breaker_config)
+        self.fallback_size = breaker_config.get('fallback_cache_size', 1024)
+        logger.info(f"插件执行模式: {self.execution_mode}，{'延迟' if self.lazy_loading else '立即'}加载")
+
+    def _create_instance(self, config: Dict[str, Any], plugin_path: str) -> Any:
+        """创建插件实例，宿主进程模式和延迟加载模式下返回代理"""
+        if self.host_manager is not None:
+            runtime = (config.get('environment') or {}).get('runtime', 'python')
+            if not self.host_manager.environment_manager.supports_runtime(runtime):
+                raise ValueError(f"宿主进程模式不支持运行时 {runtime}")
+            return RemotePlugin(config['name'], config, plugin_path, self.host_manager)
+        if self.lazy_loading:
+            # 不导入模块，但先确认 main.py 和插件类存在，避免注册一个无法加载的插件
+            error = self.manifest.check_module(plugin_path, config['name'])
+            if error is not None:
+                raise ImportError(error)
+            return LazyPlugin(config['name'], config, plugin_path)
+        logger.debug("查找插件类: {}", plugin_class_name(config['name']))
+        plugin_class = load_plugin_class(plugin_path, config['name'])
+        return plugin_class(config['name'], config)
+
+    def _warm_up(self, name: str, plugin: RemotePlugin) -> None:
+        """后台构建环境并启动宿主进程，不阻塞插件加载"""
+        async def warm():
+            try:
+                await plugin.warm_up()
+            except Exception as e:
+                logger.error(f"插件 {name} 宿主进程启动失败: {str(e)}")
+            finally:
+                self._warm_tasks.pop(name, None)
+
+        if name not in self._warm_tasks:
+            self._warm_tasks[name] = asyncio.ensure_future(warm())
+
+    def _warm_up_lazy_plugins(self) -> None:
+        """后台依次导入延迟加载的插件，首次搜索时不再等待导入"""
+        async def warm():
+            started = time.perf_counter()
+            try:
+                for name, instance in list(self.plugin_instances.items()):
+                    if isinstance(instance, LazyPlugin) and not instance.loaded:
+                        try:
+                            await instance.load()
+                        except Exception as e:
+                            logger.error(f"预热插件 {name} 失败: {str(e)}")
+                            info = self.plugins.get(name)
+                            if info is not None and self.plugin_instances.get(name) is instance:
+                                info.status = 'error'
+                self.startup_stats['warm_up_seconds'] = round(time.perf_counter() - started, 3)
+                logger.info(f"插件预热完成，耗时 {self.startup_stats['warm_up_seconds']}s")
+            finally:
+                self._warm_tasks.pop('__lazy__', None)
+
+        if '__lazy__' not in self._warm_tasks:
+            self._warm_tasks['__lazy__'] = asyncio.ensure_future(warm())
+
+    async def shutdown(self) -> None:
+        """停止健康巡检，关闭宿主进程"""
+        for task in list(self._warm_tasks.values()):
+            task.cancel()
+        if self.supervisor is not None:
+            await self.supervisor.stop()
+        if self.host_manager is not None:
+            await self.host_manager.close()
         
     async def discover_plugins(self, plugin_dir: str = "plugins") -> None:
         """扫描并加载插件"""
         logger.info(f"开始扫描插件目录: {plugin_dir}")
+        started = time.perf_counter()
         
         loaded_plugins = set()  # 记录本次加载的插件
-        
-        for item in os.listdir(plugin_dir):
-            plugin_path = os.path.join(plugin_dir, item)
-            logger.info(f"检查目录: {plugin_path}")
-            
-            if os.path.isdir(plugin_path) and not item.startswith('__'):
-                config_path = os.path.join(plugin_path, "plugin.yaml")
-                if os.path.exists(config_path):
-                    try:
-                        # 加载配置
-                        with open(config_path, 'r', encoding='utf-8') as f:
-                            config = yaml.safe_load(f)
-                        
-                        # 确保插件状态为 running
-                        config['status'] = 'running'
-                        logger.info(f"加载插件配置: {config}")
-                        
-                        # 动态导入插件模块
-                        module_name = f"plugins.{item}.main"
-                        spec = importlib.util.spec_from_file_location(
-                            module_name,
-                            os.path.join(plugin_path, "main.py")
-                        )
-                        module = importlib.util.module_from_spec(spec)
-                        sys.modules[module_name] = module  # 使用完整的模块路径
-                        spec.loader.exec_module(module)
-                        
-                        # 获取插件类
-                        plugin_class_name = "".join(
-                            word.capitalize() for word in config['name'].split('_')
-                        ) + "Plugin"
-                        logger.info(f"查找插件类: {plugin_class_name}")
-                        
-                        if hasattr(module, plugin_class_name):
-                            plugin_class = getattr(module, plugin_class_name)
-                            plugin_instance = plugin_class(config['name'], config)
-                            
-                            # 保存插件信息和实例
-                            plugin_info = PluginInfo(
-                                name=config['name'],
-                                version=config['version'],
-                                language=config['language'],
-                                type=config['type'],
-                                status='running',  # 强制设置状态为 running
-                                environment=config.get('environment', {}),
-                                communication=config.get('communication', {})
-                            )
-                            
-                            self.plugins[config['name']] = plugin_info
-                            self.plugin_instances[config['name']] = plugin_instance
-                            loaded_plugins.add(config['name'])
-                            
-                            # 保存更新后的配置
-                            with open(config_path, 'w', encoding='utf-8') as f:
-                                yaml.safe_dump(config, f, allow_unicode=True)
-                            
-                            logger.info(f"成功加载插件: {config['name']} (状态: running)")
-                        else:
-                            logger.error(f"未找到插件类 {plugin_class_name}")
-                            
-                    except Exception as e:
-                        logger.error(f"加载插件 {item} 失败: {str(e)}")
-                        continue
+
+        # 配置从清单缓存读取，只有变化过的 plugin.yaml 会重新解析
+        entries = self.manifest.scan(plugin_dir)
+        scanned = time.perf_counter()
+
+        for entry in entries:
+            name = self.load_plugin(entry['path'], config=dict(entry['config']))
+            if name:
+                loaded_plugins.add(name)
+        self.manifest.save()
         
         # 移除不再存在的插件
         for plugin_name in list(self.plugins.keys()):
             if plugin_name not in loaded_plugins:
                 logger.info(f"移除不存在的插件: {plugin_name}")
-                self.plugins.pop(plugin_name)
-                self.plugin_instances.pop(plugin_name, None)
+                self.unload_plugin(plugin_name)
+
+        finished = time.perf_counter()
+        self.startup_stats = {
+            "plugins": len(self.plugins),
+            "lazy_loading": self.lazy_loading,
+            "execution_mode": self.execution_mode,
+            "manifest_parsed": self.manifest.parsed,
+            "manifest_cached": self.manifest.cached,
+            "scan_seconds": round(scanned - started, 3),
+            "load_seconds": round(finished - scanned, 3),
+            "discover_seconds": round(finished - started, 3),
+        }
+        logger.info(f"已加载 {len(self.plugins)} 个插件，耗时 {self.startup_stats['discover_seconds']}s "
+                    f"(清单解析 {self.manifest.parsed}，缓存命中 {self.manifest.cached})")
+        logger.debug("插件: {}", list(self.plugins.keys()))
 
-        logger.info(f"已加载 {len(self.plugins)} 个插件: {list(self.plugins.keys())}")
-        logger.info(f"插件实例: {list(self.plugin_instances.keys())}")
+        if self.lazy_loading and self.warm_up_on_start:
+            self._warm_up_lazy_plugins()
+
+    def load_plugin(self, plugin_path: str, reload_code: bool = True,
+                    config: Optional[Dict[str, Any]] = None) -> Optional[str]:
+        """
+        加载或重新加载单个插件目录，返回插件名称，失败时返回 None
+
+        新实例创建成功后才替换旧实例：进行中的搜索继续使用旧实例，新的搜索使用新实例；
+        加载失败时保留旧实例。reload_code 为 False 且插件已加载时只用新配置重新实例化，不重新导入模块。
+        config 为空时从 plugin.yaml 读取。
+        """
+        config_path = os.path.join(plugin_path, "plugin.yaml")
+        if not os.path.exists(config_path):
+            return None
+        item = os.path.basename(os.path.normpath(plugin_path))
+        try:
+            # 加载配置
+            if config is None:
+                with open(config_path, 'r', encoding='utf-8') as f:
+                    config = yaml.safe_load(f)
+
+            # 确保插件状态为 running，只有状态变化时才写回，避免触发文件监视
+            status_changed = config.get('status') != 'running'
+            config['status'] = 'running'
+            logger.debug("加载插件配置: {}", config)
+
+            previous = self.plugin_instances.get(config['name'])
+            if previous is not None and not reload_code:
+                plugin_instance = self._reconfigure_instance(previous, config, plugin_path)
+            else:
+                plugin_instance = self._create_instance(config, plugin_path)
+
+            # 保存插件信息和实例
+            plugin_info = PluginInfo(
+                name=config['name'],
+                version=config['version'],
+                language=config['language'],
+                type=config['type'],
+                status='running',  # 强制设置状态为 running
+                environment=config.get('environment', {}),
+                communication=config.get('communication', {})
+            )
+
+            self.plugins[config['name']] = plugin_info
+            self.plugin_instances[config['name']] = plugin_instance
+            self._retire(previous)
+            self.plugin_paths[config['name']] = os.path.abspath(plugin_path)
+            if isinstance(plugin_instance, RemotePlugin):
+                self._warm_up(config['name'], plugin_instance)
+
+            # 保存更新后的配置
+            if status_changed:
+                with open(config_path, 'w', encoding='utf-8') as f:
+                    yaml.safe_dump(config, f, allow_unicode=True)
+
+            logger.debug("成功加载插件: {} (状态: running)", config['name'])
+            return config['name']
+
+        except Exception as e:
+            logger.error(f"加载插件 {item} 失败: {str(e)}")
+            return None
+
+    def _reconfigure_instance(self, previous: Any, config: Dict[str, Any], plugin_path: str) -> Any:
+        """用新配置创建同一插件类的实例，不重新导入模块"""
+        if isinstance(previous, RemotePlugin):
+            # 宿主进程按修订号区分实例，新修订会以新配置重新加载
+            return RemotePlugin(config['name'], config, plugin_path, previous.manager)
+        if isinstance(previous, LazyPlugin):
+            return LazyPlugin(config['name'], config, plugin_path, previous.plugin_class)
+        return type(previous)(config['name'], config)
+
+    def restart_instance(self, plugin_name: str) -> None:
+        """用当前配置重建插件实例，丢弃连接和缓存等实例状态，不改变插件状态"""
+        previous = self.plugin_instances.get(plugin_name)
+        plugin_path = self.plugin_paths.get(plugin_name)
+        if previous is None or plugin_path is None:
+            return
+        try:
+            self.plugin_instances[plugin_name] = self._reconfigure_instance(previous, previous.config, plugin_path)
+        except Exception as e:
+            logger.error(f"重建插件 {plugin_name} 实例失败: {str(e)}")
+            return
+        self._retire(previous)
+
+    @staticmethod
+    def _retire(previous: Any) -> None:
+        """被替换或移除的宿主进程代理在进行中的搜索结束后卸载"""
+        if isinstance(previous, RemotePlugin):
+            previous.retire()
+
+    def unload_plugin(self, plugin_name: str) -> None:
+        """移除插件及其搜索记录、缓存结果和健康状态，进行中的搜索不受影响"""
+        self.plugins.pop(plugin_name, None)
+        self._retire(self.plugin_instances.pop(plugin_name, None))
+        self.plugin_paths.pop(plugin_name, None)
+        self.last_request.pop(plugin_name, None)
+        for key in [key for key in self.fallback_results if key[0] == plugin_name]:
+            del self.fallback_results[key]
+        if self.supervisor is not None:
+            self.supervisor.forget(plugin_name)
+
+    def plugin_name_for_path(self, plugin_path: str) -> Optional[str]:
+        """由插件目录查找已加载的插件名称"""
+        plugin_path = os.path.abspath(plugin_path)
+        for name, path in self.plugin_paths.items():
+            if path == plugin_path:
+                return name
+        return None
         
-    async def search(self, plugin_name: str, keyword: str) -> List[Dict[str, Any]]:
+    async def search(self, plugin_name: str, keyword: str) -> List[FeedEntry]:
         """使用指定插件执行搜索"""
         if plugin_name not in self.plugin_instances:
             logger.error(f"插件未找到: {plugin_name}")
             return []
         
+        with tracer.span("plugin.search", plugin=plugin_name):
+            return await self._search(plugin_name, keyword)
+
+    def _hosts(self, plugin_name: str) -> List[str]:
+        plugin = self.plugin_instances.get(plugin_name)
+        urls = getattr(plugin, 'config', {}).get('settings', {}).get('urls', []) if plugin is not None else []
+        return sorted({urlsplit(url).netloc for url in urls if url})
+
+    def _host_breaker(self, plugin_name: str, host: str):
+        """上游主机熔断器；宿主进程中的插件取宿主进程随响应发回的状态"""
+        plugin = self.plugin_instances.get(plugin_name)
+        if isinstance(plugin, RemotePlugin):
+            return plugin.host_breaker(f"host:{host}")
+        return breakers.peek(f"host:{host}")
+
+    def _open_breaker(self, plugin_name: str):
+        """
+        返回拦截本次搜索的熔断器：插件熔断器拒绝，或插件的所有上游主机都处于熔断中
+        """
+        host_breakers = [self._host_breaker(plugin_name, host) for host in self._hosts(plugin_name)]
+        if host_breakers and all(b is not None and b.rejecting for b in host_breakers):
+            CIRCUIT_REJECTIONS.inc(host_breakers[0].name)
+            return host_breakers[0]
+        breaker = breakers.get(f"plugin:{plugin_name}")
+        if breaker is not None and not breaker.allow():
+            return breaker
+        return None
+
+    def _remember(self, plugin_name: str, keyword: str, results: List[FeedEntry]) -> None:
+        if plugin_name not in self.plugins:
+            return  # 搜索期间插件已被移除
+        key = (plugin_name, keyword.lower())
+        self.fallback_results[key] = results
+        self.fallback_results.move_to_end(key)
+        while len(self.fallback_results) > self.fallback_size:
+            self.fallback_results.popitem(last=False)
+
+    async def _search(self, plugin_name: str, keyword: str) -> List[FeedEntry]:
+        """
+        执行搜索；熔断器拦截时不调用插件，抛出带缓存结果的 CircuitOpenError。
+        插件超过 plugins.timeout_per_plugin 未返回或抛出异常时计为插件失败。
+        """
+        open_breaker = self._open_breaker(plugin_name)
+        if open_breaker is not None:
+            raise CircuitOpenError(open_breaker, self.fallback_results.get((plugin_name, keyword.lower())))
+        breaker = breakers.get(f"plugin:{plugin_name}")
+
+        started = time.perf_counter()
+        self.last_request[plugin_name] = time.time()
         try:
-            logger.info(f"使用插件 {plugin_name} 搜索关键词: {keyword}")
+            logger.debug("使用插件 {} 搜索关键词: {}", plugin_name, keyword)
             plugin = self.plugin_instances[plugin_name]
-            results = await plugin.search(keyword)
+            results = await asyncio.wait_for(plugin.search(keyword), self.timeout_per_plugin)
             
-            # 确保每个结果都包含必需的字段
+            # FeedEntry 直接传递引用；兼容返回字典的插件，缺少必需字段的结果被丢弃
             validated_results = []
             for result in results:
-                if isinstance(result, dict) and 'platform' in result and 'content' in result:
-                    validated_results.append({
-                        'platform': result['platform'],
-                        'content': result['content'],
-                        'url': result.get('url'),
-                        'metadata': result.get('metadata', {})
-                    })
-                    logger.info(f"找到有效结果: {result['platform']}")
+                if isinstance(result, FeedEntry):
+                    validated_results.append(result)
+                elif isinstance(result, dict) and 'platform' in result and 'content' in result:
+                    validated_results.append(FeedEntry.from_dict(result))
                 else:
-                    logger.warning(f"插件 {plugin_name} 返回无效结果格式: {result}")
+                    if log_sample("plugin_manager.invalid_result"):
+                        logger.warning("插件 {} 返回无效结果格式: {!r:.200}", plugin_name, result)
             
-            logger.info(f"插件 {plugin_name} 返回 {len(validated_results)} 条有效结果")
+            logger.debug("插件 {} 返回 {} 条有效结果", plugin_name, len(validated_results))
+            PLUGIN_RESULTS.inc(plugin_name, amount=len(validated_results))
+            if breaker is not None:
+                breaker.record_success()
+                if validated_results:
+                    # 插件内部吞掉上游错误时返回空列表，空结果不覆盖缓存
+                    self._remember(plugin_name, keyword, validated_results)
             return validated_results
             
+        except asyncio.CancelledError:
+            if breaker is not None:
+                breaker.release()
+            raise
         except Exception as e:
-            logger.error(f"插件 {plugin_name} 搜索出错: {str(e)}")
+            message = f"超过 {self.timeout_per_plugin}s 未返回" if isinstance(e, asyncio.TimeoutError) else str(e)
+            logger.error(f"插件 {plugin_name} 搜索出错: {message}")
+            PLUGIN_ERRORS.inc(plugin_name)
+            if breaker is not None:
+                breaker.record_failure()
             return []
+        finally:
+            PLUGIN_SEARCH_SECONDS.observe(plugin_name, value=time.perf_counter() - started)
         
+    async def feed_versions(self) -> Dict[str, Optional[int]]:
+        """
+        以条件请求刷新运行中插件的 feed，返回 插件名 -> feed 版本
+
+        不提供 refresh_feeds 的插件或刷新失败的插件版本为 None。
+        """
+        return await self._call_running('refresh_feeds')
+
+    async def poll_entries(self) -> Dict[str, List[Tuple[FeedEntry, str]]]:
+        """
+        轮询运行中插件的新条目，返回 插件名 -> [(条目, 小写检索文本)]
+
+        不提供 poll_entries 的插件和轮询失败的插件不在结果中。
+        """
+        entries = await self._call_running('poll_entries')
+        return {name: fresh for name, fresh in entries.items() if fresh}
+
+    def supports_polling(self) -> bool:
+        """是否有运行中的插件提供 poll_entries"""
+        return any(
+            info.status == 'running' and getattr(self.plugin_instances.get(name), 'poll_entries', None) is not None
+            for name, info in self.plugins.items()
+        )
+
+    async def corpus_stats(self, keyword: str) -> Optional[CorpusStats]:
+        """
+        汇总运行中插件的语料统计，供 BM25 计算 IDF 和平均文档长度
+
+        宿主进程中的插件由宿主进程统计，每个插件不超过 timeout_per_plugin；
+        尚未导入的延迟加载插件不提供统计；没有任何插件提供时返回 None。
+        """
+        terms = query_terms(keyword)
+
+        async def stats(name: str, instance: Any) -> Optional[Tuple[int, int, Dict[str, int]]]:
+            try:
+                if isinstance(instance, RemotePlugin):
+                    return await asyncio.wait_for(instance.corpus_stats(terms), self.timeout_per_plugin)
+                return instance.corpus_stats(terms)
+            except Exception as e:
+                logger.warning(f"插件 {name} 语料统计失败: {str(e)}")
+                return None
+
+        calls = []
+        for name, info in self.plugins.items():
+            instance = self.plugin_instances.get(name)
+            if isinstance(instance, LazyPlugin):
+                instance = instance.instance
+            if info.status == 'running' and isinstance(instance, (PluginBase, RemotePlugin)):
+                calls.append(stats(name, instance))
+        corpus = CorpusStats()
+        for result in await asyncio.gather(*calls):
+            if result is not None:
+                corpus.add(*result)
+        return corpus if corpus.documents else None
+
+    async def _call_running(self, method: str) -> Dict[str, Any]:
+        """并发调用运行中插件实例的无参方法，每个插件不超过 timeout_per_plugin；不支持或失败时结果为 None"""
+        names = [name for name, info in self.plugins.items() if info.status == 'running']
+
+        async def call(name: str) -> Any:
+            function = getattr(self.plugin_instances.get(name), method, None)
+            if function is None:
+                return None
+            try:
+                return await asyncio.wait_for(function(), self.timeout_per_plugin)
+            except Exception as e:
+                logger.warning(f"插件 {name} 调用 {method} 失败: {str(e)}")
+                return None
+
+        results = await asyncio.gather(*(call(name) for name in names))
+        return dict(zip(names, results))
+
     async def get_active_plugins(self) -> List[PluginInfo]:
         """获取所有已加载的插件"""
-        logger.info(f"当前已加载插件: {list(self.plugins.keys())}")
-        logger.info(f"插件状态: {[(name, info.status) for name, info in self.plugins.items()]}")
-        
         # 返回所有插件，不过滤状态
         active_plugins = list(self.plugins.values())
-        logger.info(f"返回 {len(active_plugins)} 个插件")
+        logger.debug("返回 {} 个插件", len(active_plugins))
         return active_plugins
 
+    async def get_plugin_stats(self, plugin_name: str) -> Dict[str, Any]:
+        """获取插件运行统计"""
+        if plugin_name not in self.plugins:
+            raise ValueError(f"Plugin {plugin_name} not found")
+
+        total_seconds, total_requests = PLUGIN_SEARCH_SECONDS.snapshot(plugin_name) or (0.0, 0)
+        last_request = self.last_request.get(plugin_name)
+        return {
+            "name": plugin_name,
+            "status": self.plugins[plugin_name].status,
+            "requests": total_requests,
+            "total_requests": total_requests,
+            "errors": int(PLUGIN_ERRORS.value(plugin_name)),
+            "results": int(PLUGIN_RESULTS.value(plugin_name)),
+            "avg_latency": round(total_seconds / total_requests, 4) if total_requests else 0.0,
+            "last_request": time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(last_request))
+                            if last_request else "未知",
+            "health": self.supervisor.snapshot(plugin_name) if self.supervisor is not None else None,
+            "circuit": self._circuit_stats(plugin_name)
+        }
+
+    def _circuit_stats(self, plugin_name: str) -> Dict[str, Any]:
+        plugin_breaker = breakers.peek(f"plugin:{plugin_name}")
+        hosts = {}
+        for host in self._hosts(plugin_name):
+            breaker = self._host_breaker(plugin_name, host)
+            hosts[host] = breaker.snapshot() if breaker is not None else {"state": "closed"}
+        return {
+            "plugin": plugin_breaker.snapshot() if plugin_breaker is not None else {"state": "closed"},
+            "hosts": hosts
+        }
+
     async def start_plugin(self, plugin_name: str) -> Dict[str, Any]:
         """启动插件"""
         try:
@@ -0,0 +1,354 @@
+import os
+import asyncio
+import itertools
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from loguru import logger
+from ..models.entry import FeedEntry
+from .circuit_breaker import RemoteBreaker
+from .plugin_protocol import HANDSHAKE_CODEC, available_codecs, get_codec, pack_frame, read_frame
+from .metrics import PLUGIN_HOST_RESTARTS, metrics
+from .tracing import current_trace, tracer
+
+HOST_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "plugin_host.py")
+
+
+class PluginHostError(Exception):
+    """宿主进程调用失败：进程退出、超时或插件抛出异常"""
+    pass
+
+
+class PluginHostProcess:
+    """
+    一个常驻的插件宿主进程
+
+    请求带自增 id，多个请求可同时在途，响应由读取任务按 id 分发给对应的 future。
+    响应中的指标增量合并到主进程的指标，熔断器快照保存在 breakers 中并通知 on_breakers。
+    """
+
+    def __init__(self, python_path: str, codec: str = "msgpack", request_timeout: float = 30,
+                 breaker_config: Optional[Dict[str, Any]] = None,
+                 on_breakers: Optional[Callable[[], None]] = None):
+        self.python_path = python_path
+        self.codec = codec if codec in available_codecs() else "json"
+        self.request_timeout = request_timeout
+        self.breaker_config = breaker_config
+        self.on_breakers = on_breakers
+        self.breakers: Dict[str, RemoteBreaker] = {}  # 宿主进程中上游主机熔断器的最新快照
+        self.process: Optional[asyncio.subprocess.Process] = None
+        self.pending: Dict[int, asyncio.Future] = {}
+        self.loaded: Dict[str, asyncio.Future] = {}  # 插件修订 key -> 加载完成的 future
+        self._ids = itertools.count(1)
+        self._reader_task: Optional[asyncio.Task] = None
+        self._encode = None
+
+    @property
+    def alive(self) -> bool:
+        return self.process is not None and self.process.returncode is None and self._reader_task is not None \
+            and not self._reader_task.done()
+
+    async def start(self) -> None:
+        self.process = await asyncio.create_subprocess_exec(
+            self.python_path, HOST_SCRIPT, "--codec", self.codec,
+            stdin=asyncio.subprocess.PIPE, stdout=asyncio.subprocess.PIPE,
+            cwd=os.getcwd()
+        )
+        _, decode_handshake = get_codec(HANDSHAKE_CODEC)
+        try:
+            handshake = decode_handshake(await asyncio.wait_for(read_frame(self.process.stdout), self.request_timeout))
+        except Exception as e:
+            await self.close()
+            raise PluginHostError(f"Plugin host failed to start: {type(e).__name__}: {e}")
+        # 宿主进程环境中没有 msgpack 时会退回 json，以握手结果为准
+        self.codec = handshake.get("codec", "json")
+        self._encode, decode = get_codec(self.codec)
+        self._reader_task = asyncio.ensure_future(self._read_loop(decode))
+        logger.info(f"Plugin host started (pid {handshake.get('pid')}, codec {self.codec})")
+
+    async def _read_loop(self, decode) -> None:
+        try:
+            while True:
+                message = decode(await read_frame(self.process.stdout))
+                self._absorb(message)
+                future = self.pending.pop(message.get("id"), None)
+                if future is None or future.done():
+                    continue
+                if message.get("ok"):
+                    future.set_result(message)
+                else:
+                    future.set_exception(PluginHostError(message.get("error", "unknown error")))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            if not isinstance(e, asyncio.IncompleteReadError):
+                logger.error(f"Plugin host stream error: {str(e)}")
+        finally:
+            pending, self.pending = self.pending, {}
+            for future in pending.values():
+                if not future.done():
+                    future.set_exception(PluginHostError("Plugin host exited"))
+
+    def _absorb(self, message: Dict[str, Any]) -> None:
+        """合并响应附带的指标增量和熔断器快照，超时已放弃的响应同样合并"""
+        changes = message.get("metrics")
+        if changes:
+            metrics.merge_changes(changes)
+        snapshots = message.get("breakers")
+        if snapshots is not None:
+            self.breakers = {key: RemoteBreaker(key, snapshot) for key, snapshot in snapshots.items()}
+            if self.on_breakers is not None:
+                self.on_breakers()
+
+    async def call(self, op: str, **payload) -> Any:
+        """
+        发送请求并等待结果；调用方处于 trace 中时，宿主进程记录的 span 挂到当前 span 下
+        """
+        if not self.alive:
+            raise PluginHostError("Plugin host is not running")
+        request_id = next(self._ids)
+        future = asyncio.get_running_loop().create_future()
+        self.pending[request_id] = future
+        if current_trace() is not None:
+            payload["trace"] = True
+        self.process.stdin.write(pack_frame(self._encode({"id": request_id, "op": op, **payload})))
+        try:
+            await self.process.stdin.drain()
+            response = await asyncio.wait_for(future, self.request_timeout)
+        except asyncio.TimeoutError:
+            raise PluginHostError(f"Plugin host request timed out after {self.request_timeout}s")
+        finally:
+            self.pending.pop(request_id, None)
+        spans = response.get("spans")
+        if spans:
+            tracer.adopt(spans)
+        return response.get("result")
+
+    async def ensure_loaded(self, key: str, name: str, path: str, config: Dict[str, Any]) -> None:
+        """每个插件修订在每个宿主进程中只加载一次"""
+        loading = self.loaded.get(key)
+        if loading is None:
+            loading = self.loaded[key] = asyncio.ensure_future(
+                self.call("load", key=key, name=name, path=path, config=config,
+                          circuit_breaker=self.breaker_config or {})
+            )
+        try:
+            await asyncio.shield(loading)
+        except Exception:
+            self.loaded.pop(key, None)
+            raise
+
+    async def unload(self, key: str) -> None:
+        """卸载一个插件修订，释放宿主进程中的实例"""
+        if self.loaded.pop(key, None) is not None and self.alive:
+            await self.call("unload", plugin=key)
+
+    async def close(self) -> None:
+        if self._reader_task is not None:
+            self._reader_task.cancel()
+        if self.process is not None and self.process.returncode is None:
+            try:
+                self.process.stdin.close()
+                await asyncio.wait_for(self.process.wait(), 5)
+            except Exception:
+                self.process.kill()
+                await self.process.wait()
+
+
+class PluginHostPool:
+    """
+    同一环境的宿主进程池
+
+    进程预先启动并常驻；请求分配给在途请求最少的进程，退出的进程在下次使用时重建。
+    依赖插件实例状态的请求（feed 版本、新条目轮询、语料统计）固定发给第一个进程，
+    保证每次由同一个实例处理。
+    """
+
+    def __init__(self, env_path: str, python_path: str, size: int, codec: str, request_timeout: float,
+                 breaker_config: Optional[Dict[str, Any]] = None):
+        self.env_path = env_path
+        self.python_path = python_path
+        self.size = max(1, size)
+        self.codec = codec
+        self.request_timeout = request_timeout
+        self.breaker_config = breaker_config
+        self.hosts: List[Optional[PluginHostProcess]] = [None] * self.size
+        self.breakers: Dict[str, RemoteBreaker] = {}  # 各进程中同名熔断器取最严重的状态
+        self._lock = asyncio.Lock()
+
+    async def start(self) -> None:
+        await asyncio.gather(*(self._host(index) for index in range(self.size)))
+
+    async def _host(self, index: int) -> PluginHostProcess:
+        host = self.hosts[index]
+        if host is not None and host.alive:
+            return host
+        async with self._lock:
+            host = self.hosts[index]
+            if host is not None and host.alive:
+                return host
+            if host is not None:
+                PLUGIN_HOST_RESTARTS.inc()
+                logger.warning(f"Restarting plugin host {index} for {self.env_path}")
+                await host.close()
+            host = PluginHostProcess(
+                self.python_path, self.codec, self.request_timeout, self.breaker_config, self._merge_breakers
+            )
+            await host.start()
+            self.hosts[index] = host
+            return host
+
+    def _merge_breakers(self) -> None:
+        merged: Dict[str, RemoteBreaker] = {}
+        for host in self.hosts:
+            if host is None:
+                continue
+            for key, breaker in host.breakers.items():
+                current = merged.get(key)
+                if current is None or breaker.severity > current.severity:
+                    merged[key] = breaker
+        self.breakers = merged
+        for breaker in merged.values():
+            breaker.report()
+
+    async def call(self, key: str, name: str, path: str, config: Dict[str, Any], op: str,
+                   stateful: bool = False, **payload) -> Any:
+        """stateful 为 True 时发给第一个进程，否则发给在途请求最少的进程"""
+        if stateful:
+            index = 0
+        else:
+            index = min(
+                range(self.size),
+                key=lambda i: len(self.hosts[i].pending) if self.hosts[i] is not None and self.hosts[i].alive else -1
+            )
+        host = await self._host(index)
+        await host.ensure_loaded(key, name, path, config)
+        return await host.call(op, plugin=key, **payload)
+
+    async def unload(self, key: str) -> None:
+        """从所有加载过该修订的宿主进程中卸载"""
+        hosts = [host for host in self.hosts if host is not None and key in host.loaded]
+        results = await asyncio.gather(*(host.unload(key) for host in hosts), return_exceptions=True)
+        for result in results:
+            if isinstance(result, Exception):
+                logger.warning(f"Failed to unload {key} from plugin host: {str(result)}")
+
+    async def close(self) -> None:
+        await asyncio.gather(*(host.close() for host in self.hosts if host is not None))
+
+
+class PluginHostManager:
+    """
+    按环境管理宿主进程池
+
+    环境由 EnvironmentManager 构建，依赖相同的插件共用环境和进程池。
+    """
+
+    def __init__(self, environment_manager, config: Dict[str, Any]):
+        self.environment_manager = environment_manager
+        host_config = config.get('plugins', {}).get('host', {}) or {}
+        self.pool_size = host_config.get('pool_size', 2)
+        self.codec = host_config.get('codec', 'msgpack')
+        self.request_timeout = host_config.get('request_timeout', 30)
+        self.extra_dependencies: List[str] = host_config.get('extra_dependencies', ['loguru', 'msgpack'])
+        self.breaker_config = config.get('circuit_breaker', {})
+        self.pools: Dict[str, PluginHostPool] = {}
+        self._pool_futures: Dict[str, asyncio.Future] = {}
+
+    async def get_pool(self, plugin_config: Dict[str, Any]) -> PluginHostPool:
+        environment = dict(plugin_config.get('environment') or {})
+        environment.setdefault('runtime', 'python')
+        environment['dependencies'] = list(environment.get('dependencies', [])) + self.extra_dependencies
+        env_path = await self.environment_manager.setup_environment({**plugin_config, 'environment': environment})
+
+        future = self._pool_futures.get(env_path)
+        if future is None:
+            future = self._pool_futures[env_path] = asyncio.ensure_future(self._start_pool(env_path))
+        try:
+            return await asyncio.shield(future)
+        except Exception:
+            self._pool_futures.pop(env_path, None)
+            raise
+
+    async def _start_pool(self, env_path: str) -> PluginHostPool:
+        pool = PluginHostPool(
+            env_path, self.environment_manager.get_python_path(env_path),
+            self.pool_size, self.codec, self.request_timeout, self.breaker_config
+        )
+        await pool.start()
+        self.pools[env_path] = pool
+        return pool
+
+    async def close(self) -> None:
+        await asyncio.gather(*(pool.close() for pool in self.pools.values()), return_exceptions=True)
+        self.pools.clear()
+        self._pool_futures.clear()
+
+
+class RemotePlugin:
+    """
+    运行在宿主进程中的插件的代理，接口与 PluginBase 一致
+
+    每个代理有独立的修订号，热加载产生的新代理在宿主进程中对应新的插件实例，
+    旧代理上进行中的请求仍由旧实例处理；旧代理被 retire 后，请求全部结束时从宿主进程中卸载旧实例。
+    """
+    _revisions = itertools.count(1)
+
+    def __init__(self, name: str, config: Dict[str, Any], plugin_path: str, manager: PluginHostManager):
+        self.name = name
+        self.config = config
+        self.plugin_path = os.path.abspath(plugin_path)
+        self.manager = manager
+        self.key = f"{name}@{next(self._revisions)}"
+        self._pool: Optional[PluginHostPool] = None  # 已加载本修订的进程池
+        self._inflight = 0
+        self._retired = False
+
+    async def _call(self, op: str, stateful: bool = False, **payload) -> Any:
+        self._inflight += 1
+        try:
+            pool = self._pool = await self.manager.get_pool(self.config)
+            return await pool.call(self.key, self.name, self.plugin_path, self.config, op, stateful, **payload)
+        finally:
+            self._inflight -= 1
+            if self._retired and not self._inflight:
+                self._unload()
+
+    def retire(self) -> None:
+        """代理已被新修订替换或插件已移除，在途请求结束后卸载宿主进程中的实例"""
+        self._retired = True
+        if not self._inflight:
+            self._unload()
+
+    def _unload(self) -> None:
+        pool, self._pool = self._pool, None
+        if pool is not None:
+            asyncio.ensure_future(pool.unload(self.key))
+
+    async def warm_up(self) -> None:
+        """提前构建环境、启动进程池"""
+        await self.manager.get_pool(self.config)
+
+    async def search(self, keyword: str) -> List[Any]:
+        results = await self._call("search", keyword=keyword)
+        return [FeedEntry.from_wire(result) if isinstance(result, list) else result for result in results]
+
+    async def health_check(self) -> bool:
+        try:
+            return bool(await self._call("health_check"))
+        except PluginHostError as e:
+            logger.error(f"Health check failed for {self.name}: {str(e)}")
+            return False
+
+    async def refresh_feeds(self) -> int:
+        return await self._call("refresh_feeds", stateful=True)
+
+    async def poll_entries(self) -> List[Tuple[FeedEntry, str]]:
+        fresh = await self._call("poll_entries", stateful=True)
+        return [(FeedEntry.from_wire(entry), text) for entry, text in fresh]
+
+    async def corpus_stats(self, terms: List[str]) -> Tuple[int, int, Dict[str, int]]:
+        documents, total_length, doc_freq = await self._call("corpus_stats", stateful=True, terms=terms)
+        return documents, total_length, doc_freq
+
+    def host_breaker(self, key: str) -> Optional[RemoteBreaker]:
+        """宿主进程中上游主机熔断器的最新状态，还没有收到过快照时返回 None"""
+        return self._pool.breakers.get(key) if self._pool is not None else None
@@ -0,0 +1,58 @@
+import json
+import struct
+import asyncio
+from typing import Any, Callable, Dict, Tuple
+
+try:
+    import msgpack
+except ImportError:  # msgpack 为可选依赖，缺失时使用 JSON
+    msgpack = None
+
+# 帧格式：4 字节大端长度 + 负载
+HEADER = struct.Struct(">I")
+MAX_FRAME_SIZE = 64 * 1024 * 1024
+
+# 握手帧固定使用 JSON，双方据此确定后续帧的编码
+HANDSHAKE_CODEC = "json"
+
+
+class ProtocolError(Exception):
+    """帧格式或编码错误"""
+    pass
+
+
+def _json_dumps(message: Dict[str, Any]) -> bytes:
+    return json.dumps(message, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def available_codecs() -> Tuple[str, ...]:
+    return ("msgpack", "json") if msgpack is not None else ("json",)
+
+
+def get_codec(name: str) -> Tuple[Callable[[Dict[str, Any]], bytes], Callable[[bytes], Dict[str, Any]]]:
+    """返回 (编码函数, 解码函数)"""
+    if name == "msgpack":
+        if msgpack is None:
+            raise ProtocolError("msgpack is not installed")
+        return (
+            lambda message: msgpack.packb(message, use_bin_type=True),
+            lambda data: msgpack.unpackb(data, raw=False),
+        )
+    if name == "json":
+        return _json_dumps, json.loads
+    raise ProtocolError(f"Unknown codec: {name}")
+
+
+async def read_frame(reader: asyncio.StreamReader) -> bytes:
+    """读取一帧，对端关闭时抛出 asyncio.IncompleteReadError"""
+    header = await reader.readexactly(HEADER.size)
+    (length,) = HEADER.unpack(header)
+    if length > MAX_FRAME_SIZE:
+        raise ProtocolError(f"Frame too large: {length} bytes")
+    return await reader.readexactly(length)
+
+
+def pack_frame(payload: bytes) -> bytes:
+    if len(payload) > MAX_FRAME_SIZE:
+        raise ProtocolError(f"Frame too large: {len(payload)} bytes")
+    return HEADER.pack(len(payload)) + payload
@@ -0,0 +1,115 @@
+import os
+import asyncio
+from typing import Dict, Optional, Tuple
+from loguru import logger
+
+try:
+    import watchfiles
+except ImportError:  # watchfiles 为可选依赖，缺失时轮询文件修改时间
+    watchfiles = None
+
+CONFIG_FILE = "plugin.yaml"
+
+# 插件目录 -> 文件相对路径 -> (mtime_ns, size)
+Snapshot = Dict[str, Dict[str, Tuple[int, int]]]
+
+
+class PluginWatcher:
+    """
+    插件目录监视与热加载
+
+    只重新加载发生变化的插件：仅 plugin.yaml 变化时用新配置重新实例化，
+    代码变化时重新导入模块；新增目录加载，删除目录卸载。
+    安装了 watchfiles 时使用系统文件事件（inotify 等），否则按 interval 轮询。
+    """
+
+    def __init__(self, plugin_manager, plugin_dir: str, interval: float = 1.0):
+        self.plugin_manager = plugin_manager
+        self.plugin_dir = os.path.abspath(plugin_dir)
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+        self._stop: Optional[asyncio.Event] = None
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._stop = asyncio.Event()
+            watch = self._watch_events if watchfiles is not None else self._watch_polling
+            self._task = asyncio.ensure_future(watch())
+            logger.info(f"插件热加载已开启: {self.plugin_dir} ({'watchfiles' if watchfiles else '轮询'})")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._stop.set()
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _watch_events(self) -> None:
+        async for changes in watchfiles.awatch(self.plugin_dir, stop_event=self._stop):
+            changed: Dict[str, bool] = {}
+            for _, path in changes:
+                relative = os.path.relpath(path, self.plugin_dir)
+                parts = relative.split(os.sep)
+                if parts[0].startswith(('.', '__')) or '__pycache__' in parts:
+                    continue
+                plugin_path = os.path.join(self.plugin_dir, parts[0])
+                is_code = len(parts) > 1 and parts[-1] != CONFIG_FILE
+                changed[plugin_path] = changed.get(plugin_path, False) or is_code or len(parts) == 1
+            for plugin_path, reload_code in changed.items():
+                self.apply(plugin_path, reload_code)
+
+    async def _watch_polling(self) -> None:
+        loop = asyncio.get_running_loop()
+        previous = await loop.run_in_executor(None, self._snapshot)
+        while not self._stop.is_set():
+            await asyncio.sleep(self.interval)
+            current = await loop.run_in_executor(None, self._snapshot)
+            for plugin_path in set(previous) | set(current):
+                before, after = previous.get(plugin_path), current.get(plugin_path)
+                if before == after:
+                    continue
+                changed_files = {
+                    name for name in set(before or {}) | set(after or {})
+                    if (before or {}).get(name) != (after or {}).get(name)
+                }
+                self.apply(plugin_path, reload_code=bool(changed_files - {CONFIG_FILE}))
+            previous = current
+
+    def _snapshot(self) -> Snapshot:
+        """记录每个插件目录下源码和配置文件的修改时间与大小"""
+        snapshot: Snapshot = {}
+        try:
+            items = os.listdir(self.plugin_dir)
+        except OSError:
+            return snapshot
+        for item in items:
+            plugin_path = os.path.join(self.plugin_dir, item)
+            if item.startswith(('.', '__')) or not os.path.isdir(plugin_path):
+                continue
+            files = snapshot[plugin_path] = {}
+            for root, dirs, names in os.walk(plugin_path):
+                dirs[:] = [d for d in dirs if d != '__pycache__']
+                for name in names:
+                    if name.endswith('.py') or name == CONFIG_FILE:
+                        path = os.path.join(root, name)
+                        try:
+                            stat = os.stat(path)
+                        except OSError:
+                            continue
+                        files[os.path.relpath(path, plugin_path)] = (stat.st_mtime_ns, stat.st_size)
+        return snapshot
+
+    def apply(self, plugin_path: str, reload_code: bool) -> None:
+        """把一个插件目录的变化应用到插件管理器"""
+        existing = self.plugin_manager.plugin_name_for_path(plugin_path)
+        if not os.path.exists(os.path.join(plugin_path, CONFIG_FILE)):
+            if existing:
+                logger.info(f"插件目录已删除，卸载插件: {existing}")
+                self.plugin_manager.unload_plugin(existing)
+            return
+        name = self.plugin_manager.load_plugin(plugin_path, reload_code=reload_code or existing is None)
+        if name:
+            logger.info(f"插件已热加载: {name} ({'代码' if reload_code else '配置'}变化)")
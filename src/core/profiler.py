@@ -0,0 +1,315 @@
+import asyncio
+import os
+import sys
+import threading
+import time
+from collections import Counter, deque
+from typing import Any, Dict, List, Optional
+from loguru import logger
+from .metrics import LOOP_LAG_SECONDS, LOOP_BLOCKS, LOOP_BLOCKED_SECONDS
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def _frame_label(code) -> str:
+    filename = code.co_filename
+    # 只保留项目内相对路径或库文件名，缩短火焰图标签
+    for marker in ('/site-packages/', '/src/', '/plugins/'):
+        index = filename.rfind(marker)
+        if index >= 0:
+            filename = filename[index + 1:]
+            break
+    else:
+        filename = filename.rsplit('/', 1)[-1]
+    return f"{code.co_name} ({filename}:{code.co_firstlineno})"
+
+
+class SamplingProfiler:
+    """
+    基于 sys._current_frames 的采样式 CPU 分析器
+
+    后台线程按固定间隔抓取目标线程的调用栈并按栈计数，
+    输出 flamegraph.pl / speedscope 可直接读取的折叠栈格式。
+    """
+
+    def __init__(self, interval: float = 0.005, max_depth: int = 128):
+        self.interval = interval
+        self.max_depth = max_depth
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self.started_at: Optional[float] = None
+        self.stopped_at: Optional[float] = None
+        self._target: Optional[int] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, thread_id: Optional[int] = None, duration: Optional[float] = None,
+              interval: Optional[float] = None) -> bool:
+        """
+        开始采样，thread_id 为空时采样除自身外的所有线程；已在运行时返回 False
+        """
+        if self.running:
+            return False
+        if interval:
+            self.interval = interval
+        self.stacks = Counter()
+        self.samples = 0
+        self._target = thread_id
+        self._stop.clear()
+        self.started_at = time.time()
+        self.stopped_at = None
+        self._thread = threading.Thread(
+            target=self._run, args=(duration,), name="sampling-profiler", daemon=True
+        )
+        self._thread.start()
+        logger.info(f"采样分析已开始，间隔 {self.interval * 1000:.1f}ms")
+        return True
+
+    def stop(self) -> Dict[str, Any]:
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+        return self.summary()
+
+    def _run(self, duration: Optional[float]) -> None:
+        own = threading.get_ident()
+        deadline = time.monotonic() + duration if duration else None
+        names = {}
+        while not self._stop.wait(self.interval):
+            if deadline is not None and time.monotonic() >= deadline:
+                break
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own or (self._target is not None and thread_id != self._target):
+                    continue
+                stack: List[str] = []
+                while frame is not None and len(stack) < self.max_depth:
+                    stack.append(_frame_label(frame.f_code))
+                    frame = frame.f_back
+                if thread_id not in names:
+                    names.update((thread.ident, thread.name) for thread in threading.enumerate())
+                stack.append(names.get(thread_id, str(thread_id)))
+                stack.reverse()
+                self.stacks[';'.join(stack)] += 1
+            self.samples += 1
+        self.stopped_at = time.time()
+
+    def collapsed(self) -> str:
+        """折叠栈文本，每行 "栈帧;栈帧;... 次数" """
+        return ''.join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def top_functions(self, limit: int = 20) -> List[Dict[str, Any]]:
+        """按栈顶（自身耗时）统计最热的函数"""
+        leaves: Counter = Counter()
+        for stack, count in self.stacks.items():
+            leaves[stack.rsplit(';', 1)[-1]] += count
+        total = sum(leaves.values()) or 1
+        return [
+            {"function": name, "samples": count, "ratio": round(count / total, 4)}
+            for name, count in leaves.most_common(limit)
+        ]
+
+    def summary(self) -> Dict[str, Any]:
+        end = self.stopped_at or time.time()
+        return {
+            "running": self.running,
+            "samples": self.samples,
+            "interval": self.interval,
+            "duration": round(end - self.started_at, 3) if self.started_at else 0.0,
+            "distinct_stacks": len(self.stacks),
+        }
+
+
+class LoopLagMonitor:
+    """
+    事件循环延迟监测
+
+    周期性 sleep(interval)，实际唤醒时间超出 interval 的部分即为调度延迟，
+    反映同一时间段内有回调阻塞了事件循环。
+    """
+
+    def __init__(self, interval: float = 0.1, window: int = 600):
+        self.interval = interval
+        self.recent: deque = deque(maxlen=window)
+        self.max_lag = 0.0
+        self.samples = 0
+        self.last_beat = time.monotonic()
+        self.last_lag = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, loop.time() - started - self.interval)
+            LOOP_LAG_SECONDS.observe(value=lag)
+            self.recent.append(lag)
+            self.last_lag = lag
+            self.last_beat = time.monotonic()
+            self.samples += 1
+            if lag > self.max_lag:
+                self.max_lag = lag
+
+    def reset(self) -> None:
+        self.recent.clear()
+        self.max_lag = 0.0
+        self.samples = 0
+
+    def snapshot(self) -> Dict[str, Any]:
+        ordered = sorted(self.recent)
+
+        def pct(value: float) -> float:
+            if not ordered:
+                return 0.0
+            return round(ordered[min(len(ordered) - 1, int(value * len(ordered)))] * 1000, 3)
+
+        return {
+            "interval_ms": self.interval * 1000,
+            "samples": self.samples,
+            "max_ms": round(self.max_lag * 1000, 3),
+            "p50_ms": pct(0.5),
+            "p95_ms": pct(0.95),
+            "p99_ms": pct(0.99),
+            "last_ms": round(self.recent[-1] * 1000, 3) if self.recent else 0.0,
+        }
+
+
+def _is_project_frame(filename: str) -> bool:
+    if 'site-packages' in filename:
+        return False
+    return filename.startswith(PROJECT_ROOT) or '/plugins/' in filename
+
+
+class BlockingWatchdog:
+    """
+    事件循环阻塞检测
+
+    后台线程检查 LoopLagMonitor 的心跳，心跳超过阈值未更新时说明有回调正在阻塞事件循环，
+    此时抓取事件循环线程的调用栈；心跳恢复后按阻塞位置累计次数和时长。
+    阻塞位置取栈中最内层的项目代码帧，即调用了阻塞操作的那一行所在函数。
+    记录交回事件循环线程执行，offenders 和指标只在事件循环线程中读写。
+    """
+
+    def __init__(self, monitor: LoopLagMonitor, threshold: float = 0.1, max_offenders: int = 100):
+        self.monitor = monitor
+        self.threshold = threshold
+        self.max_offenders = max_offenders
+        self.offenders: Dict[str, Dict[str, Any]] = {}
+        self.stalls = 0
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread: Optional[int] = None
+        self._pending: Optional[Dict[str, Any]] = None
+
+    def start(self) -> None:
+        """在事件循环线程中调用"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread = threading.get_ident()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="loop-watchdog", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+
+    def _run(self) -> None:
+        check_interval = max(0.005, min(self.threshold, self.monitor.interval) / 2)
+        while not self._stop.wait(check_interval):
+            beat = self.monitor.samples
+            blocked = time.monotonic() - self.monitor.last_beat - self.monitor.interval
+            pending = self._pending
+            if pending is not None:
+                if beat != pending['beat']:
+                    # 心跳已恢复，以心跳测得的延迟和观察到的最长阻塞中较大者为准
+                    self._pending = None
+                    try:
+                        self._loop.call_soon_threadsafe(
+                            self._record, pending, max(pending['blocked'], self.monitor.last_lag))
+                    except RuntimeError:
+                        return  # 事件循环已关闭
+                else:
+                    pending['blocked'] = max(pending['blocked'], blocked)
+                continue
+            if blocked > self.threshold:
+                frame = sys._current_frames().get(self._loop_thread)
+                if frame is not None:
+                    self._pending = {'beat': beat, 'blocked': blocked, 'stack': self._stack(frame)}
+
+    @staticmethod
+    def _stack(frame) -> List[tuple]:
+        stack = []
+        while frame is not None:
+            stack.append((_frame_label(frame.f_code), frame.f_code.co_filename, frame.f_lineno))
+            frame = frame.f_back
+        return stack
+
+    def _record(self, pending: Dict[str, Any], blocked: float) -> None:
+        stack = pending['stack']
+        if not stack:
+            return
+        culprit = next((item for item in stack if _is_project_frame(item[1])), stack[0])
+        # 位置不含行号，指标标签数以项目内的函数数为上限
+        location = f"{culprit[0].rsplit(' (', 1)[0]} ({culprit[1].rsplit('/', 1)[-1]})"
+        self.stalls += 1
+        LOOP_BLOCKS.inc(location)
+        LOOP_BLOCKED_SECONDS.inc(location, amount=blocked)
+
+        offender = self.offenders.get(location)
+        if offender is None:
+            if len(self.offenders) >= self.max_offenders:
+                # 淘汰累计时长最短的位置
+                weakest = min(self.offenders, key=lambda key: self.offenders[key]['total_seconds'])
+                del self.offenders[weakest]
+            offender = self.offenders[location] = {
+                'location': location, 'count': 0, 'total_seconds': 0.0, 'max_seconds': 0.0,
+            }
+        offender['count'] += 1
+        offender['total_seconds'] += blocked
+        offender['last_seen'] = time.time()
+        if blocked >= offender['max_seconds']:
+            offender['max_seconds'] = blocked
+            offender['line'] = culprit[2]
+            offender['blocking_call'] = stack[0][0]
+            offender['stack'] = [item[0] for item in reversed(stack)]
+        logger.warning(f"事件循环被阻塞 {blocked * 1000:.0f}ms: {location}:{culprit[2]} -> {stack[0][0]}")
+
+    def worst(self, limit: int = 20) -> List[Dict[str, Any]]:
+        """按累计阻塞时长排序的阻塞位置"""
+        offenders = sorted(self.offenders.values(), key=lambda item: item['total_seconds'], reverse=True)
+        return [
+            {**item, 'total_seconds': round(item['total_seconds'], 4), 'max_seconds': round(item['max_seconds'], 4)}
+            for item in offenders[:limit]
+        ]
+
+    def reset(self) -> None:
+        self.offenders.clear()
+        self.stalls = 0
+
+
+profiler = SamplingProfiler()
+loop_lag = LoopLagMonitor()
+watchdog = BlockingWatchdog(loop_lag)
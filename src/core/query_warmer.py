@@ -0,0 +1,140 @@
+import heapq
+import time
+import asyncio
+from typing import Any, Dict, List, Optional
+from loguru import logger
+from .metrics import WARM_KEYWORDS, WARM_REBUILDS
+from .result_cache import RankedResultSet
+from .scheduler import BACKGROUND, SchedulerOverloaded
+
+
+class WarmResult:
+    """一个热门关键词预先计算的结果集"""
+    __slots__ = ('result_set', 'error', 'versions', 'built_at')
+
+    def __init__(self, result_set: RankedResultSet, error: Optional[str], versions: Dict[str, Optional[int]]):
+        self.result_set = result_set
+        self.error = error
+        self.versions = versions
+        self.built_at = time.monotonic()
+
+
+class QueryWarmer:
+    """
+    热门关键词结果预热
+
+    按查询日志统计关键词频次（每轮刷新按 decay 衰减），频次最高的 top_k 个关键词在后台预先完成搜索；
+    这些关键词的请求直接读取预先计算的结果集，不再向插件扇出。
+    每隔 interval 秒以条件请求刷新各插件的 feed，插件的 feed 版本变化时重算，
+    无法获得版本的插件（刷新失败）在结果超过 max_age 秒后重算。
+    """
+
+    def __init__(self, coordinator, config: Dict[str, Any]):
+        self.coordinator = coordinator
+        self.enabled = config.get('enabled', True)
+        self.top_k = config.get('top_k', 32)
+        self.min_count = config.get('min_count', 3)
+        self.interval = config.get('interval', 30)
+        self.max_age = config.get('max_age', 600)
+        self.decay = config.get('decay', 0.9)
+        self.max_tracked = config.get('max_tracked', 10000)
+        self.counts: Dict[str, float] = {}
+        self.warm: Dict[str, WarmResult] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self.enabled and self.interval and (self._task is None or self._task.done()):
+            self._task = asyncio.ensure_future(self._run())
+            logger.info(f"热门关键词预热已开启，top_k={self.top_k}，间隔 {self.interval}s")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.error(f"关键词预热出错: {str(e)}")
+
+    def record(self, keyword: str) -> None:
+        """记录一次查询"""
+        if not self.enabled:
+            return
+        self.counts[keyword] = self.counts.get(keyword, 0.0) + 1
+        if len(self.counts) > 2 * self.max_tracked:
+            self._prune()
+
+    def get(self, keyword: str) -> Optional[WarmResult]:
+        return self.warm.get(keyword) if self.enabled else None
+
+    def top(self) -> List[str]:
+        """频次不低于 min_count 的前 top_k 个关键词"""
+        ranked = heapq.nlargest(self.top_k, self.counts.items(), key=lambda item: item[1])
+        return [keyword for keyword, count in ranked if count >= self.min_count]
+
+    def _prune(self) -> None:
+        kept = heapq.nlargest(self.max_tracked, self.counts.items(), key=lambda item: item[1])
+        self.counts = {keyword: count for keyword, count in kept if count >= 0.5}
+
+    async def refresh(self) -> None:
+        """刷新 feed，重算 feed 已变化或过期的热门关键词，移除不再热门的关键词"""
+        top = self.top()
+        for keyword in list(self.warm):
+            if keyword not in top:
+                del self.warm[keyword]
+        if top:
+            versions = await self.coordinator.plugin_manager.feed_versions()
+            now = time.monotonic()
+            rebuilt = 0
+            for keyword in top:
+                current = self.warm.get(keyword)
+                if current is None or not self._fresh(current, versions, now):
+                    try:
+                        await self.build(keyword, versions)
+                    except SchedulerOverloaded as e:
+                        logger.info(f"搜索队列繁忙，推迟预热: {str(e)}")
+                        break
+                    rebuilt += 1
+            if rebuilt:
+                logger.info("预热关键词 {} 个，本轮重算 {} 个", len(top), rebuilt)
+        WARM_KEYWORDS.set(value=len(self.warm))
+
+        for keyword in self.counts:
+            self.counts[keyword] *= self.decay
+        self._prune()
+
+    def _fresh(self, current: WarmResult, versions: Dict[str, Optional[int]], now: float) -> bool:
+        if current.versions != versions:
+            return False
+        return None not in versions.values() or now - current.built_at < self.max_age
+
+    async def build(self, keyword: str, versions: Dict[str, Optional[int]]) -> None:
+        """以 background 优先级重算，不与交互请求争抢名额"""
+        async with self.coordinator.scheduler.slot(BACKGROUND, "warmer"):
+            result_set, errors = await self.coordinator.collect(keyword)
+        self.warm[keyword] = WarmResult(result_set, "; ".join(errors) if errors else None, versions)
+        WARM_REBUILDS.inc()
+
+    def snapshot(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        return {
+            "enabled": self.enabled,
+            "tracked": len(self.counts),
+            "warm": [
+                {
+                    "keyword": keyword,
+                    "count": round(self.counts.get(keyword, 0.0), 2),
+                    "results": warm.result_set.total,
+                    "age": round(now - warm.built_at, 1),
+                }
+                for keyword, warm in self.warm.items()
+            ],
+        }
@@ -0,0 +1,191 @@
+import heapq
+import math
+import time
+from datetime import datetime
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# 插件回填 published 时使用的格式
+_FALLBACK_TIME_FORMATS = ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d")
+
+
+def parse_published(value: Any) -> Optional[float]:
+    """
+    将 metadata.published 解析为时间戳，支持 RFC 822、ISO 8601 和插件默认格式
+    """
+    if value is None or value == '':
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    text = str(value).strip()
+    try:
+        return parsedate_to_datetime(text).timestamp()
+    except (TypeError, ValueError, IndexError):
+        pass
+    try:
+        return datetime.fromisoformat(text.replace('Z', '+00:00')).timestamp()
+    except ValueError:
+        pass
+    for fmt in _FALLBACK_TIME_FORMATS:
+        try:
+            return datetime.strptime(text, fmt).timestamp()
+        except ValueError:
+            continue
+    return None
+
+
+def query_terms(keyword: str) -> List[str]:
+    """查询词：关键词按空白切分后的小写片段"""
+    return [term for term in keyword.lower().split() if term]
+
+
+class CorpusStats:
+    """
+    插件侧的语料统计，汇总各插件最近一次获取的全部 feed 条目
+
+    插件按整个关键词匹配，结果中的每条都包含全部查询词，只用结果集统计时 IDF 近似为常数，
+    因此文档数、平均长度和文档频率取自插件的全量条目。
+    """
+    __slots__ = ('documents', 'total_length', 'doc_freq')
+
+    def __init__(self):
+        self.documents = 0
+        self.total_length = 0
+        self.doc_freq: Dict[str, int] = {}
+
+    def add(self, documents: int, total_length: int, doc_freq: Dict[str, int]) -> None:
+        self.documents += documents
+        self.total_length += total_length
+        for term, df in doc_freq.items():
+            self.doc_freq[term] = self.doc_freq.get(term, 0) + df
+
+
+class BM25Ranker:
+    """
+    BM25 相关度与时效衰减混合打分
+
+    每个结果的词频和长度在入库时记录。文档数、平均长度和查询词文档频率优先使用
+    set_corpus 提供的插件语料统计，没有时退回到本次结果的统计（在结果入库时增量更新）。
+    词频按查询词在小写文本中的出现次数统计，插件本身也是按子串匹配，
+    这样中文无需分词即可打分。标题词频按 title_weight 加权。
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75, title_weight: float = 2.0,
+                 recency_weight: float = 0.3, half_life_hours: float = 72.0):
+        self.k1 = k1
+        self.b = b
+        self.title_weight = title_weight
+        self.recency_weight = recency_weight
+        self.half_life = half_life_hours * 3600
+        self.terms: List[str] = []
+        self.doc_count = 0
+        self.total_length = 0
+        self.doc_freq: Dict[str, int] = {}
+        self.corpus: Optional[CorpusStats] = None
+        # id(结果) -> (各查询词加权词频, 文档长度, 发布时间戳)
+        self._docs: Dict[int, Tuple[List[float], int, Optional[float]]] = {}
+
+    def set_query(self, keyword: str) -> None:
+        terms = query_terms(keyword)
+        if terms != self.terms:
+            self.clear()
+            self.terms = terms
+
+    def set_corpus(self, corpus: Optional[CorpusStats]) -> None:
+        self.corpus = corpus
+
+    def add_document(self, result: Any, title: str, content: str, published: Any = None) -> None:
+        """
+        入库时记录文档统计
+        """
+        title_lower = (title or '').lower()
+        content_lower = (content or '').lower()
+        frequencies = []
+        for term in self.terms:
+            tf = title_lower.count(term) * self.title_weight + content_lower.count(term)
+            frequencies.append(tf)
+            if tf:
+                self.doc_freq[term] = self.doc_freq.get(term, 0) + 1
+        length = len(title_lower) + len(content_lower)
+        self.doc_count += 1
+        self.total_length += length
+        self._docs[id(result)] = (frequencies, length, parse_published(published))
+
+    def forget(self, result: Any) -> None:
+        """
+        移除被丢弃文档的统计
+        """
+        doc = self._docs.pop(id(result), None)
+        if doc is None:
+            return
+        frequencies, length, _ = doc
+        for term, tf in zip(self.terms, frequencies):
+            if tf:
+                self.doc_freq[term] -= 1
+        self.doc_count -= 1
+        self.total_length -= length
+
+    def _statistics(self) -> Tuple[int, float, Dict[str, int]]:
+        """打分使用的 (文档数, 平均长度, 文档频率)"""
+        corpus = self.corpus
+        if corpus is None or not corpus.documents:
+            return self.doc_count, max(self.total_length / self.doc_count, 1.0), self.doc_freq
+        # 不经基类获取 feed 的插件的结果不在语料中，文档数和文档频率不低于本次结果的统计
+        doc_freq = {term: max(corpus.doc_freq.get(term, 0), self.doc_freq.get(term, 0)) for term in self.terms}
+        return max(corpus.documents, self.doc_count), max(corpus.total_length / corpus.documents, 1.0), doc_freq
+
+    def _bm25(self, frequencies: List[float], length: int, doc_count: int, avg_length: float,
+              doc_freq: Dict[str, int]) -> float:
+        score = 0.0
+        for term, tf in zip(self.terms, frequencies):
+            if not tf:
+                continue
+            df = doc_freq.get(term, 0)
+            idf = math.log(1 + (doc_count - df + 0.5) / (df + 0.5))
+            norm = self.k1 * (1 - self.b + self.b * length / avg_length)
+            score += idf * tf * (self.k1 + 1) / (tf + norm)
+        return score
+
+    def _recency(self, published: Optional[float], now: float) -> float:
+        if published is None:
+            return 0.0
+        age = max(0.0, now - published)
+        return math.exp(-math.log(2) * age / self.half_life)
+
+    def score_all(self, results: Iterable[Any]) -> List[Tuple[float, Any]]:
+        """
+        计算每个结果的混合得分，BM25 部分按本批最高分归一化
+        """
+        if not self.doc_count:
+            return [(0.0, result) for result in results]
+        doc_count, avg_length, doc_freq = self._statistics()
+        now = time.time()
+        raw = []
+        max_bm25 = 0.0
+        for result in results:
+            frequencies, length, published = self._docs.get(id(result), ([], 0, None))
+            bm25 = self._bm25(frequencies, length, doc_count, avg_length, doc_freq)
+            max_bm25 = max(max_bm25, bm25)
+            raw.append((bm25, self._recency(published, now), result))
+
+        relevance_weight = 1 - self.recency_weight
+        scored = []
+        for bm25, recency, result in raw:
+            relevance = bm25 / max_bm25 if max_bm25 else 0.0
+            scored.append((relevance_weight * relevance + self.recency_weight * recency, result))
+        return scored
+
+    def top_k(self, results: Iterable[Any], k: Optional[int] = None) -> List[Tuple[float, Any]]:
+        """
+        返回得分最高的 k 个结果，使用堆选择避免对整个结果集排序
+        """
+        scored = self.score_all(results)
+        if k is None or k >= len(scored):
+            return sorted(scored, key=lambda item: item[0], reverse=True)
+        return heapq.nlargest(k, scored, key=lambda item: item[0])
+
+    def clear(self) -> None:
+        self.doc_count = 0
+        self.total_length = 0
+        self.doc_freq.clear()
+        self._docs.clear()
@@ -2,9 +2,11 @@ import asyncio
 import time
 from typing import Dict, Optional
 from loguru import logger
+from .metrics import RATE_LIMIT_WAIT_SECONDS
 
 class RateLimiter:
-    def __init__(self, requests_per_minute: int, burst_size: int, min_interval: float):
+    def __init__(self, requests_per_minute: int, burst_size: int, min_interval: float, name: str = "default"):
+        self.name = name
         self.requests_per_minute = requests_per_minute
         self.burst_size = burst_size
         self.min_interval = min_interval
@@ -19,6 +21,13 @@ class RateLimiter:
         """
         获取一个请求令牌，如果没有可用令牌则等待
         """
+        started = time.perf_counter()
+        try:
+            await self._acquire()
+        finally:
+            RATE_LIMIT_WAIT_SECONDS.observe(self.name, value=time.perf_counter() - started)
+
+    async def _acquire(self):
         async with self.lock:
             while True:
                 now = time.time()
@@ -28,20 +37,17 @@ class RateLimiter:
                 running_time = now - self.start_time
                 current_rate = self.total_requests / (running_time / 60)
                 
-                logger.info(
-                    f"Request stats:\n"
-                    f"  Total requests: {self.total_requests}\n"
-                    f"  Running time: {running_time:.2f} seconds\n"
-                    f"  Current rate: {current_rate:.2f} requests/minute\n"
-                    f"  Available tokens: {self.tokens}\n"
-                    f"  Time since last request: {now - self.last_request:.2f} seconds"
+                logger.debug(
+                    "Request stats: limiter={} total={} running={:.2f}s rate={:.2f}/min tokens={} since_last={:.2f}s",
+                    self.name, self.total_requests, running_time, current_rate,
+                    self.tokens, now - self.last_request
                 )
 
                 # 计算需要等待的时间
                 time_since_last_request = now - self.last_request
                 if time_since_last_request < self.min_interval:
                     wait_time = self.min_interval - time_since_last_request
-                    logger.warning(f"Rate limit: waiting {wait_time:.2f} seconds for minimum interval")
+                    logger.debug("Rate limit: {} waiting {:.2f} seconds for minimum interval", self.name, wait_time)
                     await asyncio.sleep(wait_time)
                     continue
 
@@ -58,7 +64,7 @@ class RateLimiter:
                 
                 # 计算等待时间
                 wait_time = 60 / self.requests_per_minute
-                logger.debug(f"Rate limit reached, waiting {wait_time:.2f} seconds")
+                logger.debug("Rate limit reached: {} waiting {:.2f} seconds", self.name, wait_time)
                 await asyncio.sleep(wait_time)
 
 class RateLimiterManager:
@@ -102,6 +108,7 @@ class RateLimiterManager:
             self.limiters[plugin_name] = RateLimiter(
                 requests_per_minute=config['requests_per_minute'],
                 burst_size=config['burst_size'],
-                min_interval=config['min_interval']
+                min_interval=config['min_interval'],
+                name=plugin_name
             )
         return self.limiters[plugin_name] 
\ No newline at end of file
@@ -1,79 +1,87 @@
-from typing import List, Dict, Any
-import re
+import asyncio
+import heapq
+from typing import List, Dict, Any, Optional, Tuple, Union
 from loguru import logger
-from ..models.schemas import SearchResult
+from ..models.entry import FeedEntry, SearchHit
+from .aggregation_stages import AggregationStage, build_default_stages
+from .ranker import CorpusStats
 
 class ResultAggregator:
-    def __init__(self):
-        self.results: List[SearchResult] = []
+    """
+    单个搜索请求的结果聚合流水线
 
-    async def add_result(self, platform: str, raw_result: Dict[str, Any], keyword: str):
+    每个请求创建独立实例，插件结果按批次流入，依次经过各个阶段处理，
+    请求之间不共享任何状态。
+    """
+
+    # 每处理这么多条结果让出一次事件循环，避免大批次阻塞其他请求
+    YIELD_EVERY = 200
+
+    def __init__(self, keyword: str, config: Optional[Dict[str, Any]] = None,
+                 stages: Optional[List[AggregationStage]] = None):
+        self.keyword = keyword
+        self.stages = stages if stages is not None else build_default_stages(config)
+        # 以 id 为键保存当前保留的结果，便于阶段按需丢弃
+        self.results: Dict[int, SearchHit] = {}
+        # 插件语料统计，扇出结束后由调用方设置，供打分阶段使用
+        self.corpus: Optional[CorpusStats] = None
+        for stage in self.stages:
+            stage.bind(self)
+
+    async def add_result(self, entry: FeedEntry):
         """
-        添加并处理搜索结果
+        添加并处理一条插件结果，条目本身不被修改
         """
         try:
-            # 提取相关内容
-            processed_content = self._extract_relevant_content(raw_result.get('content', ''), keyword)
-            
-            if processed_content:
-                result = SearchResult(
-                    platform=platform,
-                    content=processed_content,
-                    url=raw_result.get('url'),
-                    metadata=raw_result.get('metadata', {})
-                )
-                self.results.append(result)
-                
+            result = SearchHit(entry)
+            self.results[id(result)] = result
+
+            for index, stage in enumerate(self.stages):
+                if stage.process(result) is None:
+                    self._drop(result, self.stages[:index])
+                    return
+
         except Exception as e:
-            logger.error(f"Error processing result from {platform}: {str(e)}")
+            logger.error(f"Error processing result from {entry.platform}: {str(e)}")
 
-    def _extract_relevant_content(self, content: str, keyword: str) -> str:
+    def discard(self, result: SearchHit):
         """
-        从内容中提取与关键词相关的部分
+        丢弃一个已保留的结果，并通知所有阶段释放相关状态
         """
-        # 将关键词分词（处理多关键词情况）
-        keywords = keyword.split()
-        
-        # 找到包含关键词的段落
-        paragraphs = content.split('\n')
-        relevant_paragraphs = []
-        
-        for para in paragraphs:
-            if any(keyword.lower() in para.lower() for keyword in keywords):
-                # 提取关键词所在句子及其上下文
-                sentences = re.split('[.!?。！？]', para)
-                for i, sentence in enumerate(sentences):
-                    if any(keyword.lower() in sentence.lower() for keyword in keywords):
-                        # 获取上下文（前后各一句）
-                        start = max(0, i - 1)
-                        end = min(len(sentences), i + 2)
-                        context = ' '.join(sentences[start:end]).strip()
-                        if context and context not in relevant_paragraphs:
-                            relevant_paragraphs.append(context)
-        
-        return '\n'.join(relevant_paragraphs)
+        self._drop(result, self.stages)
+
+    def _drop(self, result: SearchHit, stages: List[AggregationStage]):
+        self.results.pop(id(result), None)
+        for stage in stages:
+            stage.discard(result)
 
-    def get_aggregated_results(self) -> List[SearchResult]:
+    def get_scored_results(self) -> List[Tuple[float, SearchHit]]:
         """
-        获取聚合后的结果
+        结束流水线，返回 (得分, 结果) 列表，顺序不保证
         """
-        # 按平台分组并排序
-        sorted_results = sorted(self.results, key=lambda x: x.platform)
-        return sorted_results
+        scored = [(0.0, result) for result in self.results.values()]
+        for stage in self.stages:
+            scored = stage.finalize(scored)
+        return scored
 
-    def clear_results(self):
+    def get_aggregated_results(self, limit: Optional[int] = None) -> List[SearchHit]:
         """
-        清除所有结果
+        获取按得分排序的结果，指定 limit 时只用堆选出前 limit 条
         """
-        self.results.clear()
+        scored = self.get_scored_results()
+        if limit is None or limit >= len(scored):
+            top = sorted(scored, key=lambda item: item[0], reverse=True)
+        else:
+            top = heapq.nlargest(limit, scored, key=lambda item: item[0])
+        for score, result in top:
+            result.score = round(score, 4)
+        return [result for _, result in top]
 
-    async def process_batch_results(self, batch_results: List[Dict[str, Any]], keyword: str):
+    async def process_batch_results(self, batch_results: List[Union[FeedEntry, Dict[str, Any]]]):
         """
-        批量处理搜索结果
+        批量处理搜索结果，兼容 {platform, content, url, metadata} 字典
         """
-        for result in batch_results:
-            await self.add_result(
-                platform=result.get('platform', 'unknown'),
-                raw_result=result,
-                keyword=keyword
-            ) 
\ No newline at end of file
+        for index, result in enumerate(batch_results, 1):
+            await self.add_result(result if isinstance(result, FeedEntry) else FeedEntry.from_dict(result))
+            if index % self.YIELD_EVERY == 0:
+                await asyncio.sleep(0)
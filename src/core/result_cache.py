@@ -0,0 +1,90 @@
+import base64
+import hashlib
+import heapq
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, List, Optional, Tuple
+
+
+class RankedResultSet:
+    """
+    按得分惰性排序的结果集
+
+    建立时只做一次 O(n) 的堆化，翻页时才从堆中弹出所需的条目，
+    已弹出的部分保存在有序前缀中，可以按任意偏移重复读取。
+    """
+
+    def __init__(self, keyword: str, scored: List[Tuple[float, Any]]):
+        self.keyword = keyword
+        self.total = len(scored)
+        self._heap = [(-score, seq, item) for seq, (score, item) in enumerate(scored)]
+        heapq.heapify(self._heap)
+        self._ordered: List[Tuple[float, Any]] = []
+
+    def page(self, offset: int, limit: int) -> List[Tuple[float, Any]]:
+        end = min(offset + limit, self.total)
+        while len(self._ordered) < end and self._heap:
+            neg_score, _, item = heapq.heappop(self._heap)
+            self._ordered.append((-neg_score, item))
+        return self._ordered[offset:end]
+
+
+class ResultSetCache:
+    """
+    带 TTL 的服务端结果集缓存，后续翻页直接读取，不再重新扇出搜索
+    """
+
+    def __init__(self, ttl: float = 120, max_entries: int = 256):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        # 结果集 id -> (过期时间, 结果集)，插入顺序即过期顺序
+        self._entries: "OrderedDict[str, Tuple[float, RankedResultSet]]" = OrderedDict()
+
+    def put(self, result_set: RankedResultSet) -> str:
+        self._purge()
+        set_id = uuid.uuid4().hex
+        self._entries[set_id] = (time.monotonic() + self.ttl, result_set)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return set_id
+
+    def get(self, set_id: str) -> Optional[RankedResultSet]:
+        self._purge()
+        entry = self._entries.get(set_id)
+        return entry[1] if entry else None
+
+    def _purge(self) -> None:
+        now = time.monotonic()
+        while self._entries:
+            set_id, (expires_at, _) = next(iter(self._entries.items()))
+            if expires_at > now:
+                break
+            del self._entries[set_id]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+def _keyword_digest(keyword: str) -> str:
+    return hashlib.blake2b(keyword.encode('utf-8'), digest_size=6).hexdigest()
+
+
+def encode_cursor(set_id: str, offset: int, keyword: str) -> str:
+    raw = f"{set_id}:{offset}:{_keyword_digest(keyword)}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str, keyword: str) -> Tuple[str, int]:
+    """
+    解析游标，格式错误、偏移为负或与 keyword 不匹配时抛出 ValueError
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        set_id, offset, digest = base64.urlsafe_b64decode(padded.encode()).decode().split(':', 2)
+        offset = int(offset)
+    except Exception:
+        raise ValueError(f"Invalid cursor: {cursor}")
+    if offset < 0 or digest != _keyword_digest(keyword):
+        raise ValueError(f"Invalid cursor: {cursor}")
+    return set_id, offset
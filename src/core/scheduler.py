@@ -0,0 +1,160 @@
+import math
+import time
+import asyncio
+import contextlib
+from collections import OrderedDict, deque
+from typing import Any, AsyncIterator, Deque, Dict, Optional
+from .metrics import SCHEDULER_QUEUED, SCHEDULER_RUNNING, SCHEDULER_WAIT_SECONDS, SCHEDULER_REJECTIONS
+
+INTERACTIVE = "interactive"
+BATCH = "batch"
+BACKGROUND = "background"
+# 按优先级从高到低
+PRIORITIES = (INTERACTIVE, BATCH, BACKGROUND)
+
+_DEFAULT_QUEUE_DEPTH = {INTERACTIVE: 64, BATCH: 32, BACKGROUND: 16}
+
+
+class SchedulerOverloaded(Exception):
+    """队列已满，请求未被接纳；retry_after 为建议的重试等待秒数"""
+
+    def __init__(self, priority: str, retry_after: int):
+        super().__init__(f"{priority} queue is full, retry after {retry_after}s")
+        self.priority = priority
+        self.retry_after = retry_after
+
+
+class SearchScheduler:
+    """
+    搜索扇出的优先级与公平调度
+
+    同时执行的扇出不超过 system.max_concurrent_crawlers 个。空闲名额按优先级
+    interactive > batch > background 分配，同一优先级内按客户端轮转，单个客户端的大量请求不会排在其他客户端前面；
+    max_running 限制低优先级同时占用的名额，为交互请求保留余量。
+    优先级队列或单个客户端的排队数超过上限时直接拒绝，抛出 SchedulerOverloaded（接口返回 429 和 Retry-After）。
+    """
+
+    def __init__(self, config: Dict[str, Any]):
+        scheduling = config.get('search', {}).get('scheduling', {})
+        self.enabled = scheduling.get('enabled', True)
+        self.max_concurrent = config.get('system', {}).get('max_concurrent_crawlers', 10)
+        depths = scheduling.get('queue_depth', {})
+        self.queue_depth = {p: depths.get(p, _DEFAULT_QUEUE_DEPTH[p]) for p in PRIORITIES}
+        limits = scheduling.get('max_running', {})
+        self.max_running = {p: limits.get(p) or self.max_concurrent for p in PRIORITIES}
+        self.max_queued_per_client = scheduling.get('max_queued_per_client', 8)
+        self.default_priority = scheduling.get('default_priority', INTERACTIVE)
+        self.running = {p: 0 for p in PRIORITIES}
+        # 优先级 -> 客户端 -> 等待中的请求，客户端的顺序即轮转顺序
+        self._queues: Dict[str, "OrderedDict[str, Deque[asyncio.Future]]"] = {p: OrderedDict() for p in PRIORITIES}
+        self._queued = {p: 0 for p in PRIORITIES}
+        self._service_seconds = 1.0  # 单次扇出耗时的指数移动平均，用于估算 Retry-After
+
+    def priority(self, value: Optional[str]) -> str:
+        """规范化请求头中的优先级，未知值按 default_priority 处理"""
+        value = (value or '').strip().lower()
+        return value if value in PRIORITIES else self.default_priority
+
+    @contextlib.asynccontextmanager
+    async def slot(self, priority: str = INTERACTIVE, client: str = "anonymous") -> AsyncIterator[None]:
+        """在上下文中占用一个执行名额，排队等待或抛出 SchedulerOverloaded"""
+        if not self.enabled:
+            yield
+            return
+        await self._acquire(priority, client)
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self._service_seconds += 0.1 * (time.monotonic() - started - self._service_seconds)
+            self._release(priority)
+
+    def _runnable(self, priority: str) -> bool:
+        return sum(self.running.values()) < self.max_concurrent and self.running[priority] < self.max_running[priority]
+
+    async def _acquire(self, priority: str, client: str) -> None:
+        if self._runnable(priority) and not any(self._queued[p] for p in PRIORITIES[:PRIORITIES.index(priority) + 1]):
+            self._start(priority)
+            SCHEDULER_WAIT_SECONDS.observe(priority, value=0.0)
+            return
+
+        clients = self._queues[priority]
+        waiters = clients.get(client)
+        if self._queued[priority] >= self.queue_depth[priority] or \
+                (waiters is not None and len(waiters) >= self.max_queued_per_client):
+            SCHEDULER_REJECTIONS.inc(priority)
+            raise SchedulerOverloaded(priority, self.retry_after(priority))
+
+        future = asyncio.get_running_loop().create_future()
+        if waiters is None:
+            waiters = clients[client] = deque()
+        waiters.append(future)
+        self._queued[priority] += 1
+        SCHEDULER_QUEUED.set(priority, value=self._queued[priority])
+        # 更高优先级的队列因 max_running 受限时，本请求可能立即获得名额
+        self._dispatch()
+        started = time.monotonic()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.cancelled():
+                # 排队中被取消（如客户端断开），仍在队列中时移出
+                if future in waiters:
+                    waiters.remove(future)
+                    self._queued[priority] -= 1
+                    SCHEDULER_QUEUED.set(priority, value=self._queued[priority])
+                if not waiters and clients.get(client) is waiters:
+                    del clients[client]
+            else:
+                # 已分配名额但尚未开始执行
+                self._release(priority)
+            raise
+        SCHEDULER_WAIT_SECONDS.observe(priority, value=time.monotonic() - started)
+
+    def _start(self, priority: str) -> None:
+        self.running[priority] += 1
+        SCHEDULER_RUNNING.set(priority, value=self.running[priority])
+
+    def _release(self, priority: str) -> None:
+        self.running[priority] -= 1
+        SCHEDULER_RUNNING.set(priority, value=self.running[priority])
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        """把空闲名额按优先级和客户端轮转分配给排队的请求"""
+        for priority in PRIORITIES:
+            clients = self._queues[priority]
+            while clients and self._runnable(priority):
+                client, waiters = next(iter(clients.items()))
+                future = waiters.popleft()
+                if waiters:
+                    clients.move_to_end(client)
+                else:
+                    del clients[client]
+                self._queued[priority] -= 1
+                SCHEDULER_QUEUED.set(priority, value=self._queued[priority])
+                if future.done():
+                    continue  # 已取消，等待方自行退出
+                self._start(priority)
+                future.set_result(None)
+
+    def retry_after(self, priority: str) -> int:
+        """按排在前面的请求数和平均扇出耗时估算的重试等待秒数"""
+        ahead = sum(self._queued[p] for p in PRIORITIES[:PRIORITIES.index(priority) + 1])
+        return max(1, math.ceil((ahead / self.max_concurrent + 1) * self._service_seconds))
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "max_concurrent": self.max_concurrent,
+            "service_seconds": round(self._service_seconds, 3),
+            "classes": {
+                p: {
+                    "running": self.running[p],
+                    "queued": self._queued[p],
+                    "clients": len(self._queues[p]),
+                    "queue_depth": self.queue_depth[p],
+                    "max_running": self.max_running[p],
+                }
+                for p in PRIORITIES
+            },
+        }
@@ -1,53 +1,68 @@
-from typing import List
+from typing import List, Dict, Any, Optional, Callable, Tuple
 import asyncio
 from loguru import logger
-from ..models.schemas import SearchRequest, SearchResult, SearchResponse
+from ..models.schemas import SearchRequest, SearchResponse
+from .result_aggregator import ResultAggregator
+from .aggregation_stages import AggregationStage
+from .metrics import CACHE_REQUESTS
+from .tracing import tracer
+from .result_cache import RankedResultSet, ResultSetCache, encode_cursor, decode_cursor
+from .circuit_breaker import CircuitOpenError
+from .query_warmer import QueryWarmer
+from .scheduler import SearchScheduler, INTERACTIVE
 
 class SearchCoordinator:
-    def __init__(self, plugin_manager, environment_manager, result_aggregator):
+    def __init__(self, plugin_manager, environment_manager,
+                 stage_factory: Optional[Callable[[], List[AggregationStage]]] = None,
+                 scheduler: Optional[SearchScheduler] = None):
         self.plugin_manager = plugin_manager
         self.environment_manager = environment_manager
-        self.result_aggregator = result_aggregator
-        
-    async def search(self, request: SearchRequest) -> SearchResponse:
+        # 每个请求调用一次，返回新的聚合阶段列表；为空时使用默认流水线
+        self.stage_factory = stage_factory
+        # 扇出前的优先级与公平调度；翻页和预热命中不占用名额
+        self.scheduler = scheduler or SearchScheduler(environment_manager.config)
+
+        search_config = environment_manager.config.get('search', {})
+        self.default_page_size = search_config.get('default_page_size', 50)
+        self.max_page_size = search_config.get('max_page_size', 200)
+        self.result_cache = ResultSetCache(
+            ttl=search_config.get('result_ttl', 120),
+            max_entries=search_config.get('max_cached_result_sets', 256)
+        )
+        self.warmer = QueryWarmer(self, search_config.get('warming', {}))
+
+    async def search(self, request: SearchRequest, priority: str = INTERACTIVE,
+                     client: str = "anonymous") -> SearchResponse:
         """
         协调多个插件执行搜索
+
+        需要扇出时先按 priority 和 client 排队获取执行名额，队列已满时抛出 SchedulerOverloaded
         """
+        if request.cursor:
+            with tracer.span("coordinator.next_page"):
+                return self._next_page(request)
+
+        self.warmer.record(request.keyword)
+        warm = self.warmer.get(request.keyword)
+        CACHE_REQUESTS.inc('warm', 'miss' if warm is None else 'hit')
+        if warm is not None:
+            with tracer.span("coordinator.warm", keyword=request.keyword):
+                return self._build_page(warm.result_set, offset=0, limit=self._page_size(request), error=warm.error)
+
+        async with self.scheduler.slot(priority, client):
+            with tracer.span("coordinator.search", keyword=request.keyword, priority=priority):
+                return await self._search(request)
+
+    async def _search(self, request: SearchRequest) -> SearchResponse:
         try:
-            results = []
-            errors = []
-            
-            # 获取活动的插件
-            plugins = await self.plugin_manager.get_active_plugins()
-            logger.info(f"找到 {len(plugins)} 个插件")
-            
-            # 过滤出运行中的插件
-            active_plugins = [p for p in plugins if p.status == "running"]
-            logger.info(f"其中 {len(active_plugins)} 个插件处于运行状态")
-            
-            for plugin_info in active_plugins:
-                plugin_name = plugin_info.name
-                logger.info(f"使用插件 {plugin_name} 搜索关键词: {request.keyword}")
-                
-                try:
-                    plugin_results = await self.plugin_manager.search(plugin_name, request.keyword)
-                    if plugin_results:
-                        results.extend(plugin_results)
-                        logger.info(f"插件 {plugin_name} 返回 {len(plugin_results)} 条结果")
-                    else:
-                        logger.info(f"插件 {plugin_name} 没有找到结果")
-                    
-                except Exception as e:
-                    error_msg = f"插件 {plugin_name} 搜索失败: {str(e)}"
-                    logger.error(error_msg)
-                    errors.append(error_msg)
-            
-            logger.info(f"搜索完成，共找到 {len(results)} 条结果")
-            return SearchResponse(
-                keyword=request.keyword,
-                results=results,
-                error="; ".join(errors) if errors else None
-            )
+            result_set, errors = await self.collect(request.keyword)
+            with tracer.span("build_response"):
+                return self._build_page(
+                    result_set,
+                    offset=0,
+                    limit=self._page_size(request),
+                    error="; ".join(errors) if errors else None
+                )
         except Exception as e:
             logger.error(f"搜索过程出错: {str(e)}")
             return SearchResponse(
@@ -55,7 +70,103 @@ class SearchCoordinator:
                 results=[],
                 error=str(e)
             )
+
+    async def collect(self, keyword: str) -> Tuple[RankedResultSet, List[str]]:
+        """
+        向运行中的插件扇出搜索并聚合，返回排序结果集和插件错误信息
+        """
+        aggregator = ResultAggregator(
+            keyword,
+            config=self.environment_manager.config,
+            stages=self.stage_factory() if self.stage_factory else None
+        )
+        total_found = 0
+        errors = []
+
+        # 获取活动的插件
+        plugins = await self.plugin_manager.get_active_plugins()
         
+        # 过滤出运行中的插件
+        active_plugins = [p for p in plugins if p.status == "running"]
+        logger.debug("找到 {} 个插件，其中 {} 个处于运行状态", len(plugins), len(active_plugins))
+        
+        for plugin_info in active_plugins:
+            plugin_name = plugin_info.name
+            try:
+                try:
+                    plugin_results = await self.plugin_manager.search(plugin_name, keyword)
+                except CircuitOpenError as e:
+                    # 熔断中的插件立即返回，有缓存结果时使用缓存
+                    errors.append(f"插件 {plugin_name} 已熔断，返回 {len(e.results)} 条缓存结果: {str(e)}")
+                    plugin_results = e.results
+                if plugin_results:
+                    total_found += len(plugin_results)
+                    with tracer.span("aggregate", plugin=plugin_name, results=len(plugin_results)):
+                        await aggregator.process_batch_results(plugin_results)
+                    logger.debug("插件 {} 返回 {} 条结果", plugin_name, len(plugin_results))
+                else:
+                    logger.debug("插件 {} 没有找到结果", plugin_name)
+                
+            except Exception as e:
+                error_msg = f"插件 {plugin_name} 搜索失败: {str(e)}"
+                logger.error(error_msg)
+                errors.append(error_msg)
+        
+        logger.info("搜索 {!r} 完成，共找到 {} 条结果，聚合后保留 {} 条",
+                    keyword, total_found, len(aggregator.results))
+        aggregator.corpus = await self.plugin_manager.corpus_stats(keyword)
+        with tracer.span("rank", results=len(aggregator.results)):
+            result_set = RankedResultSet(keyword, aggregator.get_scored_results())
+        return result_set, errors
+
+    def _page_size(self, request: SearchRequest) -> int:
+        return min(request.limit or self.default_page_size, self.max_page_size)
+
+    def _build_page(self, result_set: RankedResultSet, offset: int, limit: int,
+                    error: Optional[str] = None, set_id: Optional[str] = None) -> SearchResponse:
+        """
+        取出一页结果；还有剩余时缓存结果集并返回 next_cursor
+        """
+        page = []
+        for score, result in result_set.page(offset, limit):
+            result.score = round(score, 4)
+            page.append(result)
+
+        next_cursor = None
+        next_offset = offset + len(page)
+        if next_offset < result_set.total:
+            if set_id is None:
+                set_id = self.result_cache.put(result_set)
+            next_cursor = encode_cursor(set_id, next_offset, result_set.keyword)
+
+        # 结果由流水线生成，无需逐条校验；序列化时再由 SearchHit 生成输出字段
+        return SearchResponse.construct(
+            keyword=result_set.keyword,
+            results=page,
+            error=error,
+            total=result_set.total,
+            next_cursor=next_cursor
+        )
+
+    def _next_page(self, request: SearchRequest) -> SearchResponse:
+        """
+        根据游标从缓存的结果集中读取下一页
+        """
+        try:
+            set_id, offset = decode_cursor(request.cursor, request.keyword)
+        except ValueError as e:
+            return SearchResponse(keyword=request.keyword, results=[], error=str(e))
+
+        result_set = self.result_cache.get(set_id)
+        CACHE_REQUESTS.inc('result_set', 'miss' if result_set is None else 'hit')
+        if result_set is None:
+            return SearchResponse(
+                keyword=request.keyword,
+                results=[],
+                error="游标已过期，请重新搜索"
+            )
+        return self._build_page(result_set, offset, self._page_size(request), set_id=set_id)
+
     async def _search_with_plugin(self, plugin_name: str, keyword: str) -> List[dict]:
         """
         使用指定插件执行搜索
@@ -0,0 +1,123 @@
+import re
+from bisect import bisect_right
+from typing import List, Tuple
+
+# 句子结束符；换行是段落边界，上下文不会跨越段落
+_BOUNDARY_RE = re.compile(r'[.!?。！？\n]')
+
+Span = Tuple[int, int]
+
+
+class Snippet:
+    """
+    关键词上下文窗口，只保存原文偏移，不复制文本
+    """
+    __slots__ = ('start', 'end', 'highlights')
+
+    def __init__(self, start: int, end: int, highlights: List[Span]):
+        self.start = start
+        self.end = end
+        self.highlights = highlights
+
+
+class SnippetExtractor:
+    """
+    基于偏移的关键词上下文提取
+
+    每段文本只做一次小写转换和一次边界扫描，用 str.find 定位所有命中，
+    再用二分查找确定命中所在句子，取前后各 context 句作为窗口。
+    重叠或相邻的窗口直接合并，不需要做列表成员判断去重。
+    """
+
+    def __init__(self, keyword: str, context: int = 1, max_windows: int = 0):
+        self.terms = [term for term in dict.fromkeys(keyword.lower().split()) if term]
+        self.context = context
+        self.max_windows = max_windows
+
+    def _lower(self, text: str) -> str:
+        lowered = text.lower()
+        if len(lowered) == len(text):
+            return lowered
+        # 个别字符小写后长度会变化，逐字符处理以保持偏移一致
+        return ''.join(c if len(c.lower()) != 1 else c.lower() for c in text)
+
+    def find_matches(self, lowered: str) -> List[Span]:
+        matches = []
+        for term in self.terms:
+            size = len(term)
+            pos = lowered.find(term)
+            while pos != -1:
+                matches.append((pos, pos + size))
+                pos = lowered.find(term, pos + size)
+        matches.sort()
+        return matches
+
+    def extract(self, text: str) -> List[Snippet]:
+        """
+        返回按出现顺序排列的窗口，高亮偏移相对于原文
+        """
+        if not self.terms or not text:
+            return []
+        lowered = self._lower(text)
+        matches = self.find_matches(lowered)
+        if not matches:
+            return []
+
+        boundaries = [m.start() for m in _BOUNDARY_RE.finditer(text)]
+        snippets: List[Snippet] = []
+        for match_start, match_end in matches:
+            start, end = self._window(text, boundaries, match_start)
+            # 关键词本身含句号（如 node.js）时窗口至少覆盖整个命中
+            end = max(end, match_end)
+            if snippets and start <= snippets[-1].end:
+                last = snippets[-1]
+                last.end = max(last.end, end)
+                last.highlights.append((match_start, match_end))
+                continue
+            if self.max_windows and len(snippets) >= self.max_windows:
+                break
+            snippets.append(Snippet(start, end, [(match_start, match_end)]))
+        return snippets
+
+    def _window(self, text: str, boundaries: List[int], pos: int) -> Span:
+        # 命中所在句子的序号：之前出现的边界个数
+        index = bisect_right(boundaries, pos - 1)
+
+        first = index
+        for _ in range(self.context):
+            if first == 0 or text[boundaries[first - 1]] == '\n':
+                break
+            first -= 1
+        last = index
+        for _ in range(self.context):
+            if last >= len(boundaries) or text[boundaries[last]] == '\n':
+                break
+            last += 1
+
+        start = boundaries[first - 1] + 1 if first > 0 else 0
+        end = boundaries[last] + 1 if last < len(boundaries) else len(text)
+        if end > start and text[end - 1] == '\n':
+            end -= 1
+
+        # 去掉窗口两端的空白
+        while start < end and text[start].isspace():
+            start += 1
+        while end > start and text[end - 1].isspace():
+            end -= 1
+        return start, end
+
+    def render(self, text: str, snippets: List[Snippet]) -> Tuple[str, List[Span]]:
+        """
+        拼接窗口文本，返回 (片段文本, 相对片段文本的高亮区间)
+        """
+        parts = []
+        highlights: List[Span] = []
+        offset = 0
+        for snippet in snippets:
+            if parts:
+                offset += 1  # 换行分隔符
+            shift = offset - snippet.start
+            highlights.extend((s + shift, e + shift) for s, e in snippet.highlights)
+            parts.append(text[snippet.start:snippet.end])
+            offset += snippet.end - snippet.start
+        return '\n'.join(parts), highlights
@@ -0,0 +1,259 @@
+import os
+import json
+import time
+import uuid
+import asyncio
+from typing import Any, Dict, List, Optional, Set, Tuple
+from urllib.parse import urlsplit
+import aiohttp
+from loguru import logger
+from ..models.entry import FeedEntry
+from .metrics import SUBSCRIPTIONS, SUBSCRIPTION_EVENTS
+
+
+class Subscription:
+    """一个常驻查询"""
+
+    def __init__(self, keyword: str, webhook: Optional[str] = None,
+                 subscription_id: Optional[str] = None, created_at: Optional[float] = None):
+        self.id = subscription_id or uuid.uuid4().hex[:16]
+        self.keyword = keyword
+        self.needle = keyword.strip().lower()
+        self.webhook = webhook
+        self.created_at = created_at or time.time()
+        self.matches = 0
+        self.gram: Optional[str] = None  # 在倒排索引中登记的片段
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"id": self.id, "keyword": self.keyword, "webhook": self.webhook, "created_at": self.created_at}
+
+
+class SubscriptionIndex:
+    """
+    订阅关键词的倒排索引
+
+    关键词与搜索一样按子串匹配，中文不分词。每个订阅按关键词中的一个二字片段
+    （单字关键词按该字）登记，选当前登记订阅最少的片段；新条目取出文本中出现的全部片段，
+    只对片段命中的订阅做子串校验，每条条目的匹配代价与订阅总数基本无关。
+    """
+
+    def __init__(self):
+        self.bigrams: Dict[str, Dict[str, Subscription]] = {}
+        self.chars: Dict[str, Dict[str, Subscription]] = {}
+
+    def add(self, subscription: Subscription) -> None:
+        needle = subscription.needle
+        if len(needle) == 1:
+            postings, gram = self.chars, needle
+        else:
+            postings = self.bigrams
+            gram = min((needle[i:i + 2] for i in range(len(needle) - 1)),
+                       key=lambda g: len(postings.get(g, ())))
+        subscription.gram = gram
+        postings.setdefault(gram, {})[subscription.id] = subscription
+
+    def remove(self, subscription: Subscription) -> None:
+        postings = self.chars if len(subscription.needle) == 1 else self.bigrams
+        bucket = postings.get(subscription.gram)
+        if bucket is not None:
+            bucket.pop(subscription.id, None)
+            if not bucket:
+                del postings[subscription.gram]
+
+    def match(self, text: str) -> List[Subscription]:
+        """返回关键词出现在 text（已小写）中的订阅"""
+        candidates: List[Subscription] = []
+        if self.bigrams:
+            for gram in {text[i:i + 2] for i in range(len(text) - 1)}:
+                bucket = self.bigrams.get(gram)
+                if bucket:
+                    candidates.extend(bucket.values())
+        if self.chars:
+            for char in set(text):
+                bucket = self.chars.get(char)
+                if bucket:
+                    candidates.extend(bucket.values())
+        return [subscription for subscription in candidates if subscription.needle in text]
+
+
+class SubscriptionManager:
+    """
+    常驻查询与新结果推送
+
+    客户端注册一次关键词，不再定时轮询 /api/search。后台每隔 poll_interval 秒以条件请求
+    轮询各插件的新条目（每个 feed 一次请求，与客户端数无关），新条目经倒排索引与全部订阅匹配，
+    匹配结果推送到订阅的事件流（SSE）和本地 webhook。订阅保存在 store 文件中，重启后恢复。
+    """
+
+    def __init__(self, plugin_manager, config: Dict[str, Any]):
+        self.plugin_manager = plugin_manager
+        self.enabled = config.get('enabled', True)
+        self.poll_interval = config.get('poll_interval', 60)
+        self.store_path = config.get('store')
+        self.max_subscriptions = config.get('max_subscriptions', 1000)
+        self.queue_size = config.get('queue_size', 100)
+        self.webhook_timeout = config.get('webhook_timeout', 5)
+        self.webhook_hosts = set(config.get('webhook_hosts', ['127.0.0.1', 'localhost', '::1']))
+        self.subscriptions: Dict[str, Subscription] = {}
+        self.index = SubscriptionIndex()
+        self.listeners: Dict[str, Set[asyncio.Queue]] = {}
+        self._sequence = 0
+        self._task: Optional[asyncio.Task] = None
+        self._load()
+
+    def start(self) -> None:
+        if self.enabled and self.poll_interval and (self._task is None or self._task.done()):
+            self._task = asyncio.ensure_future(self._run())
+            logger.info(f"订阅推送已开启，{len(self.subscriptions)} 个订阅，轮询间隔 {self.poll_interval}s")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.poll()
+            except Exception as e:
+                logger.error(f"订阅轮询出错: {str(e)}")
+            await asyncio.sleep(self.poll_interval)
+
+    def subscribe(self, keyword: str, webhook: Optional[str] = None) -> Subscription:
+        """
+        注册订阅，关键词为空、webhook 不是允许的本地地址、订阅数已满
+        或没有运行中的插件能轮询新条目时抛出 ValueError
+        """
+        if not keyword.strip():
+            raise ValueError("关键词不能为空")
+        if not self.plugin_manager.supports_polling():
+            raise ValueError("没有运行中的插件支持轮询新条目，订阅不会收到推送")
+        if webhook is not None:
+            parts = urlsplit(webhook)
+            if parts.scheme not in ('http', 'https') or parts.hostname not in self.webhook_hosts:
+                raise ValueError(f"webhook 只允许发送到 {', '.join(sorted(self.webhook_hosts))}")
+        if len(self.subscriptions) >= self.max_subscriptions:
+            raise ValueError(f"订阅数已达上限 {self.max_subscriptions}")
+        subscription = Subscription(keyword, webhook)
+        self._add(subscription)
+        self._save()
+        logger.info(f"新增订阅 {subscription.id}: {keyword!r}")
+        return subscription
+
+    def unsubscribe(self, subscription_id: str) -> bool:
+        subscription = self.subscriptions.pop(subscription_id, None)
+        if subscription is None:
+            return False
+        self.index.remove(subscription)
+        for queue in self.listeners.pop(subscription_id, ()):
+            if queue.full():
+                queue.get_nowait()  # 事件流即将结束，丢弃最旧的事件为结束标记腾出位置
+                SUBSCRIPTION_EVENTS.inc('stream', 'dropped')
+            queue.put_nowait(None)  # 通知事件流结束
+        SUBSCRIPTIONS.set(value=len(self.subscriptions))
+        self._save()
+        return True
+
+    def _add(self, subscription: Subscription) -> None:
+        self.subscriptions[subscription.id] = subscription
+        self.index.add(subscription)
+        SUBSCRIPTIONS.set(value=len(self.subscriptions))
+
+    def listen(self, subscription_id: str) -> asyncio.Queue:
+        """打开一个事件流，订阅不存在时抛出 KeyError；事件为 None 表示订阅已取消"""
+        if subscription_id not in self.subscriptions:
+            raise KeyError(subscription_id)
+        queue: asyncio.Queue = asyncio.Queue(self.queue_size)
+        self.listeners.setdefault(subscription_id, set()).add(queue)
+        return queue
+
+    def unlisten(self, subscription_id: str, queue: asyncio.Queue) -> None:
+        queues = self.listeners.get(subscription_id)
+        if queues is not None:
+            queues.discard(queue)
+            if not queues:
+                del self.listeners[subscription_id]
+
+    def info(self, subscription: Subscription) -> Dict[str, Any]:
+        return {
+            **subscription.to_dict(),
+            "matches": subscription.matches,
+            "listeners": len(self.listeners.get(subscription.id, ())),
+        }
+
+    async def poll(self) -> int:
+        """轮询一次新条目并推送匹配结果，返回匹配数；没有订阅时不轮询"""
+        if not self.subscriptions:
+            return 0
+        entries = await self.plugin_manager.poll_entries()
+        matches: List[Tuple[Subscription, FeedEntry]] = []
+        for fresh in entries.values():
+            for entry, text in fresh:
+                for subscription in self.index.match(text):
+                    matches.append((subscription, entry))
+        if matches:
+            logger.info("{} 条新条目，匹配订阅 {} 次", sum(len(fresh) for fresh in entries.values()), len(matches))
+            await self._deliver(matches)
+        return len(matches)
+
+    async def _deliver(self, matches: List[Tuple[Subscription, FeedEntry]]) -> None:
+        webhooks = []
+        for subscription, entry in matches:
+            subscription.matches += 1
+            self._sequence += 1
+            event = {
+                "id": self._sequence,
+                "subscription": subscription.id,
+                "keyword": subscription.keyword,
+                "result": {"platform": entry.platform, "content": entry.content,
+                           "url": entry.url, "metadata": entry.metadata()},
+            }
+            for queue in self.listeners.get(subscription.id, ()):
+                if queue.full():
+                    # 客户端消费过慢，丢弃最旧的事件
+                    queue.get_nowait()
+                    SUBSCRIPTION_EVENTS.inc('stream', 'dropped')
+                queue.put_nowait(event)
+                SUBSCRIPTION_EVENTS.inc('stream', 'delivered')
+            if subscription.webhook:
+                webhooks.append((subscription.webhook, event))
+        if webhooks:
+            timeout = aiohttp.ClientTimeout(total=self.webhook_timeout)
+            async with aiohttp.ClientSession(timeout=timeout) as session:
+                await asyncio.gather(*(self._post(session, url, event) for url, event in webhooks))
+
+    @staticmethod
+    async def _post(session: aiohttp.ClientSession, url: str, event: Dict[str, Any]) -> None:
+        try:
+            async with session.post(url, json=event) as response:
+                ok = response.status < 400
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            ok = False
+            logger.warning(f"订阅 {event['subscription']} 推送 webhook 失败: {str(e)}")
+        SUBSCRIPTION_EVENTS.inc('webhook', 'delivered' if ok else 'failed')
+
+    def _load(self) -> None:
+        if not self.store_path or not os.path.exists(self.store_path):
+            return
+        try:
+            with open(self.store_path, 'r', encoding='utf-8') as f:
+                for item in json.load(f):
+                    self._add(Subscription(item['keyword'], item.get('webhook'), item['id'], item.get('created_at')))
+        except Exception as e:
+            logger.warning(f"读取订阅文件失败: {str(e)}")
+
+    def _save(self) -> None:
+        if not self.store_path:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.store_path) or '.', exist_ok=True)
+            temp_path = f"{self.store_path}.tmp"
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump([s.to_dict() for s in self.subscriptions.values()], f, ensure_ascii=False)
+            os.replace(temp_path, self.store_path)
+        except Exception as e:
+            logger.warning(f"写入订阅文件失败: {str(e)}")
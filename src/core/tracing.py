@@ -0,0 +1,252 @@
+import json
+import os
+import queue
+import random
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional
+from loguru import logger
+
+_current_span: ContextVar[Optional["Span"]] = ContextVar("searchub_current_span", default=None)
+
+
+class Span:
+    """
+    一个阶段的计时记录
+    """
+    __slots__ = ('trace', 'span_id', 'parent', 'name', 'start_ns', 'end_ns', 'attributes', 'children')
+
+    def __init__(self, trace: "Trace", name: str, parent: Optional["Span"], attributes: Dict[str, Any]):
+        self.trace = trace
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent = parent
+        self.name = name
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.attributes = attributes
+        self.children: List["Span"] = []
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def finish(self) -> None:
+        if self.end_ns is None:
+            self.end_ns = time.time_ns()
+
+    @property
+    def duration_ms(self) -> float:
+        end = self.end_ns if self.end_ns is not None else time.time_ns()
+        return (end - self.start_ns) / 1e6
+
+    def to_tree(self) -> Dict[str, Any]:
+        node = {
+            "name": self.name,
+            "start_offset_ms": round((self.start_ns - self.trace.root.start_ns) / 1e6, 3),
+            "duration_ms": round(self.duration_ms, 3),
+        }
+        if self.attributes:
+            node["attributes"] = self.attributes
+        if self.children:
+            node["children"] = [child.to_tree() for child in self.children]
+        return node
+
+    def to_wire(self) -> Dict[str, Any]:
+        """跨进程传输的形式，保留绝对时间，由 Tracer.adopt 挂到主进程的 trace 中"""
+        return {
+            "name": self.name,
+            "start_ns": self.start_ns,
+            "end_ns": self.end_ns or time.time_ns(),
+            "attributes": self.attributes,
+            "children": [child.to_wire() for child in self.children],
+        }
+
+    def to_otlp(self) -> Dict[str, Any]:
+        span = {
+            "traceId": self.trace.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": 1,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns or time.time_ns()),
+            "attributes": [
+                {"key": key, "value": _otlp_value(value)} for key, value in self.attributes.items()
+            ],
+        }
+        if self.parent is not None:
+            span["parentSpanId"] = self.parent.span_id
+        return span
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+class Trace:
+    """
+    单个请求的全部 span，超过 max_spans 后新的 span 不再记录
+    """
+
+    def __init__(self, name: str, max_spans: int, attributes: Optional[Dict[str, Any]] = None):
+        self.trace_id = uuid.uuid4().hex
+        self.max_spans = max_spans
+        self.spans: List[Span] = []
+        self.root = Span(self, name, None, attributes or {})
+        self.spans.append(self.root)
+
+    def new_span(self, name: str, parent: Span, attributes: Dict[str, Any]) -> Optional[Span]:
+        if len(self.spans) >= self.max_spans:
+            return None
+        span = Span(self, name, parent, attributes)
+        parent.children.append(span)
+        self.spans.append(span)
+        return span
+
+    def to_tree(self) -> Dict[str, Any]:
+        return {"trace_id": self.trace_id, "root": self.root.to_tree()}
+
+
+class OTLPFileExporter:
+    """
+    以 OTLP/JSON 格式把 trace 逐行写入本地文件
+
+    写文件在后台线程完成，请求路径只做一次入队。
+    """
+
+    def __init__(self, path: str, service_name: str = "searchub"):
+        self.path = path
+        self.service_name = service_name
+        self._queue: "queue.SimpleQueue[Optional[Trace]]" = queue.SimpleQueue()
+        self._thread: Optional[threading.Thread] = None
+
+    def export(self, trace: Trace) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="trace-exporter", daemon=True)
+            self._thread.start()
+        self._queue.put(trace)
+
+    def _payload(self, trace: Trace) -> Dict[str, Any]:
+        return {
+            "resourceSpans": [{
+                "resource": {"attributes": [
+                    {"key": "service.name", "value": {"stringValue": self.service_name}}
+                ]},
+                "scopeSpans": [{
+                    "scope": {"name": "searchub.tracing"},
+                    "spans": [span.to_otlp() for span in trace.spans],
+                }],
+            }]
+        }
+
+    def _run(self) -> None:
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        while True:
+            trace = self._queue.get()
+            if trace is None:
+                return
+            try:
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(self._payload(trace), ensure_ascii=False) + "\n")
+            except Exception as e:
+                logger.error(f"写入 trace 失败: {str(e)}")
+
+
+class Tracer:
+    """
+    进程内轻量级追踪
+
+    没有活动 trace 时 span() 直接返回，不产生任何开销。
+    """
+
+    def __init__(self):
+        self.enabled = True
+        self.max_spans = 1000
+        self.export_sample_rate = 0.0
+        self.exporter: Optional[OTLPFileExporter] = None
+
+    def configure(self, config: Dict[str, Any]) -> None:
+        self.enabled = config.get('enabled', True)
+        self.max_spans = config.get('max_spans', 1000)
+        self.export_sample_rate = config.get('export_sample_rate', 0.0)
+        export_file = config.get('export_file')
+        self.exporter = OTLPFileExporter(export_file) if export_file else None
+
+    @contextmanager
+    def start_trace(self, name: str, **attributes):
+        """
+        开始一个请求级 trace，退出时按采样率导出
+        """
+        if not self.enabled:
+            yield None
+            return
+        trace = Trace(name, self.max_spans, attributes)
+        token = _current_span.set(trace.root)
+        try:
+            yield trace
+        finally:
+            trace.root.finish()
+            _current_span.reset(token)
+            if self.exporter and self.export_sample_rate and random.random() < self.export_sample_rate:
+                self.exporter.export(trace)
+
+    def start_span(self, name: str, **attributes) -> Optional[Span]:
+        """
+        手动开始一个子 span，不改变当前上下文，需自行调用 finish()
+        """
+        parent = _current_span.get()
+        if parent is None:
+            return None
+        return parent.trace.new_span(name, parent, attributes)
+
+    def adopt(self, nodes: List[Dict[str, Any]]) -> None:
+        """
+        把宿主进程中记录的 span（Span.to_wire 的结果）挂到当前 span 下，没有活动 trace 时忽略
+        """
+        parent = _current_span.get()
+        if parent is not None:
+            self._adopt(parent, nodes)
+
+    def _adopt(self, parent: Span, nodes: List[Dict[str, Any]]) -> None:
+        for node in nodes:
+            span = parent.trace.new_span(node["name"], parent, dict(node.get("attributes") or {}))
+            if span is None:
+                return
+            span.start_ns = node["start_ns"]
+            span.end_ns = node["end_ns"]
+            self._adopt(span, node.get("children") or [])
+
+    @contextmanager
+    def span(self, name: str, **attributes):
+        parent = _current_span.get()
+        if parent is None:
+            yield None
+            return
+        span = parent.trace.new_span(name, parent, attributes)
+        if span is None:
+            yield None
+            return
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.set_attribute("error", str(e) or type(e).__name__)
+            raise
+        finally:
+            span.finish()
+            _current_span.reset(token)
+
+
+def current_trace() -> Optional[Trace]:
+    span = _current_span.get()
+    return span.trace if span is not None else None
+
+
+tracer = Tracer()
@@ -5,7 +5,6 @@ from fastapi.templating import Jinja2Templates
 from src.core.search_coordinator import SearchCoordinator
 from src.core.plugin_manager import PluginManager
 from src.core.environment_manager import EnvironmentManager
-from src.core.result_aggregator import ResultAggregator
 from src.models.schemas import SearchRequest, SearchResponse
 from loguru import logger
 import os
@@ -27,11 +26,9 @@ app.add_middleware(
 # 初始化组件
 environment_manager = EnvironmentManager()
 plugin_manager = PluginManager()
-result_aggregator = ResultAggregator()
 search_coordinator = SearchCoordinator(
     plugin_manager=plugin_manager,
-    environment_manager=environment_manager,
-    result_aggregator=result_aggregator
+    environment_manager=environment_manager
 )
 
 # 确保目录存在
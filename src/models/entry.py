@@ -0,0 +1,106 @@
+from typing import Any, Dict, List, Optional
+
+# FeedEntry 中作为独立字段保存的 metadata 键，其余键放入 extra
+ENTRY_METADATA_FIELDS = ('title', 'published', 'author', 'source')
+
+
+class FeedEntry:
+    """
+    插件产出的单条结果
+
+    以 __slots__ 保存固定字段，每条约一百多字节，远小于 FeedParserDict 或嵌套 dict；
+    从插件经 PluginManager 到聚合流水线只传递引用，不做拷贝。
+    条目会被多个请求和缓存共享，创建后不应修改，单次请求的状态保存在 SearchHit 中。
+    """
+    __slots__ = ('platform', 'content', 'url', 'title', 'published', 'author', 'source', 'extra')
+
+    def __init__(self, platform: str, content: str, url: Optional[str] = None, title: Optional[str] = None,
+                 published: Optional[str] = None, author: Optional[str] = None, source: Optional[str] = None,
+                 extra: Optional[Dict[str, Any]] = None):
+        self.platform = platform
+        self.content = content
+        self.url = url
+        self.title = title
+        self.published = published
+        self.author = author
+        self.source = source
+        self.extra = extra
+
+    @classmethod
+    def from_dict(cls, result: Dict[str, Any]) -> 'FeedEntry':
+        """兼容返回 {platform, content, url, metadata} 字典的插件"""
+        metadata = result.get('metadata') or {}
+        extra = {key: value for key, value in metadata.items() if key not in ENTRY_METADATA_FIELDS}
+        return cls(
+            result['platform'], result['content'], result.get('url'),
+            metadata.get('title'), metadata.get('published'), metadata.get('author'), metadata.get('source'),
+            extra or None
+        )
+
+    def to_wire(self) -> List[Any]:
+        """宿主进程协议中的紧凑表示，按 __slots__ 顺序排列的字段值"""
+        return [self.platform, self.content, self.url, self.title,
+                self.published, self.author, self.source, self.extra]
+
+    @classmethod
+    def from_wire(cls, values: List[Any]) -> 'FeedEntry':
+        return cls(*values)
+
+    def metadata(self) -> Dict[str, Any]:
+        """序列化用的 metadata 字典，每次调用新建"""
+        metadata: Dict[str, Any] = {}
+        if self.title is not None:
+            metadata['title'] = self.title
+        if self.published is not None:
+            metadata['published'] = self.published
+        if self.author is not None:
+            metadata['author'] = self.author
+        if self.source is not None:
+            metadata['source'] = self.source
+        if self.extra:
+            metadata.update(self.extra)
+        return metadata
+
+
+class SearchHit:
+    """
+    一次搜索请求中的一条结果
+
+    引用共享的 FeedEntry，只保存本次请求产生的片段正文、合并来源、高亮区间和得分；
+    序列化时由 SearchResult（orm_mode）读取 platform/content/url/metadata。
+    """
+    __slots__ = ('entry', 'content', 'sources', 'highlights', 'score')
+
+    def __init__(self, entry: FeedEntry):
+        self.entry = entry
+        self.content = entry.content
+        self.sources: Optional[List[Dict[str, Any]]] = None
+        self.highlights: Optional[List[List[int]]] = None
+        self.score: Optional[float] = None
+
+    @property
+    def platform(self) -> str:
+        return self.entry.platform
+
+    @property
+    def url(self) -> Optional[str]:
+        return self.entry.url
+
+    @property
+    def title(self) -> Optional[str]:
+        return self.entry.title
+
+    @property
+    def published(self) -> Optional[str]:
+        return self.entry.published
+
+    @property
+    def metadata(self) -> Dict[str, Any]:
+        metadata = self.entry.metadata()
+        if self.sources is not None:
+            metadata['sources'] = self.sources
+        if self.highlights is not None:
+            metadata['highlights'] = self.highlights
+        if self.score is not None:
+            metadata['score'] = self.score
+        return metadata
@@ -4,12 +4,15 @@ from pydantic import BaseModel, Field
 class SearchRequest(BaseModel):
     keyword: str
     platforms: Optional[List[str]] = None
+    limit: Optional[int] = Field(None, ge=1, description="每页返回的结果数")
+    cursor: Optional[str] = Field(None, description="上一页返回的 next_cursor")
 
     class Config:
         schema_extra = {
             "example": {
                 "keyword": "python",
-                "platforms": ["github", "stackoverflow"]
+                "platforms": ["github", "stackoverflow"],
+                "limit": 20
             }
         }
 
@@ -20,6 +23,8 @@ class SearchResult(BaseModel):
     metadata: Dict[str, Any] = {}
 
     class Config:
+        # 聚合结果为 SearchHit 对象，序列化时按属性读取
+        orm_mode = True
         schema_extra = {
             "example": {
                 "platform": "github",
@@ -33,6 +38,9 @@ class SearchResponse(BaseModel):
     keyword: str
     results: List[SearchResult]
     error: Optional[str] = None
+    total: Optional[int] = None
+    next_cursor: Optional[str] = None
+    trace: Optional[Dict[str, Any]] = Field(None, description="请求 ?trace=1 时返回的阶段耗时树")
 
     class Config:
         schema_extra = {
@@ -46,7 +54,9 @@ class SearchResponse(BaseModel):
                         "metadata": {"score": 0.95}
                     }
                 ],
-                "error": None
+                "error": None,
+                "total": 1,
+                "next_cursor": None
             }
         }
 
@@ -76,4 +86,25 @@ class PluginInfo(BaseModel):
                     "port": 8080
                 }
             }
-        } 
\ No newline at end of file
+        } 
+
+
+class SubscriptionRequest(BaseModel):
+    keyword: str = Field(..., min_length=1, description="订阅的关键词，匹配方式与搜索相同")
+    webhook: Optional[str] = Field(None, description="新匹配推送到的本地 webhook 地址，不填时只通过事件流推送")
+
+    class Config:
+        schema_extra = {
+            "example": {
+                "keyword": "黄金",
+                "webhook": "http://127.0.0.1:9000/hooks/searchub"
+            }
+        }
+
+class SubscriptionInfo(BaseModel):
+    id: str
+    keyword: str
+    webhook: Optional[str] = None
+    created_at: float
+    matches: int = Field(0, description="启动以来匹配到的新条目数")
+    listeners: int = Field(0, description="当前连接的事件流数")
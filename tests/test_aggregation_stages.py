@@ -0,0 +1,33 @@
+import asyncio
+from src.core.result_aggregator import ResultAggregator
+from src.models.entry import FeedEntry
+
+KEYWORD = "黄金"
+SHARED = "黄金价格今日大幅上涨，市场避险情绪升温，投资者纷纷买入黄金相关资产。"
+
+
+def aggregate(entries, **aggregation):
+    aggregator = ResultAggregator(KEYWORD, config={'aggregation': aggregation})
+    asyncio.run(aggregator.process_batch_results(entries))
+    return [result for _, result in aggregator.get_scored_results()]
+
+
+def test_duplicate_of_evicted_result_is_kept():
+    entries = [
+        FeedEntry("a", SHARED, "http://a.example/1", published="2024-01-01T00:00:00Z"),
+        FeedEntry("c", "黄金 ETF 持仓连续三日减少，机构调仓迹象明显，后市仍需观察。",
+                  "http://c.example/1", published="2024-01-02T00:00:00Z"),
+        FeedEntry("b", SHARED, "http://b.example/1", published="2024-01-03T00:00:00Z"),
+    ]
+    results = aggregate(entries, max_results_per_request=1)
+    assert [result.platform for result in results] == ["b"]
+
+
+def test_duplicate_of_dropped_result_is_kept():
+    entries = [
+        FeedEntry("a", "与关键词无关的内容，会被相关片段阶段丢弃。", "http://example.com/news/1"),
+        FeedEntry("b", SHARED, "https://www.example.com/news/1/?utm_source=feed"),
+    ]
+    results = aggregate(entries)
+    assert [result.platform for result in results] == ["b"]
+    assert results[0].sources == [{'platform': "b", 'url': "https://www.example.com/news/1/?utm_source=feed"}]
@@ -0,0 +1,94 @@
+import pytest
+from src.core import circuit_breaker
+from src.core.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, RemoteBreaker
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(circuit_breaker.time, "monotonic", clock)
+    return clock
+
+
+def tripped(clock, half_open_max_calls=1):
+    breaker = CircuitBreaker("host:example.com", failure_threshold=2, reset_timeout=30,
+                             half_open_max_calls=half_open_max_calls)
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    clock.now += 30
+    return breaker
+
+
+def test_open_breaker_rejects_until_reset_timeout(clock):
+    breaker = CircuitBreaker("plugin:a", failure_threshold=1, reset_timeout=30)
+    breaker.record_failure()
+    clock.now += 10
+    assert breaker.rejecting
+    assert not breaker.allow()
+    assert breaker.retry_after == pytest.approx(20)
+    clock.now += 20
+    assert breaker.state == HALF_OPEN
+    assert not breaker.rejecting
+
+
+def test_half_open_admits_only_trial_slots(clock):
+    breaker = tripped(clock, half_open_max_calls=2)
+    assert breaker.allow()
+    assert breaker.allow()
+    assert not breaker.allow()
+    assert breaker.state == HALF_OPEN
+
+
+def test_release_returns_trial_slot(clock):
+    breaker = tripped(clock)
+    assert breaker.allow()
+    assert not breaker.allow()
+    breaker.release()
+    assert breaker.allow()
+
+
+def test_release_outside_half_open_is_ignored(clock):
+    breaker = CircuitBreaker("plugin:a")
+    breaker.release()
+    assert breaker.state == CLOSED and breaker.allow()
+
+
+def test_trial_success_closes(clock):
+    breaker = tripped(clock)
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CLOSED
+    assert breaker.failures == 0
+    assert breaker.allow() and breaker.allow()
+
+
+def test_trial_failure_reopens_with_new_timeout(clock):
+    breaker = tripped(clock)
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    assert breaker.trips == 2
+    assert breaker.retry_after == pytest.approx(30)
+    clock.now += 30
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow()  # 重新打开后试探名额重新计数
+
+
+def test_remote_breaker_ages_snapshot(clock):
+    remote = RemoteBreaker("host:example.com", {"state": OPEN, "failures": 5, "trips": 1, "retry_after": 10.0})
+    assert remote.rejecting
+    clock.now += 4
+    assert remote.snapshot()["retry_after"] == pytest.approx(6)
+    clock.now += 6
+    assert remote.state == HALF_OPEN
+    assert not remote.rejecting
+    assert RemoteBreaker("host:b", {"state": CLOSED}).severity < remote.severity
@@ -0,0 +1,92 @@
+import asyncio
+import pytest
+from src.core.hedging import LatencyTracker, hedged
+
+
+class Upstream:
+    """记录调用是否发出、是否被取消的模拟上游"""
+
+    def __init__(self, result=None, delay=0.0, error=None):
+        self.result = result
+        self.delay = delay
+        self.error = error
+        self.started = False
+        self.cancelled = False
+
+    async def __call__(self):
+        self.started = True
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+
+def run(upstreams, delay=0.05, **kwargs):
+    return asyncio.run(hedged(upstreams, lambda index: delay, **kwargs))
+
+
+def test_fast_primary_does_not_launch_hedge():
+    primary, hedge = Upstream("primary"), Upstream("hedge")
+    assert run([primary, hedge]) == (0, "primary")
+    assert not hedge.started
+
+
+def test_slow_primary_is_hedged_and_cancelled():
+    primary, hedge = Upstream("primary", delay=1.0), Upstream("hedge")
+    assert run([primary, hedge]) == (1, "hedge")
+    assert primary.cancelled
+
+
+def test_failed_primary_launches_hedge_without_waiting():
+    primary, hedge = Upstream(error=ConnectionError("down")), Upstream("hedge")
+
+    async def timed():
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        result = await hedged([primary, hedge], lambda index: 10.0)
+        return result, loop.time() - started
+
+    result, elapsed = asyncio.run(timed())
+    assert result == (1, "hedge")
+    assert elapsed < 1.0
+
+
+def test_unacceptable_result_falls_back_to_last():
+    primary, hedge = Upstream([]), Upstream([])
+    assert run([primary, hedge], accept=lambda result: len(result) > 0) == (1, [])
+    assert hedge.started
+
+
+def test_all_failed_raises_last_error():
+    upstreams = [Upstream(error=ConnectionError("first")), Upstream(error=TimeoutError("second"))]
+    with pytest.raises(TimeoutError, match="second"):
+        run(upstreams)
+
+
+def test_hedge_cancelled_when_caller_is_cancelled():
+    primary, hedge = Upstream("primary", delay=1.0), Upstream("hedge", delay=1.0)
+
+    async def cancel():
+        task = asyncio.ensure_future(hedged([primary, hedge], lambda index: 0.01))
+        await asyncio.sleep(0.05)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        await asyncio.sleep(0)
+
+    asyncio.run(cancel())
+    assert primary.cancelled and hedge.cancelled
+
+
+def test_latency_quantile_needs_min_samples():
+    tracker = LatencyTracker(window=100)
+    for ms in range(1, 20):
+        tracker.observe("example.com", ms / 1000)
+    assert tracker.quantile("example.com", 0.95) is None
+    tracker.observe("example.com", 0.020)
+    assert tracker.quantile("example.com", 0.95) == pytest.approx(0.020)
+    assert tracker.quantile("other.com", 0.95) is None
@@ -0,0 +1,60 @@
+import base64
+import pytest
+from src.core import result_cache
+from src.core.result_cache import RankedResultSet, ResultSetCache, _keyword_digest, decode_cursor, encode_cursor
+
+
+def raw_cursor(text):
+    return base64.urlsafe_b64encode(text.encode()).decode().rstrip('=')
+
+
+def test_cursor_round_trip():
+    cursor = encode_cursor("abc123", 20, "黄金")
+    assert decode_cursor(cursor, "黄金") == ("abc123", 20)
+
+
+def test_cursor_for_another_keyword_is_rejected():
+    cursor = encode_cursor("abc123", 20, "黄金")
+    with pytest.raises(ValueError):
+        decode_cursor(cursor, "白银")
+
+
+@pytest.mark.parametrize("cursor", [
+    "",
+    "!!not-base64!!",
+    raw_cursor("abc123"),
+    raw_cursor(f"abc123:ten:{_keyword_digest('黄金')}"),
+    raw_cursor(f"abc123:-10:{_keyword_digest('黄金')}"),
+    raw_cursor("abc123:10:000000000000"),
+])
+def test_tampered_cursor_is_rejected(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor, "黄金")
+
+
+def test_result_set_pages_in_score_order():
+    result_set = RankedResultSet("k", [(0.1, "c"), (0.9, "a"), (0.5, "b"), (0.5, "b2")])
+    assert [item for _, item in result_set.page(0, 2)] == ["a", "b"]
+    assert [item for _, item in result_set.page(2, 10)] == ["b2", "c"]
+    assert [item for _, item in result_set.page(1, 2)] == ["b", "b2"]
+    assert result_set.page(10, 2) == []
+
+
+def test_cache_expires_after_ttl(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(result_cache.time, "monotonic", lambda: now[0])
+    cache = ResultSetCache(ttl=60)
+    set_id = cache.put(RankedResultSet("k", []))
+    now[0] += 59
+    assert cache.get(set_id) is not None
+    now[0] += 1
+    assert cache.get(set_id) is None
+    assert len(cache) == 0
+
+
+def test_cache_evicts_oldest_beyond_max_entries():
+    cache = ResultSetCache(max_entries=2)
+    ids = [cache.put(RankedResultSet(str(i), [])) for i in range(3)]
+    assert cache.get(ids[0]) is None
+    assert [cache.get(set_id).keyword for set_id in ids[1:]] == ["1", "2"]
+    assert cache.get("unknown") is None
@@ -0,0 +1,137 @@
+import asyncio
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from src.api import routes
+from src.api.responses import ResponseEncoder
+from src.core.scheduler import BATCH, INTERACTIVE, SchedulerOverloaded, SearchScheduler
+
+
+def scheduler(max_concurrent=1, **scheduling):
+    return SearchScheduler({'system': {'max_concurrent_crawlers': max_concurrent},
+                            'search': {'scheduling': scheduling}})
+
+
+async def hold(sched, order, name, release, priority=INTERACTIVE, client="anonymous"):
+    async with sched.slot(priority, client):
+        order.append(name)
+        await release.wait()
+
+
+async def drain(tasks, release):
+    """依次放行：每次只释放当前占用名额的请求"""
+    while not all(task.done() for task in tasks):
+        release.set()
+        await asyncio.sleep(0)
+        release.clear()
+        await asyncio.sleep(0)
+    await asyncio.gather(*tasks)
+
+
+def test_clients_are_served_round_robin():
+    async def run():
+        sched = scheduler()
+        order, release = [], asyncio.Event()
+        blocker = asyncio.ensure_future(hold(sched, order, "blocker", release))
+        await asyncio.sleep(0)
+        tasks = [blocker]
+        for name, client in [("a1", "a"), ("a2", "a"), ("a3", "a"), ("b1", "b")]:
+            tasks.append(asyncio.ensure_future(hold(sched, order, name, release, client=client)))
+            await asyncio.sleep(0)
+        await drain(tasks, release)
+        return order
+
+    assert asyncio.run(run()) == ["blocker", "a1", "b1", "a2", "a3"]
+
+
+def test_higher_priority_is_dispatched_first():
+    async def run():
+        sched = scheduler()
+        order, release = [], asyncio.Event()
+        tasks = [asyncio.ensure_future(hold(sched, order, "blocker", release))]
+        await asyncio.sleep(0)
+        tasks.append(asyncio.ensure_future(hold(sched, order, "batch", release, priority=BATCH)))
+        await asyncio.sleep(0)
+        tasks.append(asyncio.ensure_future(hold(sched, order, "interactive", release)))
+        await asyncio.sleep(0)
+        await drain(tasks, release)
+        return order
+
+    assert asyncio.run(run()) == ["blocker", "interactive", "batch"]
+
+
+def test_cancel_while_queued_frees_the_queue():
+    async def run():
+        sched = scheduler()
+        order, release = [], asyncio.Event()
+        blocker = asyncio.ensure_future(hold(sched, order, "blocker", release))
+        await asyncio.sleep(0)
+        cancelled = asyncio.ensure_future(hold(sched, order, "cancelled", release, client="a"))
+        waiting = asyncio.ensure_future(hold(sched, order, "waiting", release, client="b"))
+        await asyncio.sleep(0)
+        assert sched.snapshot()["classes"][INTERACTIVE]["queued"] == 2
+
+        cancelled.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await cancelled
+        classes = sched.snapshot()["classes"][INTERACTIVE]
+        assert (classes["queued"], classes["clients"]) == (1, 1)
+
+        await drain([blocker, waiting], release)
+        return order, sched.running[INTERACTIVE], sched.snapshot()["classes"][INTERACTIVE]["queued"]
+
+    order, running, queued = asyncio.run(run())
+    assert order == ["blocker", "waiting"]
+    assert (running, queued) == (0, 0)
+
+
+def test_full_queue_is_rejected_with_retry_after():
+    async def run():
+        sched = scheduler(queue_depth={INTERACTIVE: 1})
+        release = asyncio.Event()
+        tasks = [asyncio.ensure_future(hold(sched, [], name, release, client=name)) for name in ("running", "queued")]
+        await asyncio.sleep(0)
+        with pytest.raises(SchedulerOverloaded) as rejected:
+            async with sched.slot(INTERACTIVE, "late"):
+                pass
+        release.set()
+        await asyncio.gather(*tasks)
+        return rejected.value
+
+    error = asyncio.run(run())
+    assert error.priority == INTERACTIVE
+    assert error.retry_after >= 1
+
+
+def test_per_client_queue_limit():
+    async def run():
+        sched = scheduler(max_queued_per_client=1)
+        release = asyncio.Event()
+        tasks = [asyncio.ensure_future(hold(sched, [], name, release, client="greedy")) for name in ("running", "queued")]
+        await asyncio.sleep(0)
+        with pytest.raises(SchedulerOverloaded):
+            async with sched.slot(INTERACTIVE, "greedy"):
+                pass
+        # 其他客户端不受影响
+        tasks.append(asyncio.ensure_future(hold(sched, [], "other", release, client="other")))
+        await asyncio.sleep(0)
+        release.set()
+        await asyncio.gather(*tasks)
+
+    asyncio.run(run())
+
+
+def test_search_route_returns_429_with_retry_after():
+    class Coordinator:
+        scheduler = scheduler()
+
+        async def search(self, request, priority, client):
+            raise SchedulerOverloaded(priority, 7)
+
+    app = FastAPI()
+    app.include_router(routes.router)
+    app.dependency_overrides[routes.get_search_coordinator] = Coordinator
+    app.dependency_overrides[routes.get_response_encoder] = ResponseEncoder
+    response = TestClient(app).post('/api/search', json={'keyword': 'x'}, headers={'X-Priority': 'batch'})
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "7"
@@ -0,0 +1,249 @@
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+from bisect import bisect_left
+from typing import Dict, Any, List, Optional
+import aiohttp
+from loguru import logger
+
+DEFAULT_KEYWORDS = ["市场", "黄金", "原油", "央行", "美元", "猪肉", "大豆", "期货", "储备", "利率"]
+
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(pct / 100 * len(ordered)))]
+
+
+def latency_summary(values: List[float]) -> Dict[str, float]:
+    return {
+        "p50": round(percentile(values, 50), 2),
+        "p90": round(percentile(values, 90), 2),
+        "p95": round(percentile(values, 95), 2),
+        "p99": round(percentile(values, 99), 2),
+        "max": round(max(values), 2) if values else 0.0,
+        "mean": round(sum(values) / len(values), 2) if values else 0.0,
+    }
+
+
+class KeywordSampler:
+    """
+    按分布抽取关键词
+
+    zipf 分布下排名第 k 的关键词权重为 1/k^s，更接近真实搜索的长尾特征。
+    """
+
+    def __init__(self, keywords: List[str], distribution: str = "zipf", zipf_s: float = 1.1, seed: int = 42):
+        self.keywords = keywords
+        self.rng = random.Random(seed)
+        if distribution == "zipf":
+            weights = [1 / (rank ** zipf_s) for rank in range(1, len(keywords) + 1)]
+        else:
+            weights = [1.0] * len(keywords)
+        total = sum(weights)
+        self.cumulative = []
+        acc = 0.0
+        for weight in weights:
+            acc += weight / total
+            self.cumulative.append(acc)
+
+    def __call__(self) -> str:
+        index = bisect_left(self.cumulative, self.rng.random())
+        return self.keywords[min(index, len(self.keywords) - 1)]
+
+
+class LoadGenerator:
+    """
+    对运行中的实例施加并发搜索负载
+
+    并发 worker 在 ramp_up 时间内逐个启动，持续 duration 秒；
+    按时间窗口记录吞吐和延迟，便于观察并发升高时的拐点。
+    """
+
+    def __init__(self, base_url: str, concurrency: int, duration: float, ramp_up: float,
+                 sampler: KeywordSampler, timeout: float = 60, window: float = 5.0):
+        self.base_url = base_url.rstrip("/")
+        self.concurrency = concurrency
+        self.duration = duration
+        self.ramp_up = ramp_up
+        self.sampler = sampler
+        self.timeout = timeout
+        self.window = window
+        self.records: List[tuple] = []  # (完成时间偏移, 延迟ms, 是否成功, 关键词, 活跃 worker 数)
+        self.active = 0
+
+    async def _worker(self, session: aiohttp.ClientSession, index: int, started: float) -> None:
+        await asyncio.sleep(self.ramp_up * index / self.concurrency)
+        deadline = started + self.duration
+        self.active += 1
+        try:
+            while time.perf_counter() < deadline:
+                keyword = self.sampler()
+                request_started = time.perf_counter()
+                try:
+                    async with session.post(f"{self.base_url}/api/search", json={"keyword": keyword}) as response:
+                        await response.read()
+                        ok = response.status == 200
+                except Exception as e:
+                    logger.debug(f"请求失败: {str(e)}")
+                    ok = False
+                finished = time.perf_counter()
+                self.records.append((
+                    finished - started, (finished - request_started) * 1000, ok, keyword, self.active
+                ))
+        finally:
+            self.active -= 1
+
+    async def run(self) -> None:
+        timeout = aiohttp.ClientTimeout(total=self.timeout)
+        connector = aiohttp.TCPConnector(limit=self.concurrency)
+        async with aiohttp.ClientSession(timeout=timeout, connector=connector) as session:
+            started = time.perf_counter()
+            await asyncio.gather(*(self._worker(session, i, started) for i in range(self.concurrency)))
+
+    def report(self) -> Dict[str, Any]:
+        latencies = [record[1] for record in self.records]
+        errors = sum(1 for record in self.records if not record[2])
+        elapsed = max((record[0] for record in self.records), default=0.0)
+
+        timeline = []
+        buckets: Dict[int, List[tuple]] = {}
+        for record in self.records:
+            buckets.setdefault(int(record[0] // self.window), []).append(record)
+        for index in sorted(buckets):
+            window_records = buckets[index]
+            timeline.append({
+                "start": index * self.window,
+                "concurrency": max(record[4] for record in window_records),
+                "requests": len(window_records),
+                "errors": sum(1 for record in window_records if not record[2]),
+                "throughput_rps": round(len(window_records) / self.window, 2),
+                "latency_ms": latency_summary([record[1] for record in window_records]),
+            })
+
+        keywords: Dict[str, int] = {}
+        for record in self.records:
+            keywords[record[3]] = keywords.get(record[3], 0) + 1
+
+        return {
+            "requests": len(self.records),
+            "errors": errors,
+            "elapsed_seconds": round(elapsed, 3),
+            "throughput_rps": round(len(self.records) / elapsed, 2) if elapsed else 0.0,
+            "latency_ms": latency_summary(latencies),
+            "timeline": timeline,
+            "keywords": dict(sorted(keywords.items(), key=lambda item: -item[1])),
+        }
+
+
+async def _debug_call(session: aiohttp.ClientSession, method: str, url: str, **kwargs) -> Optional[aiohttp.ClientResponse]:
+    """调用调试接口，接口关闭（404）时返回 None"""
+    response = await session.request(method, url, **kwargs)
+    if response.status == 404:
+        response.release()
+        return None
+    response.raise_for_status()
+    return response
+
+
+async def run(args: argparse.Namespace) -> int:
+    keywords = DEFAULT_KEYWORDS
+    if args.keywords_file:
+        with open(args.keywords_file, encoding="utf-8") as f:
+            keywords = [line.strip() for line in f if line.strip() and not line.startswith("#")]
+    elif args.keywords:
+        keywords = [keyword.strip() for keyword in args.keywords.split(",") if keyword.strip()]
+
+    sampler = KeywordSampler(keywords, args.distribution, args.zipf_s, args.seed)
+    generator = LoadGenerator(
+        args.url, args.concurrency, args.duration, args.ramp_up, sampler, args.timeout, args.window
+    )
+    base_url = args.url.rstrip("/")
+    os.makedirs(args.output_dir, exist_ok=True)
+    debug_enabled = True
+
+    async with aiohttp.ClientSession() as session:
+        # 清空事件循环延迟统计，只保留本次压测期间的数据
+        if await _debug_call(session, "GET", f"{base_url}/api/debug/loop-lag", params={"reset": "true"}) is None:
+            debug_enabled = False
+            logger.warning("服务端未开启 profiling.enabled，将只输出延迟报告")
+        if debug_enabled and args.profile:
+            await _debug_call(session, "POST", f"{base_url}/api/debug/profile/start", params={
+                "duration": str(args.duration + args.ramp_up + 30),
+                "interval": str(args.profile_interval),
+            })
+
+        logger.info(f"开始压测: 并发 {args.concurrency}，持续 {args.duration}s，爬坡 {args.ramp_up}s")
+        await generator.run()
+        report = generator.report()
+        report["params"] = {
+            "url": args.url,
+            "concurrency": args.concurrency,
+            "duration": args.duration,
+            "ramp_up": args.ramp_up,
+            "distribution": args.distribution,
+            "zipf_s": args.zipf_s,
+            "keywords": len(keywords),
+        }
+
+        if debug_enabled:
+            response = await _debug_call(session, "GET", f"{base_url}/api/debug/loop-lag")
+            report["loop_lag"] = await response.json()
+            if args.profile:
+                response = await _debug_call(session, "GET", f"{base_url}/api/debug/profile")
+                report["profile_top"] = (await response.json())["top"]
+                response = await _debug_call(session, "POST", f"{base_url}/api/debug/profile/stop")
+                stacks_path = os.path.join(args.output_dir, "profile.folded")
+                with open(stacks_path, "w", encoding="utf-8") as f:
+                    f.write(await response.text())
+                report["profile_file"] = stacks_path
+
+    report_path = os.path.join(args.output_dir, "report.json")
+    with open(report_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+    print(f"\n请求数: {report['requests']}  错误: {report['errors']}  吞吐: {report['throughput_rps']} req/s")
+    print("延迟(ms): " + "  ".join(f"{key}={value}" for key, value in report["latency_ms"].items()))
+    print("\n时间窗口:")
+    for window in report["timeline"]:
+        print(f"  {window['start']:>6.0f}s  并发 {window['concurrency']:>4}  "
+              f"{window['throughput_rps']:>8} req/s  p95 {window['latency_ms']['p95']:>9}ms  错误 {window['errors']}")
+    if "loop_lag" in report:
+        lag = report["loop_lag"]
+        print(f"\n事件循环延迟(ms): p50={lag['p50_ms']}  p99={lag['p99_ms']}  max={lag['max_ms']}")
+    for item in report.get("profile_top", [])[:10]:
+        print(f"  {item['ratio']:>6.1%}  {item['function']}")
+    print(f"\n报告已写入 {report_path}")
+    if "profile_file" in report:
+        print(f"折叠栈已写入 {report['profile_file']}，可用 flamegraph.pl 或 speedscope 查看")
+    return 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="对运行中的实例施加搜索负载并采集性能数据")
+    parser.add_argument("--url", default="http://localhost:9527", help="实例地址")
+    parser.add_argument("--concurrency", type=int, default=10, help="最大并发数")
+    parser.add_argument("--duration", type=float, default=60, help="压测持续时间（秒）")
+    parser.add_argument("--ramp-up", type=float, default=10, help="并发爬坡时间（秒）")
+    parser.add_argument("--keywords", help="逗号分隔的关键词列表，按热度从高到低排列")
+    parser.add_argument("--keywords-file", help="关键词文件，每行一个，按热度从高到低排列")
+    parser.add_argument("--distribution", choices=["zipf", "uniform"], default="zipf", help="关键词分布")
+    parser.add_argument("--zipf-s", type=float, default=1.1, help="zipf 分布指数")
+    parser.add_argument("--timeout", type=float, default=60, help="单个请求超时（秒）")
+    parser.add_argument("--window", type=float, default=5, help="报告时间窗口（秒）")
+    parser.add_argument("--profile", action="store_true", help="压测期间在服务端进行 CPU 采样分析")
+    parser.add_argument("--profile-interval", type=float, default=0.005, help="采样间隔（秒）")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output-dir", default=os.path.join("benchmarks", "results", "load", time.strftime("%Y%m%d-%H%M%S")),
+                        help="报告输出目录")
+    args = parser.parse_args()
+    return asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())